@@ -0,0 +1,279 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from life import ENGINES, PATTERNS, centered_origin, create_engine, line_cells, pattern_offsets, stroke_cells
+
+SIZES = [(50, 80), (500, 500), (2000, 2000), (10000, 10000)]
+QUICK_SIZES = [(50, 80), (500, 500)]
+# "random" is the 20% used by the window's Aleatorio button
+DENSITIES = {"sparse": 0.02, "random": 0.2, "full": 1.0}
+SEED = 1234
+VIEW_SIZE = (1024, 768)
+# Metrics compared with a baseline; lower is better for all of them
+COMPARED = ("ms_per_gen", "ms_per_frame", "ms", "peak_mb")
+
+
+def too_slow(name, rows, cols, density):
+    # HashLife builds and steps dense soups node by node: ~7 s/gen at 2000x2000, 20%
+    return name == "HashLife" and density < 1 and rows * cols * density > 1_000_000
+
+
+def seeded(name, rows, cols, density, wrap=False):
+    engine = create_engine(name, rows, cols, wrap=wrap)
+    if density >= 1:
+        engine.fill()
+    else:
+        engine.randomize(density, seed=SEED)
+    return engine
+
+
+def timed(fn, min_time, repeat=3):
+    # Seconds per call as the best mean of `repeat` batches (like timeit, the
+    # least disturbed by other load); each batch runs at least once
+    best, total = None, 0
+    for _ in range(repeat):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / repeat:
+                break
+        best = elapsed / runs if best is None else min(best, elapsed / runs)
+        total += runs
+    return best, total
+
+
+def step_case(name, rows, cols, density, wrap, min_time):
+    # Peak memory covers setup plus the first generation. tracemalloc sees NumPy
+    # buffers but not the parallel engine's shared memory blocks
+    gc.collect()
+    tracemalloc.start()
+    engine = seeded(name, rows, cols, density, wrap)
+    engine.step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    try:
+        per_gen, runs = timed(engine.step, min_time)
+    finally:
+        engine.close()
+    return {
+        "gens_per_sec": 1 / per_gen,
+        "cells_per_sec": rows * cols / per_gen,
+        "ms_per_gen": per_gen * 1000,
+        "peak_mb": peak / 2**20,
+        "runs": runs,
+    }
+
+
+def edit_cases(name, rows, cols, min_time):
+    # The bulk edits behind the window's buttons, on a 20% board
+    engine = seeded(name, rows, cols, DENSITIES["random"])
+    strings = PATTERNS["Pulsar"]
+    offs = pattern_offsets(strings)
+    origin = centered_origin(strings, rows, cols)
+    # A diagonal brush stroke 8 cells wide across the board, as one mouse drag paints it
+    line = line_cells(0, 0, rows - 1, cols - 1)
+
+    def stroke():
+        engine.paint(*stroke_cells(*line, 8), 1)
+
+    def resize():
+        # apply_resize growing by half and back, preserving content
+        engine.resize(rows + rows // 2, cols + cols // 2)
+        engine.resize(rows, cols)
+
+    ops = {
+        "randomize": lambda: engine.randomize(DENSITIES["random"], seed=SEED),
+        "clear": engine.clear,
+        "fill": engine.fill,
+        "resize": resize,
+        "insert_pattern": lambda: engine.stamp(offs, *origin),
+        "toggle": lambda: engine.toggle(rows // 2, cols // 2),
+        "stroke": stroke,
+        "snapshot": engine.snapshot,
+    }
+    try:
+        for op, fn in ops.items():
+            per_op, runs = timed(fn, min_time)
+            yield op, {"ms": per_op * 1000, "runs": runs}
+    finally:
+        engine.close()
+
+
+def paint_cases(name, rows, cols, density, min_time):
+    # GridWidget frames on an offscreen platform: a full repaint, an incremental
+    # frame after one generation, and the zoomed-out density view of the board
+    # (repainted, which pans do, and after a generation)
+    from PySide6.QtWidgets import QApplication
+
+    import main
+
+    app = QApplication.instance() or QApplication([])
+    w, h = VIEW_SIZE
+    engine = seeded(name, rows, cols, density)
+    widget = main.GridWidget(engine.snapshot(), max(1, min(w // cols, h // rows)))
+    widget.resize(w, h)
+    widget.grab()
+    app.processEvents()
+
+    def full():
+        widget.invalidate()
+        widget.grab()
+
+    def incremental():
+        engine.step()
+        frame = engine.snapshot()
+        start = time.perf_counter()
+        widget.set_source(frame)
+        widget.grab()
+        return time.perf_counter() - start
+
+    try:
+        per_frame, runs = timed(full, min_time)
+        yield "full", {"ms_per_frame": per_frame * 1000, "runs": runs}
+
+        # Only the repaint counts, not the generation in front of it
+        spent, runs = 0.0, 0
+        start = time.perf_counter()
+        while runs == 0 or time.perf_counter() - start < min_time:
+            spent += incremental()
+            runs += 1
+        yield "incremental", {"ms_per_frame": spent / runs * 1000, "runs": runs}
+
+        k = 2
+        while rows > k * h or cols > k * w:
+            k *= 2
+        widget.set_cell_size(1, k)
+        per_frame, runs = timed(full, min_time)
+        yield f"density_1:{k}", {"ms_per_frame": per_frame * 1000, "runs": runs}
+
+        spent, runs = 0.0, 0
+        start = time.perf_counter()
+        while runs == 0 or time.perf_counter() - start < min_time:
+            spent += incremental()
+            runs += 1
+        yield f"density_1:{k}_incremental", {"ms_per_frame": spent / runs * 1000, "runs": runs}
+    finally:
+        engine.close()
+
+
+def case_key(case):
+    return "/".join(str(case[k]) for k in ("suite", "engine", "size", "density", "wrap", "op") if k in case)
+
+
+def run_suites(args):
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    densities = args.densities or list(DENSITIES)
+    wraps = {"off": [False], "on": [True], "both": [False, True]}[args.wrap]
+    min_time = args.min_time if args.min_time is not None else (0.2 if args.quick else 1.0)
+    results = []
+
+    def report(case, metrics):
+        case["metrics"] = metrics
+        results.append(case)
+        shown = ", ".join(f"{k} {v:,.3g}" for k, v in metrics.items() if k != "runs")
+        print(f"{case_key(case):<52} {shown}", flush=True)
+
+    for rows, cols in sizes:
+        size = f"{rows}x{cols}"
+        for name in args.engines:
+            if "step" in args.suite:
+                for label in densities:
+                    for wrap in wraps:
+                        case = {"suite": "step", "engine": name, "size": size, "density": label, "wrap": wrap}
+                        if too_slow(name, rows, cols, DENSITIES[label]):
+                            print(f"{case_key(case):<52} omitido (demasiado lento)", flush=True)
+                            continue
+                        report(case, step_case(name, rows, cols, DENSITIES[label], wrap, min_time))
+            if "edit" in args.suite and not too_slow(name, rows, cols, DENSITIES["random"]):
+                for op, metrics in edit_cases(name, rows, cols, min_time):
+                    report({"suite": "edit", "engine": name, "size": size, "op": op}, metrics)
+            if "paint" in args.suite:
+                for label in densities:
+                    if too_slow(name, rows, cols, DENSITIES[label]):
+                        continue
+                    for mode, metrics in paint_cases(name, rows, cols, DENSITIES[label], min_time):
+                        report({"suite": "paint", "engine": name, "size": size, "density": label, "op": mode}, metrics)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Prints every timing/memory change beyond tolerance; returns the regressions
+    old = {case_key(case): case["metrics"] for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        before = old.get(case_key(case))
+        if before is None:
+            continue
+        for metric, value in case["metrics"].items():
+            if metric not in COMPARED or not before.get(metric):
+                continue
+            ratio = value / before[metric]
+            if abs(ratio - 1) > tolerance:
+                worse = ratio > 1
+                tag = "PEOR " if worse else "mejor"
+                print(f"{tag} {case_key(case):<52} {metric} {before[metric]:,.3g} -> {value:,.3g} (x{ratio:.2f})")
+                if worse:
+                    regressions.append((case_key(case), metric, ratio))
+    return regressions
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def parse_size(text):
+    rows, cols = text.lower().split("x")
+    return int(rows), int(cols)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de motores, edición y pintado")
+    parser.add_argument("--suite", nargs="+", choices=["step", "edit", "paint"], default=["step", "edit", "paint"])
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--sizes", nargs="+", type=parse_size, help="p. ej. 50x80 2000x2000")
+    parser.add_argument("--densities", nargs="+", choices=list(DENSITIES))
+    parser.add_argument("--wrap", choices=["off", "on", "both"], default="both")
+    parser.add_argument("--quick", action="store_true", help="solo tableros pequeños y medidas cortas")
+    parser.add_argument("--min-time", type=float, help="segundos mínimos por medida")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="resultados anteriores con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="cambio relativo que se informa")
+    args = parser.parse_args(argv)
+
+    if "paint" in args.suite:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    results = run_suites(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"machine": machine_info(), "results": results}, f, indent=1)
+    print(f"{len(results)} medidas en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{len(regressions)} regresiones (tolerancia {args.tolerance:.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
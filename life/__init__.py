@@ -0,0 +1,76 @@
+from .bitpack import BitEngine
+from .brush import MAX_BRUSH, brush_offsets, line_cells, stroke_cells
+from .boardfile import BoardFile, Recorder, Recording, save_engine
+from .cycles import CycleDetector, advance_detecting
+from .engines import Engine, NumpyEngine, Snapshot
+from .export import PALETTES, engine_frames, export_frames, open_writer, recording_frames, theme_colors
+from .formats import read_board, read_pattern, write_board, write_pattern
+from .hashlife import HashLifeEngine
+from .history import HISTORY_BYTES, History
+from .parallel import ParallelEngine
+from .patterns import PATTERNS, THUMB_SIZE, Pattern, PatternLibrary, centered_origin, pattern_offsets
+from .profiling import Profiler
+from .registry import ENGINES, create_engine
+from .rules import CONWAY, RULES, Rule, parse_rule
+from .sessions import SessionPool
+from .simulation import Simulation
+from .soups import ResultWriter, read_results, run_soup, run_soups, soup_tasks
+from .stats import STATS_CAPACITY, STATS_FIELDS, StatsRing
+from .sparse import SparseEngine
+from .tiled import TiledEngine
+
+__all__ = [
+    "CONWAY",
+    "ENGINES",
+    "HISTORY_BYTES",
+    "MAX_BRUSH",
+    "PALETTES",
+    "PATTERNS",
+    "RULES",
+    "STATS_CAPACITY",
+    "STATS_FIELDS",
+    "THUMB_SIZE",
+    "BitEngine",
+    "BoardFile",
+    "CycleDetector",
+    "Engine",
+    "HashLifeEngine",
+    "History",
+    "NumpyEngine",
+    "ParallelEngine",
+    "Pattern",
+    "PatternLibrary",
+    "Profiler",
+    "Recorder",
+    "Recording",
+    "ResultWriter",
+    "Rule",
+    "SessionPool",
+    "Simulation",
+    "Snapshot",
+    "SparseEngine",
+    "StatsRing",
+    "TiledEngine",
+    "advance_detecting",
+    "brush_offsets",
+    "centered_origin",
+    "create_engine",
+    "engine_frames",
+    "export_frames",
+    "line_cells",
+    "open_writer",
+    "parse_rule",
+    "pattern_offsets",
+    "read_board",
+    "read_pattern",
+    "read_results",
+    "recording_frames",
+    "run_soup",
+    "run_soups",
+    "save_engine",
+    "soup_tasks",
+    "stroke_cells",
+    "theme_colors",
+    "write_board",
+    "write_pattern",
+]
@@ -0,0 +1,342 @@
+import numpy as np
+
+from .engines import Engine, Snapshot, random_rows, row_blocks, tile_area, tile_boxes
+from .rules import CONWAY
+
+WORD_BITS = 64
+ONE = np.uint64(1)
+TOP = np.uint64(63)
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Cells per temporary block when packing, unpacking or randomizing
+BLOCK_CELLS = 1 << 22
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack_rows(cells):
+    # uint8 (rows, cols) -> uint64 (rows, words); cell c is bit c % 64 of word c // 64
+    rows, cols = cells.shape
+    nwords = (cols + WORD_BITS - 1) // WORD_BITS
+    padded = np.zeros((rows, nwords * WORD_BITS), dtype=np.uint8)
+    padded[:, :cols] = cells
+    packed = np.packbits(padded, axis=1, bitorder="little")
+    return packed.view("<u8").astype(np.uint64, copy=False)
+
+
+def unpack_rows(words, cols):
+    raw = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    return np.unpackbits(raw, axis=1, bitorder="little")[:, :cols]
+
+
+def unpack_region(words, r0, r1, c0, c1):
+    w0 = c0 // WORD_BITS
+    w1 = (c1 + WORD_BITS - 1) // WORD_BITS
+    cells = unpack_rows(words[r0:r1, w0:w1], (w1 - w0) * WORD_BITS)
+    skip = c0 - w0 * WORD_BITS
+    return cells[:, skip:skip + (c1 - c0)]
+
+
+def count_is(planes, k):
+    # Bits whose count, given as bit planes (ones first), equals k
+    m = None
+    for i, plane in enumerate(planes):
+        term = plane if k >> i & 1 else ~plane
+        m = term if m is None else m & term
+    return m
+
+
+def popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(_POPCOUNT8[np.ascontiguousarray(words).view(np.uint8)].sum(dtype=np.int64))
+
+
+def byte_counts(words):
+    # Live cells of each byte of the words: 8 columns per count
+    raw = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(raw)
+    return _POPCOUNT8[raw]
+
+
+def field_counts(words, k):
+    # Live cells in each k-bit field (k = 2 or 4), in column order, by the
+    # first steps of a SWAR popcount
+    x = words
+    for shift, mask in ((1, 0x5555555555555555), (2, 0x3333333333333333)):
+        if shift >= k:
+            break
+        x = (x & np.uint64(mask)) + ((x >> np.uint64(shift)) & np.uint64(mask))
+    raw = np.ascontiguousarray(x, dtype="<u8").view(np.uint8)
+    fields = (raw[..., None] >> np.arange(0, 8, k, dtype=np.uint8)) & np.uint8((1 << k) - 1)
+    return fields.reshape(len(raw), -1)
+
+
+def word_density(words, r0, r1, c0, c1, k):
+    # Live cells per k x k block straight from the words, for blocks that line
+    # up with them (k a power of two, c0 a multiple of k): no cell is unpacked
+    w0, w1 = c0 // WORD_BITS, -(-c1 // WORD_BITS)
+    x = words[r0:r1, w0:w1]
+    tail = np.uint64((1 << c1 % WORD_BITS) - 1) if c1 % WORD_BITS else None
+    if k < 8:
+        if tail is not None:
+            x = x.copy()
+            x[:, -1] &= tail
+        skip = (c0 - w0 * WORD_BITS) // k
+        counts = field_counts(x, k)[:, skip:skip + -(-(c1 - c0) // k)]
+        return row_blocks(counts, k, np.uint8).astype(np.int64)
+    counts = byte_counts(x)
+    if tail is not None:
+        counts[:, -8:] = byte_counts(x[:, -1:] & tail)
+    skip = (c0 - w0 * WORD_BITS) // 8
+    counts = counts[:, skip:skip + -(-(c1 - c0) // 8)]
+    rows = row_blocks(counts, k, np.uint16 if k < 1 << 13 else np.int64)
+    return np.add.reduceat(rows, np.arange(0, rows.shape[1], k // 8), axis=1, dtype=np.int64)
+
+
+class BitSnapshot(Snapshot):
+    def __init__(self, words, cols, generation, status="", dirty=None):
+        words.flags.writeable = False
+        self.words = words
+        self.rows = words.shape[0]
+        self.cols = cols
+        self.generation = generation
+        self.status = status
+        self.dirty = dirty
+
+    def region(self, r0, r1, c0, c1):
+        return unpack_region(self.words, r0, r1, c0, c1)
+
+    def density(self, r0, r1, c0, c1, k):
+        if k & (k - 1) or c0 % k or r1 <= r0 or c1 <= c0:
+            return super().density(r0, r1, c0, c1, k)
+        return word_density(self.words, r0, r1, c0, c1, k)
+
+    def population(self):
+        return popcount(self.words)
+
+
+class BitEngine(Engine):
+    name = "Bits"
+
+    def __init__(self, rows, cols, wrap=False):
+        super().__init__(rows, cols, wrap)
+        self._alloc()
+
+    def _alloc(self):
+        self.nwords = (self.cols + WORD_BITS - 1) // WORD_BITS
+        self.words = np.zeros((self.rows, self.nwords), dtype=np.uint64)
+        # Padding bits past the last column must stay zero
+        self.mask = np.full(self.nwords, ALL_ONES, dtype=np.uint64)
+        tail = self.cols % WORD_BITS
+        if tail:
+            self.mask[-1] = np.uint64((1 << tail) - 1)
+        self._last_bit = np.uint64((self.cols - 1) % WORD_BITS)
+
+    def _block_rows(self):
+        return max(1, BLOCK_CELLS // max(1, self.nwords * WORD_BITS))
+
+    def load_array(self, cells):
+        self.rows, self.cols = cells.shape
+        self._alloc()
+        step = self._block_rows()
+        for a in range(0, self.rows, step):
+            self.words[a:a + step] = pack_rows(cells[a:a + step])
+        self.mark_dirty()
+
+    def to_array(self):
+        return self.region(0, self.rows, 0, self.cols)
+
+    def packed(self):
+        # Little-endian words already are bit-packed rows
+        return self.words.astype("<u8", copy=False).view(np.uint8)[:, :(self.cols + 7) // 8]
+
+    def load_packed(self, packed, cols):
+        self.rows, self.cols = len(packed), cols
+        self._alloc()
+        raw = np.zeros((self.rows, self.nwords * 8), dtype=np.uint8)
+        raw[:, :(cols + 7) // 8] = packed
+        self.words = raw.view("<u8").astype(np.uint64, copy=False) & self.mask
+        self.mark_dirty()
+
+    def region(self, r0, r1, c0, c1):
+        return unpack_region(self.words, r0, r1, c0, c1)
+
+    def snapshot(self):
+        return BitSnapshot(self.words.copy(), self.cols, self.generation, self.status_text(), self.take_dirty())
+
+    def get(self, r, c):
+        return int((self.words[r, c // WORD_BITS] >> np.uint64(c % WORD_BITS)) & ONE)
+
+    def toggle(self, r, c):
+        self.words[r, c // WORD_BITS] ^= ONE << np.uint64(c % WORD_BITS)
+        self.touch(r, c)
+
+    def set_many(self, rr, cc, value):
+        rr = np.asarray(rr, dtype=np.int64)
+        cc = np.asarray(cc, dtype=np.int64)
+        bits = ONE << (cc % WORD_BITS).astype(np.uint64)
+        index = (rr, cc // WORD_BITS)
+        # ufunc.at so repeated words accumulate every bit
+        if value:
+            np.bitwise_or.at(self.words, index, bits)
+        else:
+            np.bitwise_and.at(self.words, index, ~bits)
+        self.touch(rr, cc)
+
+    def clear(self):
+        self.words.fill(0)
+        self.mark_dirty()
+
+    def fill(self):
+        self.words[:] = self.mask
+        self.mark_dirty()
+
+    def randomize(self, density=0.2, seed=None):
+        rng = np.random.default_rng(seed)
+        step = self._block_rows()
+        for a in range(0, self.rows, step):
+            b = min(self.rows, a + step)
+            self.words[a:b] = pack_rows(random_rows(rng, b - a, self.cols, density).view(np.uint8))
+        self.mark_dirty()
+
+    def resize(self, rows, cols, preserve=True):
+        old = self.words
+        old_rows, old_cols = self.rows, self.cols
+        self.rows = rows
+        self.cols = cols
+        self._alloc()
+        self.mark_dirty()
+        if not preserve:
+            return
+        sr = max(0, (rows - old_rows) // 2)
+        sc = max(0, (cols - old_cols) // 2)
+        h = min(old_rows, rows - sr)
+        w = min(old_cols, cols - sc)
+        if h <= 0 or w <= 0:
+            return
+        # Re-pack block by block with the column shift folded into the padding
+        step = self._block_rows()
+        for a in range(0, h, step):
+            b = min(h, a + step)
+            block = np.zeros((b - a, cols), dtype=np.uint8)
+            block[:, sc:sc + w] = unpack_rows(old[a:b], old_cols)[:, :w]
+            self.words[sr + a:sr + b] = pack_rows(block)
+
+    def population(self):
+        return popcount(self.words)
+
+    def _halo(self, a, b):
+        # Rows a-1 .. b of the board, padded with zeros or wrapped at the edges
+        words = self.words
+        if a > 0 and b < self.rows:
+            return words[a - 1:b + 1]
+        if self.wrap:
+            above = words[(a - 1) % self.rows][None]
+            below = words[b % self.rows][None]
+        else:
+            above = words[a - 1][None] if a > 0 else np.zeros((1, self.nwords), dtype=np.uint64)
+            below = words[b][None] if b < self.rows else np.zeros((1, self.nwords), dtype=np.uint64)
+        return np.concatenate((above, words[a:b], below))
+
+    def _step_block(self, x):
+        last = self.nwords - 1
+
+        # West and east neighbours of every bit, carrying across word boundaries
+        west = x << ONE
+        west[:, 1:] |= x[:, :-1] >> TOP
+        east = x >> ONE
+        east[:, :-1] |= x[:, 1:] << TOP
+        if self.wrap:
+            west[:, 0] |= (x[:, last] >> self._last_bit) & ONE
+            east[:, last] |= (x[:, 0] & ONE) << self._last_bit
+
+        # Horizontal 3-cell sums (two bit planes) with a full adder
+        lx = west ^ x
+        h0 = lx ^ east
+        h1 = (west & x) | (east & lx)
+
+        # Middle row counts only west + east
+        m0 = (west ^ east)[1:-1]
+        m1 = (west & east)[1:-1]
+        t0, t1 = h0[:-2], h1[:-2]
+        b0, b1 = h0[2:], h1[2:]
+
+        # Ones bit of the total and its carry into the twos plane
+        tm = t0 ^ m0
+        s0 = tm ^ b0
+        c0 = (t0 & m0) | (b0 & tm)
+
+        p = t1 ^ m1
+        q = b1 ^ c0
+        if self.rule == CONWAY:
+            # The count is 2 or 3 exactly when one of the four twos-plane bits is set
+            one = (p ^ q) & ~((t1 & m1) | (b1 & c0) | (p & q))
+            # B3/S23: count 3, or count 2 on a live cell
+            return one & (s0 | x[1:-1]) & self.mask
+
+        # Any other rule: the full count as four bit planes. The carries out of
+        # the twos plane (t1 & m1, b1 & c0, p & q) never pair up with p & q
+        a, b, d = t1 & m1, b1 & c0, p & q
+        planes = (s0, p ^ q, a ^ b ^ d, a & b)
+        return self._apply_rule(planes, x[1:-1]) & self.mask
+
+    def _apply_rule(self, planes, alive):
+        rule = self.rule
+        out = np.zeros_like(alive)
+        for counts, state in ((rule.birth & rule.survive, None), (rule.birth - rule.survive, 0), (rule.survive - rule.birth, 1)):
+            if not counts:
+                continue
+            m = None
+            for k in counts:
+                eq = count_is(planes, k)
+                m = eq if m is None else m | eq
+            if state == 1:
+                m &= alive
+            elif state == 0:
+                m &= ~alive
+            out |= m
+        return out
+
+    def step(self):
+        before = None if self.stats is None else self.population_before_step()
+        new = np.empty_like(self.words)
+        step = self._block_rows()
+        for a in range(0, self.rows, step):
+            b = min(self.rows, a + step)
+            new[a:b] = self._step_block(self._halo(a, b))
+        diff = self.words ^ new
+        blocks = self._mark_changes(diff, before is not None)
+        self.words = new
+        self.generation += 1
+        if before is not None:
+            changed = popcount(diff)
+            population = popcount(new)
+            births = (changed + population - before) // 2
+            active = tile_area(blocks, self.rows, self.cols, WORD_BITS)
+            self.push_stats(population, births, changed - births, self._live_box(), active)
+
+    def _mark_changes(self, diff, blocks=False):
+        # One box per 64 rows x 1 word block with a flipped bit. Returns the grid
+        # of changed blocks when the change set is kept or `blocks` asks for it
+        if self.dirty is None and not blocks:
+            self._hash = None
+            self._population = None
+            return None
+        changed = np.bitwise_or.reduceat(diff, np.arange(0, self.rows, WORD_BITS), axis=0) != 0
+        self.mark_dirty(None if self.dirty is None else tile_boxes(changed, self.rows, self.cols, WORD_BITS))
+        return changed
+
+    def _live_box(self):
+        words = self.words
+        rows = np.flatnonzero(words.any(axis=1))
+        if not rows.size:
+            return None
+        # OR of every row's words: the lowest and highest bits set give the columns
+        span = np.bitwise_or.reduce(words[rows[0]:rows[-1] + 1], axis=0)
+        w = np.flatnonzero(span)
+        first, last = int(span[w[0]]), int(span[w[-1]])
+        c0 = int(w[0]) * WORD_BITS + (first & -first).bit_length() - 1
+        c1 = int(w[-1]) * WORD_BITS + last.bit_length()
+        return int(rows[0]), int(rows[-1]) + 1, c0, c1
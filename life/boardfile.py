@@ -0,0 +1,223 @@
+import bisect
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from .rules import CONWAY, parse_rule
+
+# Saved boards (.vida) and recorded runs (.vidarec). Both start with the same
+# 64-byte header; cells are stored bit-packed by rows, cell c of a row being
+# bit c % 8 of byte c // 8, so a board file's data is exactly Engine.packed()
+BOARD_MAGIC = b"VIDABRD\x00"
+RECORD_MAGIC = b"VIDAREC\x00"
+VERSION = 1
+WRAP = 1
+COMPRESSED = 2
+# magic, version, flags, rows, cols, generation, data bytes, rule
+_HEADER = struct.Struct("<8sHHIIQQ24s4x")
+# kind, generation, rows, cols, payload bytes
+_RECORD = struct.Struct("<BQIIQ")
+KEYFRAME = 0
+DELTA = 1
+# Records between two keyframes: the most deltas replayed to reach a generation
+KEYFRAME_EVERY = 64
+
+
+def packed_bytes(cols):
+    return (cols + 7) // 8
+
+
+def pack_cells(cells):
+    return np.packbits(np.asarray(cells, dtype=np.uint8), axis=1, bitorder="little")
+
+
+def unpack_cells(packed, cols, c0=0):
+    # Columns c0..cols of packed rows as uint8 cells
+    b0 = c0 // 8
+    cells = np.unpackbits(np.asarray(packed[:, b0:packed_bytes(cols)]), axis=1, bitorder="little")
+    return cells[:, c0 - b0 * 8:cols - b0 * 8]
+
+
+def _header(magic, flags, rows, cols, generation, size, rule):
+    return _HEADER.pack(magic, VERSION, flags, rows, cols, generation, size, rule.rulestring.encode("ascii"))
+
+
+def _read_header(f, magic):
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError("archivo truncado")
+    found, version, flags, rows, cols, generation, size, rule = _HEADER.unpack(raw)
+    if found != magic:
+        raise ValueError("no es un archivo de tablero de este programa")
+    if version > VERSION:
+        raise ValueError(f"versión de archivo {version} no soportada")
+    return flags, rows, cols, generation, size, parse_rule(rule.rstrip(b"\x00").decode("ascii"))
+
+
+class BoardFile:
+    # A board with its rule, wrap flag and generation. Uncompressed files are
+    # memory-mapped: opening one reads only the header, and region() unpacks
+    # only the rows and bytes it's asked for
+    def __init__(self, packed, cols, rule=CONWAY, wrap=False, generation=0):
+        self.packed = packed
+        self.rows = packed.shape[0]
+        self.cols = cols
+        self.rule = rule
+        self.wrap = wrap
+        self.generation = generation
+
+    @classmethod
+    def from_engine(cls, engine):
+        # Unbounded engines are saved as their rows x cols window
+        return cls(engine.packed(), engine.cols, engine.rule, engine.wrap, engine.generation)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            flags, rows, cols, generation, size, rule = _read_header(f, BOARD_MAGIC)
+            if flags & COMPRESSED:
+                packed = np.frombuffer(zlib.decompress(f.read(size)), dtype=np.uint8)
+                packed = packed.reshape(rows, packed_bytes(cols))
+            elif rows and cols:
+                packed = np.memmap(f, dtype=np.uint8, mode="r", offset=_HEADER.size, shape=(rows, packed_bytes(cols)))
+            else:
+                packed = np.zeros((rows, packed_bytes(cols)), dtype=np.uint8)
+        return cls(packed, cols, rule, bool(flags & WRAP), generation)
+
+    def save(self, path, compress=False):
+        data = np.ascontiguousarray(self.packed)
+        size = data.nbytes
+        if compress:
+            data = zlib.compress(data, 1)
+            size = len(data)
+        flags = (WRAP if self.wrap else 0) | (COMPRESSED if compress else 0)
+        with open(path, "wb") as f:
+            f.write(_header(BOARD_MAGIC, flags, self.rows, self.cols, self.generation, size, self.rule))
+            f.write(data)
+
+    def region(self, r0, r1, c0, c1):
+        return unpack_cells(self.packed[r0:r1], c1, c0)
+
+    def to_array(self):
+        return self.region(0, self.rows, 0, self.cols)
+
+    def population(self):
+        return int(np.unpackbits(np.asarray(self.packed)).sum(dtype=np.int64))
+
+    def restore(self, engine):
+        # Loads the board into an engine, with its rule, wrap flag and generation
+        engine.set_rule(self.rule)
+        engine.wrap = self.wrap
+        engine.load_packed(self.packed, self.cols)
+        engine.generation = self.generation
+        return engine
+
+
+def save_engine(path, engine, compress=False):
+    BoardFile.from_engine(engine).save(path, compress)
+
+
+class Recorder:
+    # Appends an engine's states to a .vidarec file: a keyframe of packed rows
+    # every `keyframe_every` records (and whenever the board changes size),
+    # otherwise the XOR against the previous record. Payloads are zlib-packed;
+    # an XOR of a board that barely changed is almost all zeros
+    def __init__(self, path, keyframe_every=KEYFRAME_EVERY):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.records = 0
+        self._f = None
+        self._previous = None
+
+    def record(self, engine):
+        packed = np.ascontiguousarray(engine.packed())
+        if self._f is None:
+            self._f = open(self.path, "wb")
+            flags = WRAP if engine.wrap else 0
+            self._f.write(_header(RECORD_MAGIC, flags, engine.rows, engine.cols, engine.generation, 0, engine.rule))
+        previous = self._previous
+        if previous is None or previous.shape != packed.shape or self.records % self.keyframe_every == 0:
+            kind, payload = KEYFRAME, packed
+        else:
+            kind, payload = DELTA, np.bitwise_xor(previous, packed)
+        payload = zlib.compress(payload, 1)
+        self._f.write(_RECORD.pack(kind, engine.generation, engine.rows, engine.cols, len(payload)))
+        self._f.write(payload)
+        # A view of the engine's own buffer changes with the next step
+        self._previous = packed if packed.base is None else packed.copy()
+        self.records += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class Recording:
+    # Read side of a recording. Opening scans only the record headers; board()
+    # decodes from the nearest keyframe at or before the generation, or goes on
+    # from the last board decoded when that's closer, so playing forward costs
+    # one delta per record
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        flags, self.rows, self.cols, _, _, self.rule = _read_header(self._f, RECORD_MAGIC)
+        self.wrap = bool(flags & WRAP)
+        self.generations = []
+        self._index = []
+        self._keyframes = []
+        end = os.fstat(self._f.fileno()).st_size
+        pos = _HEADER.size
+        while pos + _RECORD.size <= end:
+            self._f.seek(pos)
+            kind, generation, rows, cols, size = _RECORD.unpack(self._f.read(_RECORD.size))
+            pos += _RECORD.size
+            if pos + size > end:
+                break  # cut short while recording
+            if kind == KEYFRAME:
+                self._keyframes.append(len(self._index))
+            elif not self._keyframes:
+                raise ValueError("grabación sin fotograma clave inicial")
+            self.generations.append(generation)
+            self._index.append((kind, pos, size, rows, cols))
+            pos += size
+        self._current = None
+
+    def __len__(self):
+        return len(self._index)
+
+    def find(self, generation):
+        # Index of the last record at or before `generation` (the first one if
+        # none is); generations are taken to grow from record to record
+        return max(0, bisect.bisect_right(self.generations, generation) - 1)
+
+    def _payload(self, i):
+        _, pos, size, rows, cols = self._index[i]
+        self._f.seek(pos)
+        data = np.frombuffer(zlib.decompress(self._f.read(size)), dtype=np.uint8)
+        return data.reshape(rows, packed_bytes(cols))
+
+    def frame(self, i):
+        key = self._keyframes[bisect.bisect_right(self._keyframes, i) - 1]
+        current = self._current
+        if current is not None and key <= current[0] <= i:
+            start, packed = current[0] + 1, current[1]
+        else:
+            start, packed = key + 1, self._payload(key).copy()
+        for j in range(start, i + 1):
+            if self._index[j][0] == KEYFRAME:
+                packed = self._payload(j).copy()
+            else:
+                packed ^= self._payload(j)
+        self._current = (i, packed)
+        cols = self._index[i][4]
+        out = packed.copy()
+        out.flags.writeable = False
+        return BoardFile(out, cols, self.rule, self.wrap, self.generations[i])
+
+    def board(self, generation):
+        return self.frame(self.find(generation))
+
+    def close(self):
+        self._f.close()
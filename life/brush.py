@@ -0,0 +1,45 @@
+import numpy as np
+
+# Widest brush, in cells
+MAX_BRUSH = 64
+
+
+def line_cells(r0, c0, r1, c1):
+    # Cells of the line between two cells, both ends included: like
+    # Bresenham's, one cell per step along the longer axis, the other
+    # coordinate rounded (halves away from the start), all steps at once
+    dr, dc = r1 - r0, c1 - c0
+    n = max(abs(dr), abs(dc))
+    t = np.arange(n + 1, dtype=np.int64)
+    if n == 0:
+        return t + r0, t + c0
+    rr = r0 + np.sign(dr) * ((2 * abs(dr) * t + n) // (2 * n))
+    cc = c0 + np.sign(dc) * ((2 * abs(dc) * t + n) // (2 * n))
+    return rr, cc
+
+
+def brush_offsets(size):
+    # (dr, dc) of a round brush `size` cells across, centred on (0, 0) (even
+    # sizes lean up and left); 1 is a single cell, up to 3 a full square
+    i = np.arange(size)
+    centre = (size - 1) / 2
+    inside = (i[:, None] - centre) ** 2 + (i[None, :] - centre) ** 2 <= (size / 2) ** 2
+    dr, dc = np.nonzero(inside)
+    return dr - size // 2, dc - size // 2
+
+
+def stroke_cells(rr, cc, size=1):
+    # Every cell a brush of `size` covers along the points of a stroke, each once
+    rr = np.asarray(rr, dtype=np.int64)
+    cc = np.asarray(cc, dtype=np.int64)
+    if size > 1:
+        dr, dc = brush_offsets(size)
+        rr = (rr[:, None] + dr).ravel()
+        cc = (cc[:, None] + dc).ravel()
+    if len(rr) > 1:
+        # Rows and columns go into one key, offset so negatives (unbounded boards) sort too
+        r_min, c_min = rr.min(), cc.min()
+        width = int(cc.max() - c_min) + 1
+        keys = np.unique((rr - r_min) * width + (cc - c_min))
+        rr, cc = keys // width + r_min, keys % width + c_min
+    return rr, cc
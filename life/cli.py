@@ -0,0 +1,364 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from .boardfile import BoardFile, Recorder, Recording, save_engine
+from .cycles import CycleDetector, advance_detecting
+from .engines import resized_copy
+from .export import EXPORT_FPS, EXPORT_QUEUE, PALETTES, engine_frames, export_frames, open_writer, recording_frames, theme_colors
+from .formats import read_board, write_board
+from .patterns import PATTERNS, Pattern
+from .registry import ENGINES, create_engine
+from .rules import CONWAY, parse_rule
+from .soups import MAX_GENERATIONS, ResultWriter, read_results, run_soups, soup_tasks, summarize
+
+
+def rule_arg(text):
+    try:
+        return parse_rule(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m life", description="Juego de la Vida sin interfaz gráfica")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="simula N generaciones y guarda el resultado")
+    add_board_arguments(run)
+    run.add_argument("-n", "--generations", type=int, default=100)
+    run.add_argument(
+        "--cycles", action="store_true",
+        help="detecta tableros estables u oscilantes y salta el resto de generaciones sin calcularlas",
+    )
+    run.add_argument("--output", help="tablero final (.cells, .rle, .npy o .vida)")
+    run.add_argument("--record", metavar="FILE", help="graba cada generación en FILE (.vidarec) para reproducirla")
+    run.add_argument("--every", type=int, metavar="K", help="informa (e instantánea) cada K generaciones")
+    run.add_argument(
+        "--snapshots", metavar="TEMPLATE",
+        help="ruta de cada instantánea con {gen}, p. ej. snap_{gen:06d}.npy",
+    )
+    run.add_argument("--quiet", action="store_true")
+
+    replay = sub.add_parser("replay", help="lee una grabación (.vidarec) sin volver a simular")
+    replay.add_argument("recording")
+    replay.add_argument("-g", "--generation", type=int, help="generación a extraer (default: la última)")
+    replay.add_argument("--every", type=int, metavar="K", help="lista generación y población cada K registros")
+    replay.add_argument("--output", help="tablero de esa generación (.cells, .rle, .npy o .vida)")
+
+    soups = sub.add_parser("soups", help="simula muchas sopas aleatorias en paralelo y guarda cuánto tardan en estabilizarse")
+    soups.add_argument("-n", "--soups", type=int, default=100, help="sopas por combinación de densidad y regla")
+    soups.add_argument("--density", type=float, nargs="+", default=[0.5], metavar="D")
+    soups.add_argument("--rule", type=rule_arg, nargs="+", default=[CONWAY], metavar="REGLA")
+    soups.add_argument("--rows", type=int, default=64)
+    soups.add_argument("--cols", type=int, default=64)
+    soups.add_argument("--wrap", action="store_true", help="bordes toroidales")
+    soups.add_argument("--seed", type=int, default=0, help="primera semilla; cada sopa usa la siguiente")
+    soups.add_argument(
+        "--max-generations", type=int, default=MAX_GENERATIONS,
+        help="generaciones tras las que una sopa se da por no estabilizada",
+    )
+    # Paralelo's own process pool can't run inside this one
+    soups.add_argument("--engine", choices=[name for name in ENGINES if name != "Paralelo"], default="Bits")
+    soups.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos (default: uno por núcleo)")
+    soups.add_argument("--output", help="resultados .csv o .jsonl (default: CSV por la salida estándar)")
+    soups.add_argument(
+        "--resume", action="store_true",
+        help="continúa un lote interrumpido: conserva --output y solo simula las sopas que faltan",
+    )
+    soups.add_argument("--quiet", action="store_true")
+
+    export = sub.add_parser(
+        "export", help="exporta una ejecución como GIF, secuencia PNG o vídeo sin comprimir, sin abrir ventana",
+    )
+    export.add_argument(
+        "output",
+        help="archivo .gif, .y4m o .rgb (RGB24 crudo), o plantilla .png por cuadro, p. ej. cuadros/vida_{gen:06d}.png",
+    )
+    add_board_arguments(export, recordings=True)
+    export.add_argument(
+        "-n", "--generations", type=int,
+        help="generaciones a simular (default: 100; con una grabación, cuadros a exportar, default: todos)",
+    )
+    export.add_argument("--every", type=int, default=1, metavar="K", help="un cuadro cada K generaciones (o registros)")
+    export.add_argument("--scale", type=int, default=1, help="píxeles por célula")
+    export.add_argument("--fps", type=float, default=EXPORT_FPS, help="cuadros por segundo (GIF e .y4m)")
+    export.add_argument("--palette", choices=list(PALETTES), default="Verde")
+    export.add_argument("--light", action="store_true", help="fondo claro, como el tema claro de la interfaz")
+    export.add_argument(
+        "--queue", type=int, default=EXPORT_QUEUE, metavar="N",
+        help="cuadros en espera entre dos etapas (simular, rasterizar, codificar)",
+    )
+    export.add_argument("--quiet", action="store_true")
+    return parser
+
+
+def add_board_arguments(parser, recordings=False):
+    # Where the initial board comes from and how it's simulated (run, export)
+    kinds = ".cells, .rle, .npy, .vida (que conserva regla, envoltura y generación)"
+    if recordings:
+        kinds += " o .vidarec (se exportan sus registros sin volver a simular)"
+    parser.add_argument("--input", help=f"tablero inicial: {kinds}")
+    parser.add_argument("--rows", type=int, help="filas (default: las del tablero de entrada, o 50)")
+    parser.add_argument("--cols", type=int, help="columnas (default: las del tablero de entrada, o 80)")
+    parser.add_argument("--pattern", help="patrón a insertar centrado: nombre incluido o archivo .rle/.cells")
+    parser.add_argument("--random", type=float, metavar="DENSITY", help="siembra aleatoria con esta densidad")
+    parser.add_argument("--seed", type=int, help="semilla de la siembra aleatoria")
+    parser.add_argument("--engine", choices=list(ENGINES), default="NumPy")
+    parser.add_argument("--workers", type=int, help="procesos del motor Paralelo")
+    parser.add_argument("--wrap", action="store_true", help="bordes toroidales")
+    parser.add_argument("--rule", type=rule_arg, help="regla B/S, p. ej. B36/S23 (default: la del .vida o B3/S23)")
+
+
+def initial_board(args):
+    # Cells, and the BoardFile when the input is a saved board
+    saved = None
+    if args.input:
+        if args.input.lower().endswith(".vida"):
+            saved = BoardFile.open(args.input)
+            cells = saved.to_array()
+        else:
+            cells = read_board(args.input)
+        rows = args.rows or cells.shape[0]
+        cols = args.cols or cells.shape[1]
+        if (rows, cols) != cells.shape:
+            cells = resized_copy(cells, rows, cols)
+        return cells, saved
+    return np.zeros((args.rows or 50, args.cols or 80), dtype=np.uint8), saved
+
+
+def save_board(path, engine):
+    if path.lower().endswith(".vida"):
+        save_engine(path, engine)
+    else:
+        write_board(path, engine.to_array())
+
+
+def load_pattern(name):
+    if name in PATTERNS:
+        return Pattern.from_strings(name, PATTERNS[name])
+    try:
+        return Pattern.load(name)
+    except OSError as exc:
+        raise SystemExit(f"patrón desconocido: {name} ({exc.strerror})")
+
+
+def build_engine(args):
+    # The engine set up with the initial board the arguments describe
+    cells, saved = initial_board(args)
+    rows, cols = cells.shape
+    wrap = args.wrap or (saved is not None and saved.wrap)
+    rule = args.rule or (saved.rule if saved is not None else CONWAY)
+    engine = create_engine(args.engine, rows, cols, wrap=wrap)
+    try:
+        if args.workers and hasattr(engine, "set_workers"):
+            engine.set_workers(args.workers)
+        try:
+            engine.set_rule(rule)
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+        engine.load_array(cells)
+        if saved is not None:
+            engine.generation = saved.generation
+        if args.random:
+            engine.randomize(args.random, seed=args.seed)
+        if args.pattern:
+            pattern = load_pattern(args.pattern)
+            engine.stamp(pattern.offsets, *pattern.origin(rows, cols))
+    except BaseException:
+        engine.close()
+        raise
+    return engine
+
+
+def run(args, out=sys.stdout):
+    engine = build_engine(args)
+    recorder = None
+    try:
+        # Runs of at most `every` generations, so engines can batch them (HashLife
+        # jumps); a recording needs every generation
+        start = time.perf_counter()
+        detector = CycleDetector() if args.cycles else None
+        if args.record:
+            recorder = Recorder(args.record)
+            recorder.record(engine)
+        left = args.generations
+        while left > 0:
+            n = min(left, args.every or left)
+            if recorder is not None:
+                for _ in range(n):
+                    if detector is None:
+                        engine.step()
+                    else:
+                        advance_detecting(engine, 1, detector)
+                    recorder.record(engine)
+            elif detector is None:
+                engine.advance(n)
+            else:
+                advance_detecting(engine, n, detector)
+            left -= n
+            if args.every and (args.generations - left) % args.every == 0:
+                if args.snapshots:
+                    save_board(args.snapshots.format(gen=engine.generation), engine)
+                if not args.quiet:
+                    print(f"{engine.generation}\t{engine.population()}", file=out)
+        elapsed = time.perf_counter() - start
+        if detector is not None and detector.cycle is not None and not args.quiet:
+            first, period = detector.cycle
+            print(f"ciclo de periodo {period} desde la generación {first}", file=out)
+
+        if args.output:
+            save_board(args.output, engine)
+        if not args.quiet:
+            rate = args.generations / elapsed if elapsed > 0 else float("inf")
+            print(
+                f"{engine.name} {engine.rule}: {args.generations} generaciones en {elapsed:.3f} s ({rate:,.0f} gen/s), "
+                f"población {engine.population()}",
+                file=out,
+            )
+    finally:
+        if recorder is not None:
+            recorder.close()
+        engine.close()
+
+
+def replay(args, out=sys.stdout):
+    try:
+        rec = Recording(args.recording)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"{args.recording}: {exc}")
+    try:
+        if not len(rec):
+            raise SystemExit(f"{args.recording}: grabación vacía")
+        print(
+            f"{len(rec)} registros, generaciones {rec.generations[0]}-{rec.generations[-1]}, "
+            f"{rec.rows}x{rec.cols}, regla {rec.rule}",
+            file=out,
+        )
+        if args.every:
+            for i in range(0, len(rec), args.every):
+                board = rec.frame(i)
+                print(f"{board.generation}\t{board.population()}", file=out)
+        if args.output or args.generation is not None:
+            board = rec.board(rec.generations[-1] if args.generation is None else args.generation)
+            if args.output:
+                if args.output.lower().endswith(".vida"):
+                    board.save(args.output)
+                else:
+                    write_board(args.output, board.to_array())
+            print(f"generación {board.generation}: población {board.population()}", file=out)
+    finally:
+        rec.close()
+
+
+def soups(args, out=sys.stdout):
+    if args.resume and not args.output:
+        raise SystemExit("--resume necesita --output")
+    if not ENGINES[args.engine].bounded and any(rule.b0 for rule in args.rule):
+        raise SystemExit(f"el motor {args.engine} no admite reglas con B0")
+    tasks = soup_tasks(
+        args.soups, args.density, args.rule, args.rows, args.cols, args.wrap, args.seed, args.engine, args.max_generations,
+    )
+    # With results on stdout, progress and the summary go to stderr
+    log = sys.stderr if args.output is None else out
+    writer = ResultWriter(args.output, resume=args.resume, stream=out)
+    skipped = sum(writer.done(task) for task in tasks)
+    if skipped and not args.quiet:
+        print(f"{skipped} de {len(tasks)} sopas ya estaban en {args.output}", file=log)
+    every = max(1, len(tasks) // 20)
+
+    def progress(done, total):
+        if not args.quiet and (done % every == 0 or done == total):
+            print(f"{done}/{total} sopas", file=log, flush=True)
+
+    start = time.perf_counter()
+    try:
+        results = run_soups(tasks, writer, args.workers, progress)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    if args.quiet:
+        return
+    if args.output:
+        keys = {(rule, density) for _, density, rule, *_ in tasks}
+        results = [r for r in read_results(args.output) if (r["rule"], float(r["density"])) in keys]
+    rate = (len(tasks) - skipped) / elapsed if elapsed > 0 else float("inf")
+    print(f"{len(tasks) - skipped} sopas en {elapsed:.1f} s ({rate:,.1f}/s)", file=log)
+    print("regla\tdensidad\tsopas\testables\tvida media\tpoblación media", file=log)
+    for (rule, density), (count, settled, lifespan, population) in summarize(results).items():
+        mean = "-" if lifespan is None else f"{lifespan:.1f}"
+        print(f"{rule}\t{density:g}\t{count}\t{settled}\t{mean}\t{population:.1f}", file=log)
+
+
+def export(args, out=sys.stdout):
+    if args.every < 1 or args.scale < 1 or args.fps <= 0 or args.queue < 1:
+        raise SystemExit("--every, --scale, --fps y --queue tienen que ser positivos")
+    recording = engine = None
+    if args.input and args.input.lower().endswith(".vidarec"):
+        try:
+            recording = Recording(args.input)
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"{args.input}: {exc}")
+        rows, cols = args.rows or recording.rows, args.cols or recording.cols
+        frames = recording_frames(recording, args.generations, args.every)
+        total = len(range(0, len(recording), args.every))
+        if args.generations is not None:
+            total = min(total, args.generations)
+    else:
+        engine = build_engine(args)
+        rows, cols = engine.rows, engine.cols
+        generations = 100 if args.generations is None else args.generations
+        frames = engine_frames(engine, generations, args.every)
+        total = generations // args.every + 1
+    try:
+        try:
+            writer = open_writer(args.output, theme_colors(args.palette, not args.light), args.fps)
+        except (OSError, ValueError) as exc:
+            raise SystemExit(str(exc))
+        every = max(1, total // 20)
+
+        def progress(done, generation):
+            if not args.quiet and (done % every == 0 or done == total):
+                print(f"{done}/{total} cuadros (generación {generation})", file=out, flush=True)
+
+        start = time.perf_counter()
+        try:
+            written = export_frames(frames, rows, cols, writer, args.scale, args.queue, progress)
+        except (OSError, ValueError) as exc:
+            raise SystemExit(f"{args.output}: {exc}")
+        finally:
+            writer.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        if recording is not None:
+            recording.close()
+        if engine is not None:
+            engine.close()
+    if args.quiet:
+        return
+    rate = written / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"{written} cuadros de {cols * args.scale}x{rows * args.scale} en {elapsed:.1f} s ({rate:,.1f} cuadros/s)",
+        file=out,
+    )
+    if args.output.lower().endswith((".rgb", ".raw")):
+        print(
+            f"para convertirlo: ffmpeg -f rawvideo -pix_fmt rgb24 -s {cols * args.scale}x{rows * args.scale} "
+            f"-r {args.fps:g} -i {args.output} vida.mp4",
+            file=out,
+        )
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        run(args)
+    elif args.command == "replay":
+        replay(args)
+    elif args.command == "soups":
+        soups(args)
+    elif args.command == "export":
+        export(args)
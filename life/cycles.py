@@ -0,0 +1,54 @@
+from collections import deque
+
+# Board hashes remembered; longer cycles go unnoticed
+HISTORY = 1024
+
+
+class CycleDetector:
+    # Recent board hashes and the generation each was seen at. A repeated hash
+    # means the board is back in an earlier state, so from that generation on it
+    # cycles with period equal to the distance (1 for still lifes and empty
+    # boards). Generations must be observed in order: reset() after any edit.
+    #
+    # cycle is (start generation, period) once found, None before.
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self.reset()
+
+    def reset(self):
+        self._seen = {}
+        self._order = deque()
+        self.cycle = None
+
+    def observe(self, generation, key):
+        if self.cycle is not None:
+            return self.cycle
+        start = self._seen.get(key)
+        if start is not None:
+            if start != generation:
+                self.cycle = (start, generation - start)
+            return self.cycle
+        self._seen[key] = generation
+        self._order.append(key)
+        if len(self._order) > self.history:
+            del self._seen[self._order.popleft()]
+        return None
+
+
+def skip_cycle(engine, n, period):
+    # Advances n generations of a board known to cycle with `period`, stepping only n % period
+    engine.advance(n % period)
+    engine.generation += n - n % period
+
+
+def advance_detecting(engine, n, detector):
+    # Steps up to n generations watching for a cycle; once one shows up the
+    # remaining generations are skipped. Returns the detector's cycle
+    detector.observe(engine.generation, engine.board_hash())
+    while n > 0 and detector.cycle is None:
+        engine.step()
+        n -= 1
+        detector.observe(engine.generation, engine.board_hash())
+    if n > 0:
+        skip_cycle(engine, n, detector.cycle[1])
+    return detector.cycle
@@ -0,0 +1,425 @@
+import numpy as np
+
+from .rules import CONWAY
+
+# Changed cells are reported as (r0, r1, c0, c1) boxes of at most this many cells per side
+DIRTY_TILE = 32
+# Past this many boxes the change set collapses to "everything" (None)
+MAX_DIRTY = 1024
+# Cells drawn at once by random_fill
+RANDOM_BLOCK = 1 << 22
+
+
+def resized_copy(old, rows, cols):
+    # Same placement as the original apply_resize: grow centered, shrink from top-left
+    new = np.zeros((rows, cols), dtype=np.uint8)
+    old_rows, old_cols = old.shape
+    sr = max(0, (rows - old_rows) // 2)
+    sc = max(0, (cols - old_cols) // 2)
+    h = min(old_rows, rows - sr)
+    w = min(old_cols, cols - sc)
+    if h > 0 and w > 0:
+        new[sr:sr + h, sc:sc + w] = old[:h, :w]
+    return new
+
+
+def random_rows(rng, rows, cols, density, out=None):
+    # rows x cols cells alive with probability `density` (to 1/65536): four
+    # 16-bit draws per 64-bit word of the bit generator and one integer compare
+    # each. Every row takes whole words, so the board comes out the same for a
+    # seed however it's split into blocks of rows
+    words = -(-cols // 4)
+    draws = rng.bit_generator.random_raw(rows * words).view(np.uint16).reshape(rows, words * 4)[:, :cols]
+    threshold = round(min(max(density, 0.0), 1.0) * 65536)
+    return np.less(draws, threshold, out=out)
+
+
+def random_fill(cells, density, seed=None):
+    # Seeded random fill of a uint8 board, in place, a block of rows at a time
+    rng = np.random.default_rng(seed)
+    rows, cols = cells.shape
+    step = max(1, RANDOM_BLOCK // max(1, cols))
+    for a in range(0, rows, step):
+        b = min(rows, a + step)
+        random_rows(rng, b - a, cols, density, out=cells[a:b].view(bool))
+
+
+def next_cells(p, n=None, rule=CONWAY):
+    # Next state of the interior of a board padded with a one-cell halo.
+    # Leading axes are batch axes, so a stack of padded tiles works too
+    if n is None:
+        n = np.empty(p.shape[:-2] + (p.shape[-2] - 2, p.shape[-1] - 2), dtype=np.uint8)
+
+    # Neighbour count as the sum of the 8 shifted views of the padded board
+    np.add(p[..., :-2, :-2], p[..., :-2, 1:-1], out=n)
+    n += p[..., :-2, 2:]
+    n += p[..., 1:-1, :-2]
+    n += p[..., 1:-1, 2:]
+    n += p[..., 2:, :-2]
+    n += p[..., 2:, 1:-1]
+    n += p[..., 2:, 2:]
+
+    return rule.apply(n, p[..., 1:-1, 1:-1])
+
+
+def step_rows(cells, a, b, wrap, rule=CONWAY):
+    # Next state of rows a..b-1, reading one halo row above and below
+    rows, cols = cells.shape
+    p = np.zeros((b - a + 2, cols + 2), dtype=np.uint8)
+    p[1:-1, 1:-1] = cells[a:b]
+    if a > 0 or wrap:
+        p[0, 1:-1] = cells[(a - 1) % rows]
+    if b < rows or wrap:
+        p[-1, 1:-1] = cells[b % rows]
+    if wrap:
+        p[:, 0] = p[:, -2]
+        p[:, -1] = p[:, 1]
+    return next_cells(p, rule=rule)
+
+
+def changed_tiles(diff, tile=DIRTY_TILE):
+    # Boolean change mask -> which tile x tile tiles hold at least one change
+    rows, cols = diff.shape
+    if not rows or not cols:
+        return np.zeros((0, 0), dtype=bool)
+    tiles = np.logical_or.reduceat(diff, np.arange(0, rows, tile), axis=0)
+    return np.logical_or.reduceat(tiles, np.arange(0, cols, tile), axis=1)
+
+
+def tile_boxes(tiles, rows, cols, tile=DIRTY_TILE):
+    return [
+        (r * tile, min(rows, (r + 1) * tile), c * tile, min(cols, (c + 1) * tile))
+        for r, c in zip(*np.nonzero(tiles))
+    ]
+
+
+def tile_area(tiles, rows, cols, tile=DIRTY_TILE):
+    # Cells covered by the marked tiles, the ones on the far edges clipped to the board
+    heights = np.minimum(tile, rows - np.arange(tiles.shape[0]) * tile)
+    widths = np.minimum(tile, cols - np.arange(tiles.shape[1]) * tile)
+    return int(heights @ tiles.astype(np.int64) @ widths)
+
+
+def zobrist(rr, cc):
+    # XOR of a pseudo-random 64-bit key per live cell, the key being splitmix64 of
+    # the cell's coordinates: no key table, so unbounded boards hash too. Flipping
+    # a cell XORs its key in or out, which keeps the hash incremental
+    x = np.asarray(rr, dtype=np.int64).astype(np.uint64) << np.uint64(32)
+    x ^= np.asarray(cc, dtype=np.int64).astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    x += np.uint64(0x9E3779B97F4A7C15)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return int(np.bitwise_xor.reduce(x)) if x.size else 0
+
+
+def live_box(cells):
+    # (r0, r1, c0, c1) around the live cells, None on an empty board
+    rows = np.flatnonzero(cells.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(cells[rows[0]:rows[-1] + 1].any(axis=0))
+    return int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1
+
+
+def row_blocks(values, k, dtype):
+    # Sums of each k rows (the last run may be shorter), added slice by slice
+    # into `dtype`, which has to hold them: a pass per row of the block and no
+    # reshaped copy, so a narrow type keeps it cheap
+    h = len(values)
+    full = h // k
+    out = np.zeros((-(-h // k),) + values.shape[1:], dtype=dtype)
+    blocks = values[:full * k].reshape((full, k) + values.shape[1:])
+    for i in range(k):
+        out[:full] += blocks[:, i]
+    if full * k < h:
+        out[full] = values[full * k:].sum(axis=0, dtype=dtype)
+    return out
+
+
+def block_counts(cells, k):
+    # Live cells per k x k block; partial blocks at the far edges count what they cover
+    rows = row_blocks(cells, k, np.uint8 if k < 256 else np.int64)
+    w = rows.shape[1]
+    full = w // k
+    out = np.zeros((len(rows), -(-w // k)), dtype=np.int64)
+    out[:, :full] = rows[:, :full * k].reshape(len(rows), full, k).sum(axis=2, dtype=np.int64)
+    if full * k < w:
+        out[:, full] = rows[:, full * k:].sum(axis=1, dtype=np.int64)
+    return out
+
+
+def merge_dirty(a, b):
+    if a is None or b is None:
+        return None
+    merged = a + b
+    return merged if len(merged) <= MAX_DIRTY else None
+
+
+class Snapshot:
+    # Read-only copy of a board that another thread can paint from.
+    # dirty lists the boxes changed since the previous snapshot (None: all of it).
+    # Unbounded snapshots answer region() and density() for any coordinates
+    bounded = True
+
+    def __init__(self, cells, generation, status="", dirty=None):
+        cells.flags.writeable = False
+        self.cells = cells
+        self.rows, self.cols = cells.shape
+        self.generation = generation
+        self.status = status
+        self.dirty = dirty
+
+    def region(self, r0, r1, c0, c1):
+        return self.cells[r0:r1, c0:c1]
+
+    def density(self, r0, r1, c0, c1, k):
+        # Live cells per k x k block of the region
+        return block_counts(self.region(r0, r1, c0, c1), k)
+
+    def population(self):
+        return int(np.count_nonzero(self.cells))
+
+
+class Engine:
+    name = ""
+    # Unbounded engines simulate the whole plane and can't run rules with B0
+    bounded = True
+
+    def __init__(self, rows, cols, wrap=False):
+        self.rows = rows
+        self.cols = cols
+        self.wrap = wrap
+        self.rule = CONWAY
+        self.generation = 0
+        self.dirty = None
+        # Board hash, kept up to date by steps that know their changes; None until asked for
+        self._hash = None
+        # Per-generation figures (a StatsRing) that steps push as they go; None keeps them off
+        self.stats = None
+        # Population as of the last step that pushed stats; None after any other change
+        self._population = None
+
+    # --- Primitives every engine implements ---
+    def step(self):
+        raise NotImplementedError
+
+    def to_array(self):
+        raise NotImplementedError
+
+    def load_array(self, cells):
+        raise NotImplementedError
+
+    def set_many(self, rr, cc, value):
+        raise NotImplementedError
+
+    def set_rule(self, rule):
+        if rule.b0 and not self.bounded:
+            raise ValueError(f"{self.name}: las reglas con B0 necesitan un tablero acotado")
+        self.rule = rule
+
+    # --- Change tracking ---
+    def mark_dirty(self, boxes=None):
+        self.dirty = None if boxes is None else merge_dirty(self.dirty, boxes)
+        self._hash = None
+        self._population = None
+
+    def mark_step(self, diff):
+        # Change set, and the board hash if one is kept, after stepping the whole
+        # board; returns the grid of tiles that changed
+        h = self._hash
+        tiles = changed_tiles(diff)
+        self.mark_dirty(None if self.dirty is None else tile_boxes(tiles, *diff.shape))
+        if h is not None:
+            self._hash = h ^ zobrist(*np.nonzero(diff))
+        return tiles
+
+    # --- Statistics ---
+    def population_before_step(self):
+        # For a step about to push stats: free unless an edit came since the last one
+        if self._population is None:
+            self._population = self.population()
+        return self._population
+
+    def push_stats(self, population, births, deaths, box, active):
+        # After a step (generation already advanced)
+        self._population = population
+        self.stats.push(self.generation, population, births, deaths, box, active)
+
+    def push_cell_stats(self, before, cells, diff, active):
+        # Births and deaths from the number of cells that flipped and how the
+        # population moved: two counts, no pass comparing old and new
+        changed = int(np.count_nonzero(diff))
+        population = int(np.count_nonzero(cells))
+        births = (changed + population - before) // 2
+        self.push_stats(population, births, changed - births, live_box(cells), active)
+
+    def touch(self, rr, cc):
+        rr = np.asarray(rr)
+        cc = np.asarray(cc)
+        if rr.size:
+            self.mark_dirty([(int(rr.min()), int(rr.max()) + 1, int(cc.min()), int(cc.max()) + 1)])
+
+    def take_dirty(self):
+        dirty, self.dirty = self.dirty, []
+        return dirty
+
+    # --- Derived operations, overridden where an engine can do better ---
+    def advance(self, n):
+        for _ in range(n):
+            self.step()
+
+    def advance_pow2(self, k):
+        self.advance(1 << k)
+
+    def region(self, r0, r1, c0, c1):
+        return self.to_array()[r0:r1, c0:c1]
+
+    def get(self, r, c):
+        return int(self.region(r, r + 1, c, c + 1)[0, 0])
+
+    def set(self, r, c, value):
+        self.set_many(np.array([r]), np.array([c]), value)
+
+    def toggle(self, r, c):
+        self.set(r, c, 0 if self.get(r, c) else 1)
+
+    def clear(self):
+        self.load_array(np.zeros((self.rows, self.cols), dtype=np.uint8))
+
+    def fill(self):
+        self.load_array(np.ones((self.rows, self.cols), dtype=np.uint8))
+
+    def randomize(self, density=0.2, seed=None):
+        cells = np.empty((self.rows, self.cols), dtype=np.uint8)
+        random_fill(cells, density, seed)
+        self.load_array(cells)
+
+    def stamp(self, offsets, r, c):
+        offs = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+        rr, cc = self.fold(offs[:, 0] + r, offs[:, 1] + c)
+        if len(rr):
+            self.set_many(rr, cc, 1)
+
+    def paint(self, rr, cc, value):
+        # A brush stroke's cells all set to `value` in one edit; past the edges
+        # of a bounded board they wrap round or are dropped
+        rr = np.asarray(rr, dtype=np.int64)
+        cc = np.asarray(cc, dtype=np.int64)
+        if self.bounded:
+            rr, cc = self.fold(rr, cc)
+        if len(rr):
+            self.set_many(rr, cc, value)
+
+    def fold(self, rr, cc):
+        if self.wrap:
+            return rr % self.rows, cc % self.cols
+        inside = (rr >= 0) & (rr < self.rows) & (cc >= 0) & (cc < self.cols)
+        return rr[inside], cc[inside]
+
+    def resize(self, rows, cols, preserve=True):
+        old = self.to_array() if preserve else np.zeros((0, 0), dtype=np.uint8)
+        self.rows = rows
+        self.cols = cols
+        self.load_array(resized_copy(old, rows, cols))
+
+    def population(self):
+        return int(self.to_array().sum())
+
+    def packed(self):
+        # Rows bit-packed 8 cells per byte, cell c in bit c % 8 of byte c // 8
+        return np.packbits(self.to_array(), axis=1, bitorder="little")
+
+    def load_packed(self, packed, cols):
+        self.load_array(np.unpackbits(np.asarray(packed), axis=1, count=cols, bitorder="little"))
+
+    def live_cells(self):
+        return np.nonzero(self.to_array())
+
+    def board_hash(self):
+        # Zobrist hash of the live cells; equal boards hash equal
+        if self._hash is None:
+            self._hash = zobrist(*self.live_cells())
+        return self._hash
+
+    def status_text(self):
+        return ""
+
+    def snapshot(self):
+        return Snapshot(self.to_array().copy(), self.generation, self.status_text(), self.take_dirty())
+
+    def close(self):
+        pass
+
+
+class NumpyEngine(Engine):
+    name = "NumPy"
+
+    def __init__(self, rows, cols, wrap=False):
+        super().__init__(rows, cols, wrap)
+        self.load_array(np.zeros((rows, cols), dtype=np.uint8))
+
+    def load_array(self, cells):
+        self.rows, self.cols = cells.shape
+        self.cells = np.array(cells, dtype=np.uint8)
+        self.mark_dirty()
+        # Scratch buffers reused every generation
+        self._pad = np.zeros((self.rows + 2, self.cols + 2), dtype=np.uint8)
+        self._count = np.empty((self.rows, self.cols), dtype=np.uint8)
+
+    def to_array(self):
+        return self.cells
+
+    def region(self, r0, r1, c0, c1):
+        return self.cells[r0:r1, c0:c1]
+
+    def get(self, r, c):
+        return int(self.cells[r, c])
+
+    def set(self, r, c, value):
+        self.cells[r, c] = value
+        self.touch(r, c)
+
+    def set_many(self, rr, cc, value):
+        self.cells[rr, cc] = value
+        self.touch(rr, cc)
+
+    def clear(self):
+        self.cells.fill(0)
+        self.mark_dirty()
+
+    def fill(self):
+        self.cells.fill(1)
+        self.mark_dirty()
+
+    def randomize(self, density=0.2, seed=None):
+        random_fill(self.cells, density, seed)
+        self.mark_dirty()
+
+    def population(self):
+        return int(np.count_nonzero(self.cells))
+
+    def step(self):
+        cells = self.cells
+        p = self._pad
+        p[1:-1, 1:-1] = cells
+        if self.wrap:
+            p[0, 1:-1] = cells[-1]
+            p[-1, 1:-1] = cells[0]
+            p[:, 0] = p[:, -2]
+            p[:, -1] = p[:, 1]
+        else:
+            p[0, :] = 0
+            p[-1, :] = 0
+            p[:, 0] = 0
+            p[:, -1] = 0
+
+        before = None if self.stats is None else self.population_before_step()
+        self.cells = next_cells(p, self._count, self.rule)
+        diff = self.cells != cells
+        tiles = self.mark_step(diff)
+        self.generation += 1
+        if before is not None:
+            self.push_cell_stats(before, self.cells, diff, tile_area(tiles, self.rows, self.cols))
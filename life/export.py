@@ -0,0 +1,337 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from .engines import resized_copy
+
+# Animations of a run: generations are simulated, rasterized and encoded by
+# three stages overlapping in their own threads, joined by small bounded
+# queues so a slow encoder holds back the others instead of piling up frames
+EXPORT_QUEUE = 8
+EXPORT_FPS = 10
+# The GUI's palettes; a frame has two colours, background (index 0) and alive (1)
+PALETTES = {
+    "Verde": "#00e676",
+    "Azul": "#2196f3",
+    "Magenta": "#e91e63",
+    "Naranja": "#ff9800",
+}
+DARK_BG = "#121212"
+LIGHT_BG = "#ffffff"
+FORMATS = (".gif", ".png", ".y4m", ".rgb")
+
+
+def theme_colors(palette, dark=True):
+    # (alive, background) hex colours, as the GUI's theme paints them
+    return PALETTES.get(palette, PALETTES["Verde"]), DARK_BG if dark else LIGHT_BG
+
+
+def hex_rgb(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def cell_mask(scale):
+    # Pixels of one cell that take the alive colour: cells of 3 px and more
+    # keep a background gap around them like the board's sprite
+    mask = np.ones((scale, scale), dtype=np.uint8)
+    gap = max(1, int(scale * 0.12))
+    if scale - 2 * gap > 0:
+        mask[:gap] = mask[-gap:] = 0
+        mask[:, :gap] = mask[:, -gap:] = 0
+    return mask
+
+
+def rasterize(packed, rows, cols, mask):
+    # Bit-packed rows to a palette-index image, `mask` pixels per cell. Boards
+    # of another size (a recording that was resized) are cut or padded
+    packed = np.asarray(packed)
+    cells = np.unpackbits(packed, axis=1, count=min(cols, packed.shape[1] * 8), bitorder="little")
+    if cells.shape != (rows, cols):
+        cells = resized_copy(cells, rows, cols)
+    s = len(mask)
+    if s == 1:
+        return np.ascontiguousarray(cells)
+    return (cells[:, None, :, None] & mask[None, :, None, :]).reshape(rows * s, cols * s)
+
+
+def engine_frames(engine, generations, every=1):
+    # The engine's board now and every `every` generations after, up to
+    # `generations` more; steps run in whatever thread iterates this
+    yield engine.generation, np.array(engine.packed())
+    for _ in range(generations // every):
+        engine.advance(every)
+        yield engine.generation, np.array(engine.packed())
+
+
+def recording_frames(recording, count=None, every=1):
+    # Every `every`-th record of a .vidarec, `count` frames at most
+    stop = len(recording) if count is None else min(len(recording), count * every)
+    for i in range(0, stop, every):
+        board = recording.frame(i)
+        yield board.generation, board.packed
+
+
+def gif_codes(values, lengths):
+    # LZW codes and widths for runs of palette indexes (minimum code size 2).
+    # Any parse into strings already in the table decodes the same, so this
+    # one only matches runs of one colour: the table entries for c, cc, ccc...
+    # are tracked per colour and a run costs a few codes rather than a table
+    # lookup per pixel. The encoder mirrors the decoder: an entry (previous
+    # string + first index of this one) for every code after the first past a
+    # clear, the width growing when the next entry needs it, a clear at 4096
+    clear, end = 4, 5
+    codes, widths = [clear], [3]
+    width, nxt, first = 3, end + 1, True
+    runs = {}
+    prev_color = prev_len = -1
+    for color, n in zip(values.tolist(), lengths.tolist()):
+        table = runs.setdefault(color, [color])
+        while n:
+            k = min(n, len(table))
+            codes.append(table[k - 1])
+            widths.append(width)
+            if not first:
+                if prev_color == color and prev_len == len(table):
+                    table.append(nxt)
+                nxt += 1
+                if nxt == 1 << width and width < 12:
+                    width += 1
+            first = False
+            prev_color, prev_len = color, k
+            n -= k
+            if nxt == 4096:
+                codes.append(clear)
+                widths.append(width)
+                width, nxt, first = 3, end + 1, True
+                runs = {}
+                table = runs.setdefault(color, [color])
+    codes.append(end)
+    widths.append(width)
+    return np.array(codes, dtype=np.int64), np.array(widths, dtype=np.int64)
+
+
+def pack_codes(codes, widths):
+    # Variable-width codes into bytes, least significant bit first
+    offsets = np.cumsum(widths) - widths
+    bits = np.zeros(int(offsets[-1] + widths[-1]), dtype=np.uint8)
+    for j in range(int(widths.max())):
+        used = widths > j
+        bits[offsets[used] + j] = (codes[used] >> j) & 1
+    return np.packbits(bits, bitorder="little").tobytes()
+
+
+def gif_blocks(data):
+    # Data sub-blocks of up to 255 bytes and the terminator
+    return b"".join(bytes((len(data[i:i + 255]),)) + data[i:i + 255] for i in range(0, len(data), 255)) + b"\x00"
+
+
+def lzw_gif(image):
+    flat = image.ravel()
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(flat)))
+    return b"\x02" + gif_blocks(pack_codes(*gif_codes(flat[starts], lengths)))
+
+
+class GifWriter:
+    # Looping animated GIF. After the first frame only the rectangle that
+    # changed is stored, drawn over the previous frame
+    def __init__(self, path, colors, fps=EXPORT_FPS):
+        self.path = path
+        self.colors = colors
+        # Centiseconds; browsers slow anything under 2 down
+        self.delay = max(2, round(100 / fps))
+        self.frames = 0
+        self._f = open(path, "wb")
+        self._previous = None
+
+    def write(self, generation, image):
+        h, w = image.shape
+        if self._previous is None:
+            if max(h, w) > 0xFFFF:
+                raise ValueError(f"GIF de {w}x{h}: el máximo es 65535 px de lado")
+            palette = b"".join(bytes(hex_rgb(c)) for c in self.colors)
+            self._f.write(b"GIF89a" + struct.pack("<HHBBB", w, h, 0xF0, 0, 0) + palette)
+            self._f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+            top, bottom, left, right = 0, h, 0, w
+        else:
+            changed = image != self._previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows):
+                cols = np.flatnonzero(changed.any(axis=0))
+                top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            else:
+                top, bottom, left, right = 0, 1, 0, 1
+        # Graphic control (keep the previous frame under this one, delay), then the image
+        self._f.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, self.delay, 0, 0))
+        self._f.write(struct.pack("<BHHHHB", 0x2C, left, top, right - left, bottom - top, 0))
+        self._f.write(lzw_gif(image[top:bottom, left:right]))
+        self._previous = image
+        self.frames += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.write(b"\x3b")
+            self._f.close()
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class PngWriter:
+    # One 1-bit indexed PNG per frame. The path is a template with {gen}
+    # (snap_{gen:06d}.png); without one the generation goes before the extension
+    def __init__(self, path, colors, level=6):
+        root, ext = os.path.splitext(path)
+        self.template = path if "{" in path else root + "_{gen:06d}" + ext
+        self.colors = colors
+        self.level = level
+        self.frames = 0
+
+    def write(self, generation, image):
+        h, w = image.shape
+        rows = np.zeros((h, (w + 7) // 8 + 1), dtype=np.uint8)
+        rows[:, 1:] = np.packbits(image, axis=1)
+        header = struct.pack(">IIBBBBB", w, h, 1, 3, 0, 0, 0)
+        palette = b"".join(bytes(hex_rgb(c)) for c in self.colors)
+        with open(self.template.format(gen=generation), "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", header) + png_chunk(b"PLTE", palette))
+            f.write(png_chunk(b"IDAT", zlib.compress(rows, self.level)) + png_chunk(b"IEND", b""))
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+class RawWriter:
+    # Uncompressed RGB24 frames back to back, for
+    # ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i file.rgb
+    def __init__(self, path, colors):
+        self.path = path
+        self.lut = np.array([hex_rgb(c) for c in colors], dtype=np.uint8)
+        self.frames = 0
+        self.size = None
+        self._f = open(path, "wb")
+
+    def write(self, generation, image):
+        self.size = image.shape[::-1]
+        self._f.write(np.take(self.lut, image, axis=0).tobytes())
+        self.frames += 1
+
+    def close(self):
+        self._f.close()
+
+
+class Y4mWriter(RawWriter):
+    # YUV4MPEG2 (4:4:4, BT.601 limited range): uncompressed, but it carries its
+    # size and frame rate, so ffmpeg and most players read it as is
+    def __init__(self, path, colors, fps=EXPORT_FPS):
+        super().__init__(path, colors)
+        self.fps = max(1, round(fps))
+        rgb = self.lut.astype(np.float64) / 255
+        yuv = rgb @ np.array([[65.481, -37.797, 112.0], [128.553, -74.203, -93.786], [24.966, 112.0, -18.214]])
+        self.lut = np.rint(yuv + (16, 128, 128)).astype(np.uint8).T.copy()
+
+    def write(self, generation, image):
+        if self.size is None:
+            h, w = image.shape
+            self._f.write(f"YUV4MPEG2 W{w} H{h} F{self.fps}:1 Ip A1:1 C444\n".encode("ascii"))
+        self.size = image.shape[::-1]
+        self._f.write(b"FRAME\n")
+        self._f.write(np.take(self.lut, image, axis=1).tobytes())
+        self.frames += 1
+
+
+def open_writer(path, colors, fps=EXPORT_FPS):
+    # Writer for the format the extension names
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gif":
+        return GifWriter(path, colors, fps)
+    if ext == ".png":
+        return PngWriter(path, colors)
+    if ext == ".y4m":
+        return Y4mWriter(path, colors, fps)
+    if ext in (".rgb", ".raw"):
+        return RawWriter(path, colors)
+    raise ValueError(f"formato de animación desconocido: {ext or path} (usa {', '.join(FORMATS)})")
+
+
+_END = object()
+
+
+def _put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _drain(q, stop):
+    while True:
+        try:
+            item = q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _END:
+            return
+        yield item
+
+
+def _stage(items, work, out, stop, errors):
+    try:
+        for item in items:
+            if not _put(out, work(item), stop):
+                return
+        _put(out, _END, stop)
+    except Exception as exc:
+        errors.append(exc)
+        stop.set()
+
+
+def export_frames(frames, rows, cols, writer, scale=1, depth=EXPORT_QUEUE, progress=None, stop=None):
+    # Feeds (generation, packed rows) frames through rasterizing into the
+    # writer. `frames` is iterated in a thread of its own (engine_frames steps
+    # there), rasterizing in another, encoding in the caller's; at most
+    # `depth` frames wait between two stages. Setting `stop` winds it all
+    # down early (it ends up set either way). Returns the number of frames
+    # written
+    stop = threading.Event() if stop is None else stop
+    errors = []
+    mask = cell_mask(scale)
+    boards = queue.Queue(depth)
+    images = queue.Queue(depth)
+    threads = [
+        threading.Thread(target=_stage, args=(frames, lambda f: f, boards, stop, errors), daemon=True),
+        threading.Thread(
+            target=_stage,
+            args=(_drain(boards, stop), lambda f: (f[0], rasterize(f[1], rows, cols, mask)), images, stop, errors),
+            daemon=True,
+        ),
+    ]
+    for t in threads:
+        t.start()
+    written = 0
+    try:
+        for generation, image in _drain(images, stop):
+            writer.write(generation, image)
+            written += 1
+            if progress is not None:
+                progress(written, generation)
+    finally:
+        # Done or not, nothing is left to wait for
+        stop.set()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return written
@@ -0,0 +1,329 @@
+import bisect
+import os
+import re
+
+import numpy as np
+
+from .boardfile import BoardFile, pack_cells
+
+# Plaintext (.cells) boards: one line per row, "O" alive and "." dead, "!" starts a comment.
+# "#" and "*" are read as alive too, like the built-in pattern strings
+ALIVE_CHARS = b"O#*"
+# Bytes read per chunk when streaming a pattern file
+CHUNK_BYTES = 1 << 20
+# RLE lines are kept under this length, as the format asks
+RLE_LINE = 70
+
+_ALIVE = np.zeros(256, dtype=bool)
+_ALIVE[list(ALIVE_CHARS)] = True
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[list(b" \t\r\n")] = True
+_RLE_HEADER = re.compile(rb"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*(\S+))?", re.IGNORECASE)
+
+
+def parse_cells(text):
+    lines = [line.rstrip() for line in text.splitlines() if not line.startswith("!")]
+    while lines and not lines[-1]:
+        lines.pop()
+    cols = max((len(line) for line in lines), default=0)
+    cells = np.zeros((len(lines), cols), dtype=np.uint8)
+    lut = np.zeros(256, dtype=np.uint8)
+    lut[list(ALIVE_CHARS)] = 1
+    for r, line in enumerate(lines):
+        raw = np.frombuffer(line.encode("ascii", "replace"), dtype=np.uint8)
+        cells[r, :len(raw)] = lut[raw]
+    return cells
+
+
+def format_cells(cells):
+    chars = np.where(np.asarray(cells) != 0, ord("O"), ord(".")).astype(np.uint8)
+    return "\n".join(row.tobytes().decode("ascii") for row in chars) + "\n"
+
+
+def offsets_to_cells(offsets, shape=None):
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    if shape is None:
+        shape = tuple(offsets.max(axis=0) + 1) if len(offsets) else (0, 0)
+    cells = np.zeros(shape, dtype=np.uint8)
+    inside = (offsets[:, 0] < shape[0]) & (offsets[:, 1] < shape[1])
+    cells[offsets[inside, 0], offsets[inside, 1]] = 1
+    return cells
+
+
+# --- Streaming pattern files: live cells as (N, 2) row/col offsets, never a string per cell ---
+class RleDecoder:
+    # Incremental RLE body decoder: feed() chunks split anywhere, even inside a
+    # run count. Each chunk is tokenized with array operations; runs of live
+    # cells expand into coordinates with one repeat per chunk
+    def __init__(self):
+        self.row = 0
+        self.col = 0
+        self.done = False
+        self._carry = b""
+        self._rows = []
+        self._cols = []
+
+    def feed(self, data):
+        if self.done:
+            return
+        a = np.frombuffer(self._carry + data, dtype=np.uint8)
+        a = a[~_SPACE[a]]
+        end = np.flatnonzero(a == ord("!"))
+        if end.size:
+            a = a[:end[0]]
+            self.done = True
+        digit = (a >= ord("0")) & (a <= ord("9"))
+        # A count at the end of the chunk may go on in the next one
+        tail = 0
+        if not self.done:
+            while tail < len(a) and digit[len(a) - 1 - tail]:
+                tail += 1
+        self._carry = a[len(a) - tail:].tobytes() if tail else b""
+        a, digit = a[:len(a) - tail], digit[:len(a) - tail]
+        tags = np.flatnonzero(~digit)
+        if not tags.size:
+            return
+
+        # Run counts: each digit adds its value times 10 ** (distance to its tag - 1)
+        pos = np.flatnonzero(digit)
+        owner = np.searchsorted(tags, pos)
+        values = (a[pos] - ord("0")).astype(np.int64) * np.power(10, tags[owner] - pos - 1, dtype=np.int64)
+        counts = np.bincount(owner, weights=values, minlength=len(tags)).astype(np.int64)
+        counted = np.zeros(len(tags), dtype=bool)
+        counted[owner] = True
+        counts[~counted] = 1
+
+        t = a[tags]
+        newline = t == ord("$")
+        dead = (t == ord("b")) | (t == ord("."))
+        width = np.where(newline, 0, counts)
+        lines = np.where(newline, counts, 0)
+        y = self.row + np.cumsum(lines) - lines
+        # Columns restart after every "$"; before the first one they go on from the last chunk
+        cw = np.cumsum(width) - width
+        last = np.maximum.accumulate(np.where(newline, np.arange(len(t)), -1))
+        x = np.where(last >= 0, cw - cw[np.maximum(last, 0)], self.col + cw)
+
+        runs = np.flatnonzero(~newline & ~dead & (counts > 0))
+        if runs.size:
+            n = counts[runs]
+            total = int(n.sum())
+            starts = np.repeat(np.cumsum(n) - n, n)
+            self._rows.append(np.repeat(y[runs], n))
+            self._cols.append(np.repeat(x[runs], n) + np.arange(total, dtype=np.int64) - starts)
+        self.row = int(y[-1] + lines[-1])
+        self.col = 0 if newline[-1] else int(x[-1] + width[-1])
+
+    def offsets(self):
+        if not self._rows:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.column_stack((np.concatenate(self._rows), np.concatenate(self._cols)))
+
+
+def read_rle(f):
+    # Binary file object -> (offsets, info); info has name, comments, rule, width, height
+    info = {"name": None, "comments": [], "rule": None, "width": None, "height": None}
+    decoder = RleDecoder()
+    for line in f:
+        s = line.strip()
+        if not s:
+            continue
+        if s.startswith(b"#"):
+            text = s[2:].strip().decode("utf-8", "replace")
+            if s[1:2] == b"N":
+                info["name"] = text
+            elif s[1:2] in (b"C", b"c", b"O"):
+                info["comments"].append(text)
+            continue
+        header = _RLE_HEADER.match(s)
+        if header:
+            info["width"], info["height"] = int(header[1]), int(header[2])
+            if header[3]:
+                info["rule"] = header[3].decode("ascii", "replace")
+            continue
+        decoder.feed(line)
+        break
+    while not decoder.done:
+        chunk = f.read(CHUNK_BYTES)
+        if not chunk:
+            break
+        decoder.feed(chunk)
+    return decoder.offsets(), info
+
+
+def read_plaintext(f):
+    # Binary file object -> (offsets, info); one row per line, "!Name:" names the pattern
+    info = {"name": None, "comments": [], "rule": None, "width": None, "height": None}
+    rows, cols = [], []
+    r = 0
+    for line in f:
+        if line.startswith(b"!"):
+            text = line[1:].strip().decode("utf-8", "replace")
+            if text.lower().startswith("name:"):
+                info["name"] = text[5:].strip()
+            elif text:
+                info["comments"].append(text)
+            continue
+        c = np.flatnonzero(_ALIVE[np.frombuffer(line, dtype=np.uint8)])
+        if c.size:
+            rows.append(np.full(c.size, r, dtype=np.int64))
+            cols.append(c.astype(np.int64))
+        r += 1
+    if not rows:
+        return np.zeros((0, 2), dtype=np.int64), info
+    return np.column_stack((np.concatenate(rows), np.concatenate(cols))), info
+
+
+def cropped(offsets):
+    # Offsets shifted to start at (0, 0), and the (height, width) they span
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    if not len(offsets):
+        return offsets, (0, 0)
+    offsets = offsets - offsets.min(axis=0)
+    return offsets, tuple((offsets.max(axis=0) + 1).tolist())
+
+
+def _sorted_runs(offsets):
+    # Cells in row-major order merged into horizontal runs: (row, first col, length)
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    if not len(offsets):
+        return offsets[:, 0], offsets[:, 1], offsets[:, 0]
+    r, c = offsets[:, 0], offsets[:, 1]
+    dr = np.diff(r)
+    # np.argwhere and the engines' live cells come sorted already
+    if not ((dr > 0) | ((dr == 0) & (np.diff(c) > 0))).all():
+        order = np.lexsort((c, r))
+        r, c = r[order], c[order]
+    keep = np.r_[True, (r[1:] != r[:-1]) | (c[1:] != c[:-1])]
+    r, c = r[keep], c[keep]
+    start = np.flatnonzero(np.r_[True, (r[1:] != r[:-1]) | (c[1:] != c[:-1] + 1)])
+    length = np.diff(np.r_[start, len(r)])
+    return r[start], c[start], length
+
+
+# RLE tokens for small run counts of each tag: "", "o", "2o", ...
+_TOKENS = {tag: np.array(["", tag] + [f"{k}{tag}" for k in range(2, 1024)], dtype=object) for tag in "$bo"}
+_POWERS = 10 ** np.arange(19, dtype=np.int64)
+
+
+def _counted(k, tag):
+    table = _TOKENS[tag]
+    out = table[np.minimum(k, len(table) - 1)]
+    big = np.flatnonzero(k >= len(table))
+    out[big] = [f"{v}{tag}" for v in k[big].tolist()]
+    return out
+
+
+def _counted_len(k):
+    digits = np.searchsorted(_POWERS, k, "right")
+    return np.where(k > 1, digits + 1, k)
+
+
+def write_rle(f, offsets, name=None, rule="B3/S23", comments=(), shape=None):
+    # Text file object. A board passes its shape to keep its size; a pattern is
+    # cropped to its live cells
+    if shape is None:
+        offsets, (height, width) = cropped(offsets)
+    else:
+        offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+        height, width = shape
+    if name:
+        f.write(f"#N {name}\n")
+    for comment in comments:
+        f.write(f"#C {comment}\n")
+    f.write(f"x = {width}, y = {height}, rule = {rule}\n")
+
+    r, c, n = _sorted_runs(offsets)
+    prev_r = np.r_[0, r[:-1]]
+    prev_end = np.r_[0, (c + n)[:-1]]
+    skip = r - prev_r
+    gap = np.where(skip > 0, c, c - prev_end)
+    # One token per run ("2$3b4o"); lines break between tokens
+    parts = np.empty(3 * len(r) + 1, dtype=object)
+    parts[0:-1:3] = _counted(skip, "$")
+    parts[1:-1:3] = _counted(gap, "b")
+    parts[2:-1:3] = _counted(n, "o")
+    parts[-1] = "!"
+    body = "".join(parts.tolist())
+    ends = np.cumsum(np.r_[_counted_len(skip) + _counted_len(gap) + _counted_len(n), 1]).tolist()
+    lines = []
+    start, base = 0, 0
+    while start < len(ends):
+        stop = max(bisect.bisect_right(ends, base + RLE_LINE, start), start + 1)
+        lines.append(body[base:ends[stop - 1]])
+        base = ends[stop - 1]
+        start = stop
+    f.write("\n".join(lines) + "\n")
+
+
+def write_plaintext(f, offsets, name=None):
+    offsets, (_, width) = cropped(offsets)
+    if name:
+        f.write(f"!Name: {name}\n")
+    if not len(offsets):
+        return
+    order = np.argsort(offsets[:, 0], kind="stable")
+    r, c = offsets[order, 0], offsets[order, 1]
+    bounds = np.flatnonzero(np.r_[True, r[1:] != r[:-1], True])
+    row = np.empty(width, dtype=np.uint8)
+    last = -1
+    for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        f.write("\n" * (int(r[a]) - last - 1))
+        row.fill(ord("."))
+        row[c[a:b]] = ord("O")
+        f.write(row[:int(c[a:b].max()) + 1].tobytes().decode("ascii") + "\n")
+        last = int(r[a])
+
+
+def read_pattern(path):
+    # (offsets, info) from an .rle or plaintext file, or the live cells of an .npy board
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        cells = np.load(path, mmap_mode="r")
+        info = {"name": None, "comments": [], "rule": None, "width": cells.shape[1], "height": cells.shape[0]}
+        return np.argwhere(cells).astype(np.int64), info
+    with open(path, "rb") as f:
+        return read_rle(f) if ext == ".rle" else read_plaintext(f)
+
+
+def write_pattern(path, offsets, name=None, rule="B3/S23"):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        offsets, shape = cropped(offsets)
+        np.save(path, offsets_to_cells(offsets, shape))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        if ext == ".rle":
+            write_rle(f, offsets, name, rule)
+        else:
+            write_plaintext(f, offsets, name)
+
+
+def read_board(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".vida":
+        return BoardFile.open(path).to_array()
+    if ext == ".npy":
+        return (np.load(path) != 0).view(np.uint8)
+    if ext == ".rle":
+        offsets, info = read_pattern(path)
+        shape = (info["height"], info["width"]) if info["width"] is not None else None
+        return offsets_to_cells(offsets, shape)
+    with open(path, encoding="ascii", errors="replace") as f:
+        return parse_cells(f.read())
+
+
+def write_board(path, cells):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".vida":
+        BoardFile(pack_cells(cells), np.shape(cells)[1]).save(path)
+        return
+    if ext == ".npy":
+        np.save(path, np.asarray(cells, dtype=np.uint8))
+        return
+    if ext == ".rle":
+        with open(path, "w", encoding="utf-8") as f:
+            write_rle(f, np.argwhere(cells), shape=np.shape(cells))
+        return
+    with open(path, "w", encoding="ascii") as f:
+        f.write(format_cells(cells))
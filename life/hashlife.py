@@ -0,0 +1,551 @@
+import gc
+
+import numpy as np
+
+from .engines import Engine, Snapshot
+from .rules import CONWAY
+
+
+class Node:
+    __slots__ = ("nw", "ne", "sw", "se", "level", "pop", "results", "image")
+
+    def __init__(self, nw, ne, sw, se, level, pop):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.pop = pop
+        self.results = None
+        self.image = None
+
+
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+# Nodes up to this level keep a cached bitmap for fast region extraction
+IMAGE_LEVEL = 4
+
+
+def life_table(rule=CONWAY):
+    # 16-bit 4x4 neighbourhood (bit r*4+c) -> 4-bit centre after one generation
+    keys = np.arange(1 << 16, dtype=np.uint32)
+    cells = ((keys[:, None] >> np.arange(16, dtype=np.uint32)) & 1).reshape(-1, 4, 4).astype(np.uint8)
+    out = np.zeros(1 << 16, dtype=np.uint8)
+    for bit, (r, c) in enumerate(((1, 1), (1, 2), (2, 1), (2, 2))):
+        n = cells[:, r - 1:r + 2, c - 1:c + 2].sum(axis=(1, 2)) - cells[:, r, c]
+        alive = rule.table[n + 9 * cells[:, r, c]]
+        out |= alive << bit
+    return out.tolist()
+
+
+class HashLifeSnapshot(Snapshot):
+    # Quadtree nodes are immutable, so the root and its origin are the whole snapshot
+    bounded = False
+
+    def __init__(self, engine):
+        self._engine = engine
+        self._root = engine.root
+        self._origin = (engine.origin_r, engine.origin_c)
+        self.rows = engine.rows
+        self.cols = engine.cols
+        self.generation = engine.generation
+        self.status = engine.status_text()
+        self.dirty = engine.take_dirty()
+
+    def region(self, r0, r1, c0, c1):
+        out = np.zeros((r1 - r0, c1 - c0), dtype=np.uint8)
+        self._engine._paint(self._root, self._origin[0], self._origin[1], out, r0, c0, r1, c1)
+        return out
+
+    def density(self, r0, r1, c0, c1, k):
+        out = np.zeros((-(-(r1 - r0) // k), -(-(c1 - c0) // k)), dtype=np.int64)
+        self._engine._density(self._root, self._origin[0], self._origin[1], out, r0, c0, k)
+        return out
+
+    def population(self):
+        return self._root.pop
+
+
+class HashLifeEngine(Engine):
+    # Simulates the unbounded plane; the rows x cols board is a window onto it
+    name = "HashLife"
+    bounded = False
+    MAX_NODES = 1 << 20
+
+    def __init__(self, rows, cols, wrap=False, max_nodes=None):
+        super().__init__(rows, cols, wrap)
+        self.max_nodes = max_nodes or self.MAX_NODES
+        self._table = {}
+        self._empty = [OFF]
+        self._level1 = {}
+        self._level2 = {}
+        self._step_table = life_table()
+        self._view = None
+        self.clear()
+
+    # --- Canonical quadtree ---
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self._table.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1, nw.pop + ne.pop + sw.pop + se.pop)
+            self._table[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def set_rule(self, rule):
+        if rule == self.rule:
+            return
+        super().set_rule(rule)
+        # Memoized futures belong to the old rule
+        self._step_table = life_table(rule)
+        for node in self._table.values():
+            node.results = None
+
+    def node_count(self):
+        return len(self._table)
+
+    def status_text(self):
+        return f"Nodos {len(self._table):,}/{self.max_nodes:,}"
+
+    def _leaf2(self, bits):
+        # Level-1 node from 4 bits (nw, ne, sw, se)
+        node = self._level1.get(bits)
+        if node is None:
+            leaf = [OFF, ON]
+            node = self.join(leaf[bits & 1], leaf[bits >> 1 & 1], leaf[bits >> 2 & 1], leaf[bits >> 3 & 1])
+            self._level1[bits] = node
+        return node
+
+    def _node4(self, key):
+        # Level-2 node from a 16-bit 4x4 key
+        node = self._level2.get(key)
+        if node is None:
+            quads = []
+            for r0, c0 in ((0, 0), (0, 2), (2, 0), (2, 2)):
+                bits = 0
+                for i, (r, c) in enumerate(((0, 0), (0, 1), (1, 0), (1, 1))):
+                    bits |= (key >> ((r0 + r) * 4 + c0 + c) & 1) << i
+                quads.append(self._leaf2(bits))
+            node = self.join(*quads)
+            self._level2[key] = node
+        return node
+
+    @staticmethod
+    def _key4(m):
+        key = 0
+        for q, (r0, c0) in ((m.nw, (0, 0)), (m.ne, (0, 2)), (m.sw, (2, 0)), (m.se, (2, 2))):
+            key |= q.nw.pop << (r0 * 4 + c0)
+            key |= q.ne.pop << (r0 * 4 + c0 + 1)
+            key |= q.sw.pop << ((r0 + 1) * 4 + c0)
+            key |= q.se.pop << ((r0 + 1) * 4 + c0 + 1)
+        return key
+
+    def centre(self, m):
+        return self.join(m.nw.se, m.ne.sw, m.sw.ne, m.se.nw)
+
+    def expand(self, m):
+        e = self.empty(m.level - 1)
+        return self.join(
+            self.join(e, e, e, m.nw),
+            self.join(e, e, m.ne, e),
+            self.join(e, m.sw, e, e),
+            self.join(m.se, e, e, e),
+        )
+
+    # --- Memoized macro-cell evolution ---
+    def successor(self, m, j):
+        # Centre of m (one level down) advanced by 2**j generations, j <= m.level - 2
+        if m.pop == 0:
+            return m.nw
+        if m.results is not None:
+            cached = m.results.get(j)
+            if cached is not None:
+                return cached
+        else:
+            m.results = {}
+
+        if m.level == 2:
+            result = self._leaf2(self._step_table[self._key4(m)])
+        else:
+            join = self.join
+            nw, ne, sw, se = m.nw, m.ne, m.sw, m.se
+            n00 = nw
+            n01 = join(nw.ne, ne.nw, nw.se, ne.sw)
+            n02 = ne
+            n10 = join(nw.sw, nw.se, sw.nw, sw.ne)
+            n11 = join(nw.se, ne.sw, sw.ne, se.nw)
+            n12 = join(ne.sw, ne.se, se.nw, se.ne)
+            n20 = sw
+            n21 = join(sw.ne, se.nw, sw.se, se.sw)
+            n22 = se
+            if j == m.level - 2:
+                # Two half-steps of 2**(j-1) each
+                half = j - 1
+                c = [self.successor(n, half) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+                inner = half
+            else:
+                # No time passes on the first pass, only re-centring
+                c = [self.centre(n) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+                inner = j
+            result = join(
+                self.successor(join(c[0], c[1], c[3], c[4]), inner),
+                self.successor(join(c[1], c[2], c[4], c[5]), inner),
+                self.successor(join(c[3], c[4], c[6], c[7]), inner),
+                self.successor(join(c[4], c[5], c[7], c[8]), inner),
+            )
+        m.results[j] = result
+        return result
+
+    def advance_pow2(self, k):
+        # Keep the pattern inside the inner half with room for one level of growth
+        root = self.root
+        while root.level < k + 2 or self.centre(root).pop != root.pop:
+            root = self._grow(root)
+        root = self._grow(root)
+        shift = 1 << (root.level - 2)
+        self.root = self.successor(root, k)
+        self.origin_r += shift
+        self.origin_c += shift
+        self.generation += 1 << k
+        self._view = None
+        self.mark_dirty()
+        if self.stats is not None:
+            # Births and deaths would take comparing the boards cell by cell
+            self.push_stats(self.root.pop, None, None, self.live_box(), None)
+        if len(self._table) > self.max_nodes:
+            self.collect()
+
+    def advance(self, n):
+        k = 0
+        while n:
+            if n & 1:
+                self.advance_pow2(k)
+            n >>= 1
+            k += 1
+
+    def step(self):
+        self.advance_pow2(0)
+
+    def _grow(self, root):
+        half = 1 << (root.level - 1)
+        self.origin_r -= half
+        self.origin_c -= half
+        return self.expand(root)
+
+    def collect(self):
+        # Keep nodes reachable from the root (and their memoized results if that fits)
+        for keep_results in (True, False):
+            marked = {}
+            stack = [self.root] + self._empty
+            while stack:
+                n = stack.pop()
+                if n.level == 0 or id(n) in marked:
+                    continue
+                marked[id(n)] = n
+                stack.extend((n.nw, n.ne, n.sw, n.se))
+                if keep_results and n.results:
+                    stack.extend(n.results.values())
+            if len(marked) <= self.max_nodes // 2:
+                break
+        if not keep_results:
+            for n in marked.values():
+                n.results = None
+        self._table = {(n.nw, n.ne, n.sw, n.se): n for n in marked.values()}
+        self._level1 = {}
+        self._level2 = {}
+
+    # --- Board window ---
+    def _board_level(self):
+        level = 3
+        while (1 << level) < max(self.rows, self.cols):
+            level += 1
+        return level
+
+    def clear(self):
+        self.root = self.empty(self._board_level())
+        self.origin_r = 0
+        self.origin_c = 0
+        self._view = None
+        self.mark_dirty()
+
+    def _block(self, level, rows, cols, memo):
+        # Node of `level` whose top-left rows x cols cells are alive: whole
+        # quadrants come from the memo, so only the edges are built
+        size = 1 << level
+        rows, cols = min(rows, size), min(cols, size)
+        if rows <= 0 or cols <= 0:
+            return self.empty(level)
+        if level == 0:
+            return ON
+        key = (level, rows, cols)
+        node = memo.get(key)
+        if node is None:
+            h = size // 2
+            node = self.join(
+                self._block(level - 1, rows, cols, memo), self._block(level - 1, rows, cols - h, memo),
+                self._block(level - 1, rows - h, cols, memo), self._block(level - 1, rows - h, cols - h, memo),
+            )
+            memo[key] = node
+        return node
+
+    def fill(self):
+        self.root = self._block(self._board_level(), self.rows, self.cols, {})
+        self.origin_r = 0
+        self.origin_c = 0
+        self._view = None
+        self.mark_dirty()
+
+    def resize(self, rows, cols, preserve=True):
+        # The plane is kept whole, as on Infinito; growing moves the origin so
+        # the content stays centred
+        sr = max(0, (rows - self.rows) // 2)
+        sc = max(0, (cols - self.cols) // 2)
+        self.rows, self.cols = rows, cols
+        if not preserve:
+            self.clear()
+            return
+        self.origin_r += sr
+        self.origin_c += sc
+        self._view = None
+        self.mark_dirty()
+
+    def load_array(self, cells):
+        self.rows, self.cols = cells.shape
+        level = self._board_level()
+        size = 1 << level
+        # 16-bit key of every 4x4 block, bit r * 4 + c for cell (r, c)
+        keys = np.zeros((size // 4, size // 4), dtype=np.uint16)
+        for r in range(4):
+            for c in range(4):
+                block = np.asarray(cells[r::4, c::4], dtype=np.uint16)
+                keys[:block.shape[0], :block.shape[1]] |= block << (r * 4 + c)
+
+        # Level-2 nodes from the distinct keys, then each level's distinct
+        # quadruples of child ids joined once up to the root. That can be
+        # millions of new nodes, none in a cycle: the collector's passes over
+        # them would only cost time
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            uniq, ids = np.unique(keys, return_inverse=True)
+            nodes = [self._node4(k) for k in uniq.tolist()]
+            ids = ids.reshape(keys.shape)
+            while ids.shape[0] > 1:
+                # Pairs of ids as one int64 each, then pairs of pairs: 1-D uniques sort far faster than rows
+                n = len(nodes)
+                tops, top = np.unique(ids[0::2, 0::2].astype(np.int64) * n + ids[0::2, 1::2], return_inverse=True)
+                bottoms, bottom = np.unique(ids[1::2, 0::2].astype(np.int64) * n + ids[1::2, 1::2], return_inverse=True)
+                uniq, parent = np.unique(top.astype(np.int64) * len(bottoms) + bottom, return_inverse=True)
+                nw, ne = np.divmod(tops[uniq // len(bottoms)], n)
+                sw, se = np.divmod(bottoms[uniq % len(bottoms)], n)
+                nodes = [
+                    self.join(nodes[a], nodes[b], nodes[c], nodes[d])
+                    for a, b, c, d in zip(nw.tolist(), ne.tolist(), sw.tolist(), se.tolist())
+                ]
+                ids = parent.reshape(ids.shape[0] // 2, ids.shape[1] // 2)
+        finally:
+            if collecting:
+                gc.enable()
+        self.root = nodes[int(ids[0, 0])]
+        self.origin_r = 0
+        self.origin_c = 0
+        self._view = None
+        self.mark_dirty()
+
+    def to_array(self):
+        return self.region(0, self.rows, 0, self.cols)
+
+    def _image(self, node):
+        if node.image is None:
+            size = 1 << node.level
+            img = np.zeros((size, size), dtype=np.uint8)
+            if node.level == 0:
+                img[0, 0] = node.pop
+            elif node.pop:
+                h = size // 2
+                img[:h, :h] = self._image(node.nw)
+                img[:h, h:] = self._image(node.ne)
+                img[h:, :h] = self._image(node.sw)
+                img[h:, h:] = self._image(node.se)
+            node.image = img
+        return node.image
+
+    def _paint(self, node, top, left, out, r0, c0, r1, c1):
+        size = 1 << node.level
+        if node.pop == 0 or top >= r1 or left >= c1 or top + size <= r0 or left + size <= c0:
+            return
+        if node.level <= IMAGE_LEVEL:
+            a0, b0 = max(top, r0), max(left, c0)
+            a1, b1 = min(top + size, r1), min(left + size, c1)
+            out[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = self._image(node)[a0 - top:a1 - top, b0 - left:b1 - left]
+            return
+        h = size // 2
+        self._paint(node.nw, top, left, out, r0, c0, r1, c1)
+        self._paint(node.ne, top, left + h, out, r0, c0, r1, c1)
+        self._paint(node.sw, top + h, left, out, r0, c0, r1, c1)
+        self._paint(node.se, top + h, left + h, out, r0, c0, r1, c1)
+
+    def _density(self, node, top, left, out, r0, c0, k):
+        # Live cells per k x k block from the nodes' populations; only nodes that
+        # straddle a block edge are split
+        size = 1 << node.level
+        h, w = out.shape
+        if node.pop == 0 or top >= r0 + h * k or left >= c0 + w * k or top + size <= r0 or left + size <= c0:
+            return
+        br, bc = (top - r0) // k, (left - c0) // k
+        if size <= k and br == (top + size - 1 - r0) // k and bc == (left + size - 1 - c0) // k:
+            out[br, bc] += node.pop
+            return
+        if node.level <= IMAGE_LEVEL:
+            rr, cc = np.nonzero(self._image(node))
+            rr += top - r0
+            cc += left - c0
+            inside = (rr >= 0) & (rr < h * k) & (cc >= 0) & (cc < w * k)
+            np.add.at(out, (rr[inside] // k, cc[inside] // k), 1)
+            return
+        half = size // 2
+        self._density(node.nw, top, left, out, r0, c0, k)
+        self._density(node.ne, top, left + half, out, r0, c0, k)
+        self._density(node.sw, top + half, left, out, r0, c0, k)
+        self._density(node.se, top + half, left + half, out, r0, c0, k)
+
+    def _live(self, node, top, left, rows, cols):
+        if node.pop == 0:
+            return
+        if node.level <= IMAGE_LEVEL:
+            r, c = np.nonzero(self._image(node))
+            rows.append(r + top)
+            cols.append(c + left)
+            return
+        h = 1 << (node.level - 1)
+        self._live(node.nw, top, left, rows, cols)
+        self._live(node.ne, top, left + h, rows, cols)
+        self._live(node.sw, top + h, left, rows, cols)
+        self._live(node.se, top + h, left + h, rows, cols)
+
+    def _bounds(self, node, top, left, box):
+        # Widens box [r0, r1, c0, c1] to the live cells under node, skipping
+        # nodes that lie wholly inside it already
+        size = 1 << node.level
+        if node.pop == 0 or (box[0] <= top and top + size <= box[1] and box[2] <= left and left + size <= box[3]):
+            return
+        if node.level <= IMAGE_LEVEL:
+            r, c = np.nonzero(self._image(node))
+            box[0] = min(box[0], top + int(r.min()))
+            box[1] = max(box[1], top + int(r.max()) + 1)
+            box[2] = min(box[2], left + int(c.min()))
+            box[3] = max(box[3], left + int(c.max()) + 1)
+            return
+        h = size // 2
+        self._bounds(node.nw, top, left, box)
+        self._bounds(node.ne, top, left + h, box)
+        self._bounds(node.sw, top + h, left, box)
+        self._bounds(node.se, top + h, left + h, box)
+
+    def live_box(self):
+        # Box around every live cell of the plane, None when it's empty
+        if self.root.pop == 0:
+            return None
+        box = [float("inf"), float("-inf"), float("inf"), float("-inf")]
+        self._bounds(self.root, self.origin_r, self.origin_c, box)
+        return tuple(box)
+
+    def live_cells(self):
+        # Every live cell of the plane, not just the board window
+        rows, cols = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        self._live(self.root, self.origin_r, self.origin_c, rows, cols)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def region(self, r0, r1, c0, c1):
+        key = (self.root, r0, r1, c0, c1)
+        if self._view is not None and self._view[0] == key:
+            return self._view[1]
+        out = np.zeros((r1 - r0, c1 - c0), dtype=np.uint8)
+        self._paint(self.root, self.origin_r, self.origin_c, out, r0, c0, r1, c1)
+        self._view = (key, out)
+        return out
+
+    def get(self, r, c):
+        node = self.root
+        r -= self.origin_r
+        c -= self.origin_c
+        size = 1 << node.level
+        if not (0 <= r < size and 0 <= c < size):
+            return 0
+        while node.level > 0 and node.pop:
+            size >>= 1
+            if r < size:
+                node = node.nw if c < size else node.ne
+            else:
+                node = node.sw if c < size else node.se
+            r %= size
+            c %= size
+        return node.pop
+
+    def _from_points(self, rr, cc, level):
+        # Node of `level` whose live cells are exactly these (relative to its corner):
+        # 4x4 keys per occupied block, then one join per occupied node and level
+        order = np.lexsort((cc >> 2, rr >> 2))
+        br, bc = rr[order] >> 2, cc[order] >> 2
+        bits = np.left_shift(1, (rr[order] & 3) * 4 + (cc[order] & 3))
+        start = np.flatnonzero(np.r_[True, (br[1:] != br[:-1]) | (bc[1:] != bc[:-1])])
+        keys = np.bitwise_or.reduceat(bits, start)
+        nodes = {(r, c): self._node4(k) for r, c, k in zip(br[start].tolist(), bc[start].tolist(), keys.tolist())}
+        for lvl in range(2, level):
+            e = self.empty(lvl)
+            parents = {(r >> 1, c >> 1) for r, c in nodes}
+            nodes = {
+                (r, c): self.join(
+                    nodes.get((2 * r, 2 * c), e), nodes.get((2 * r, 2 * c + 1), e),
+                    nodes.get((2 * r + 1, 2 * c), e), nodes.get((2 * r + 1, 2 * c + 1), e),
+                )
+                for r, c in parents
+            }
+        return nodes[(0, 0)]
+
+    def _union(self, a, b):
+        if b.pop == 0 or a is b:
+            return a
+        if a.pop == 0:
+            return b
+        if a.level == 0:
+            return ON
+        return self.join(self._union(a.nw, b.nw), self._union(a.ne, b.ne), self._union(a.sw, b.sw), self._union(a.se, b.se))
+
+    def _erase(self, a, b):
+        # a without the live cells of b
+        if a.pop == 0 or b.pop == 0:
+            return a
+        if a.level == 0:
+            return OFF
+        return self.join(self._erase(a.nw, b.nw), self._erase(a.ne, b.ne), self._erase(a.sw, b.sw), self._erase(a.se, b.se))
+
+    def set_many(self, rr, cc, value):
+        # Bulk edit: the cells become one quadtree that's merged into the root
+        rr = np.asarray(rr, dtype=np.int64)
+        cc = np.asarray(cc, dtype=np.int64)
+        if not rr.size:
+            return
+        r0, r1, c0, c1 = int(rr.min()), int(rr.max()), int(cc.min()), int(cc.max())
+        while True:
+            size = 1 << self.root.level
+            if self.origin_r <= r0 and r1 < self.origin_r + size and self.origin_c <= c0 and c1 < self.origin_c + size:
+                break
+            self.root = self._grow(self.root)
+        cells = self._from_points(rr - self.origin_r, cc - self.origin_c, self.root.level)
+        self.root = self._union(self.root, cells) if value else self._erase(self.root, cells)
+        self._view = None
+        self.touch(rr, cc)
+
+    def population(self):
+        return self.root.pop
+
+    def snapshot(self):
+        return HashLifeSnapshot(self)
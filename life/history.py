@@ -0,0 +1,163 @@
+import bisect
+
+import numpy as np
+
+# Default memory cap of a History
+HISTORY_BYTES = 64 << 20
+# Generations between two checkpoints while memory allows
+CHECKPOINT_EVERY = 32
+
+
+class _Checkpoint:
+    # One generation in full: bit-packed rows on bounded engines, live cell
+    # coordinates on unbounded ones (their board is only a window). deltas hold
+    # the generations right after it as (byte index, XOR value) pairs against
+    # the previous one, while they're contiguous
+    __slots__ = ("generation", "bounded", "state", "rows", "cols", "rule", "wrap", "deltas", "nbytes")
+
+    def __init__(self, engine, packed):
+        self.generation = engine.generation
+        self.bounded = engine.bounded
+        self.state = packed if engine.bounded else np.column_stack(engine.live_cells())
+        self.rows = engine.rows
+        self.cols = engine.cols
+        self.rule = engine.rule
+        self.wrap = engine.wrap
+        self.deltas = []
+        self.nbytes = self.state.nbytes
+
+    def load(self, engine, deltas):
+        engine.set_rule(self.rule)
+        engine.wrap = self.wrap
+        if self.bounded:
+            packed = self.state.copy()
+            flat = packed.reshape(-1)
+            for index, values in self.deltas[:deltas]:
+                flat[index] ^= values
+            engine.load_packed(packed, self.cols)
+        elif engine.bounded:
+            engine.resize(self.rows, self.cols, preserve=False)
+            engine.stamp(self.state, 0, 0)
+        else:
+            engine.rows, engine.cols = self.rows, self.cols
+            engine.clear()
+            engine.set_many(self.state[:, 0], self.state[:, 1], 1)
+        engine.generation = self.generation + deltas
+
+
+class History:
+    # Past generations of the timeline being played, within `cap` bytes. A
+    # checkpoint is kept every `stride` generations (or sooner, when a delta
+    # would be bigger) and, on bounded engines, sparse XOR deltas for the
+    # generations in between, so any of them comes back without stepping. Over the cap, deltas go first (oldest first), then
+    # every other checkpoint is dropped, doubling the stride; restore() steps
+    # from the nearest checkpoint left to fill the gap.
+    #
+    # Edits rewrite the timeline: everything from the edited generation on is
+    # forgotten. A restore is the one edit that keeps it.
+    def __init__(self, cap=HISTORY_BYTES, stride=CHECKPOINT_EVERY):
+        self.cap = cap
+        self.stride = stride
+        self.clear()
+
+    def clear(self):
+        self._points = {}
+        self._keys = []
+        self._packed = None
+        self._restored = None
+        self.last = None
+        self.nbytes = 0
+
+    @property
+    def first(self):
+        return self._keys[0] if self._keys else None
+
+    def summary(self):
+        # (first, last, bytes, checkpoints), read together for the window
+        keys = self._keys[:]
+        return (keys[0] if keys else None), self.last, self.nbytes, len(keys)
+
+    def record(self, engine, edited=False):
+        # After a step, or after an edit batch with edited=True
+        g = engine.generation
+        packed = None
+        if engine.bounded:
+            packed = np.ascontiguousarray(engine.packed())
+            # A view of the engine's own buffer changes with the next edit
+            if packed.base is not None:
+                packed = packed.copy()
+        previous, self._packed = self._packed, packed
+        if edited:
+            restored, self._restored = self._restored, None
+            if restored == (g, engine.rule, engine.board_hash()):
+                return
+            self._truncate(g)
+        elif self.last is not None and g <= self.last:
+            return  # replaying generations already kept
+        keys = self._keys
+        last = self._points[keys[-1]] if keys else None
+        checkpoint = last is None or g != self.last + 1 or g - last.generation >= self.stride or last.bounded != engine.bounded
+        if not checkpoint and packed is not None and len(last.deltas) == self.last - last.generation:
+            if previous is None or previous.shape != packed.shape:
+                checkpoint = True
+            else:
+                diff = np.bitwise_xor(previous, packed).reshape(-1)
+                # A delta costs 5 bytes per changed byte: past a fifth of them a checkpoint is smaller
+                if np.count_nonzero(diff) * 5 >= diff.size:
+                    checkpoint = True
+                else:
+                    index = np.flatnonzero(diff).astype(np.uint32 if diff.size < 1 << 32 else np.int64)
+                    values = diff[index]
+                    last.deltas.append((index, values))
+                    last.nbytes += index.nbytes + values.nbytes
+                    self.nbytes += index.nbytes + values.nbytes
+        if checkpoint:
+            point = _Checkpoint(engine, packed)
+            self._points[g] = point
+            keys.append(g)
+            self.nbytes += point.nbytes
+        self.last = g
+        self._evict()
+
+    def _truncate(self, g):
+        # Forget generation g and later
+        while self._keys and self._keys[-1] >= g:
+            self.nbytes -= self._points.pop(self._keys.pop()).nbytes
+        if self._keys:
+            point = self._points[self._keys[-1]]
+            keep = g - 1 - point.generation
+            for index, values in point.deltas[keep:]:
+                point.nbytes -= index.nbytes + values.nbytes
+                self.nbytes -= index.nbytes + values.nbytes
+            del point.deltas[keep:]
+        self.last = g - 1 if self._keys else None
+
+    def _evict(self):
+        keys = self._keys
+        # Deltas of the oldest checkpoints first, the newest run's last
+        for g in keys:
+            if self.nbytes <= self.cap:
+                return
+            point = self._points[g]
+            for index, values in point.deltas:
+                self.nbytes -= index.nbytes + values.nbytes
+            point.nbytes = point.state.nbytes
+            point.deltas = []
+        # Then every other checkpoint, oldest first, keeping the newest
+        while self.nbytes > self.cap and len(keys) > 1:
+            for g in keys[1:-1:2] if len(keys) > 2 else keys[:1]:
+                self.nbytes -= self._points.pop(g).nbytes
+            self._keys = keys = [g for g in keys if g in self._points]
+
+    def restore(self, engine, generation):
+        # Puts the engine back at `generation` (clamped to what's kept); returns it
+        keys = self._keys
+        if not keys:
+            return None
+        generation = max(keys[0], min(generation, self.last))
+        point = self._points[keys[bisect.bisect_right(keys, generation) - 1]]
+        deltas = min(len(point.deltas), generation - point.generation)
+        point.load(engine, deltas)
+        engine.advance(generation - engine.generation)
+        self._restored = (engine.generation, engine.rule, engine.board_hash())
+        return engine.generation
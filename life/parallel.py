@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+
+from .engines import NumpyEngine, resized_copy, step_rows, tile_area
+
+# Boards with fewer rows per worker than this are stepped in-process
+MIN_STRIP_ROWS = 64
+
+_attached = {}
+
+
+def _shared_memory():
+    # multiprocessing costs ~20 ms to import; only pay it once this engine is used
+    from multiprocessing import shared_memory
+    return shared_memory
+
+
+def _attach(name, shape):
+    shm = _attached.get(name)
+    if shm is None:
+        shared_memory = _shared_memory()
+        # Spawned workers share the parent's resource tracker, which unlinks the block
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+
+def _step_strip(task):
+    src, dst, shape, a, b, wrap, rule = task
+    # Drop mappings of boards that were reallocated since the last task
+    for name in list(_attached):
+        if name not in (src, dst):
+            _attached.pop(name).close()
+    cur = _attach(src, shape)
+    out = _attach(dst, shape)
+    # Halo exchange: the neighbouring strips' edge rows are read straight from shared memory
+    out[a:b] = step_rows(cur, a, b, wrap, rule)
+    return b - a
+
+
+class ParallelEngine(NumpyEngine):
+    # Row strips stepped concurrently by a process pool over shared memory
+    name = "Paralelo"
+
+    def __init__(self, rows, cols, wrap=False, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+        self._shm = []
+        super().__init__(rows, cols, wrap)
+
+    def set_workers(self, workers):
+        if workers != self.workers:
+            self._stop_pool()
+            self.workers = workers
+
+    def status_text(self):
+        return f"Procesos {self.workers}"
+
+    def load_array(self, cells):
+        rows, cols = cells.shape
+        self._free()
+        shared_memory = _shared_memory()
+        self._shm = [shared_memory.SharedMemory(create=True, size=max(1, rows * cols)) for _ in range(2)]
+        self.rows, self.cols = rows, cols
+        self.cells = self._view(0)
+        self.cells[:] = cells
+        self._front = 0
+        self.mark_dirty()
+
+    def resize(self, rows, cols, preserve=True):
+        # Copy out before load_array releases the current shared block
+        if preserve:
+            cells = resized_copy(self.cells, rows, cols)
+        else:
+            cells = np.zeros((rows, cols), dtype=np.uint8)
+        self.load_array(cells)
+
+    def _view(self, i):
+        return np.ndarray((self.rows, self.cols), dtype=np.uint8, buffer=self._shm[i].buf)
+
+    def _strips(self):
+        n = min(self.workers, max(1, self.rows // MIN_STRIP_ROWS))
+        bounds = np.linspace(0, self.rows, n + 1).astype(int)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def step(self):
+        before = None if self.stats is None else self.population_before_step()
+        strips = self._strips()
+        back = 1 - self._front
+        if len(strips) == 1:
+            self._view(back)[:] = step_rows(self.cells, 0, self.rows, self.wrap, self.rule)
+        else:
+            if self._pool is None:
+                import multiprocessing
+                self._pool = multiprocessing.get_context("spawn").Pool(self.workers)
+            src, dst = self._shm[self._front].name, self._shm[back].name
+            tasks = [(src, dst, (self.rows, self.cols), int(a), int(b), self.wrap, self.rule) for a, b in strips]
+            self._pool.map(_step_strip, tasks)
+        old = self.cells
+        self._front = back
+        self.cells = self._view(back)
+        diff = self.cells != old
+        tiles = self.mark_step(diff)
+        self.generation += 1
+        if before is not None:
+            self.push_cell_stats(before, self.cells, diff, tile_area(tiles, self.rows, self.cols))
+
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def _free(self):
+        self.cells = None
+        for shm in self._shm:
+            shm.close()
+            shm.unlink()
+        self._shm = []
+
+    def close(self):
+        self._stop_pool()
+        self._free()
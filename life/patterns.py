@@ -0,0 +1,205 @@
+import os
+
+import numpy as np
+
+from .formats import cropped, read_pattern
+
+# Pattern files the library picks up from its directory
+PATTERN_EXTENSIONS = (".rle", ".cells", ".txt")
+# Longest side of a preview thumbnail, in pixels
+THUMB_SIZE = 64
+
+PATTERNS = {
+    "Glider": [
+        ".#.",
+        "..#",
+        "###",
+    ],
+    "Pulsar": [
+        "..###...###..",
+        "............",
+        "#....#.#....#",
+        "#....#.#....#",
+        "#....#.#....#",
+        "..###...###..",
+        "............",
+        "..###...###..",
+        "#....#.#....#",
+        "#....#.#....#",
+        "#....#.#....#",
+        "............",
+        "..###...###..",
+    ],
+    "Spaceship (LWSS)": [
+        ".#..#",
+        "#....",
+        "#...#",
+        "####.",
+    ],
+    "Blinker": [
+        "###",
+    ],
+    "Toad": [
+        ".###",
+        "###.",
+    ],
+    "Beacon": [
+        "##..",
+        "##..",
+        "..##",
+        "..##",
+    ],
+    "Block": [
+        "##",
+        "##",
+    ],
+    "Boat": [
+        "#..",
+        ".##",
+        ".#.",
+    ],
+    "Loaf": [
+        ".##.",
+        "#..#",
+        ".#.#",
+        "..#.",
+    ],
+    "Tub": [
+        ".#.",
+        "#.#",
+        ".#.",
+    ],
+    "Pentomino R": [
+        "..#",
+        ".##",
+        ".#.",
+    ],
+}
+
+
+_offsets = {}
+
+
+def pattern_offsets(strings):
+    # (N, 2) read-only array of the "#" cells, parsed once per pattern
+    key = tuple(strings)
+    offs = _offsets.get(key)
+    if offs is None:
+        width = max((len(row) for row in strings), default=0)
+        raw = "".join(row.ljust(width) for row in strings).encode("ascii", "replace")
+        offs = np.argwhere(np.frombuffer(raw, dtype=np.uint8).reshape(len(strings), width) == ord("#"))
+        offs.flags.writeable = False
+        _offsets[key] = offs
+    return offs
+
+
+def centered_origin(strings, rows, cols):
+    # Top-left cell that centres the pattern on a rows x cols board
+    return rows // 2 - len(strings) // 2, cols // 2 - len(strings[0]) // 2
+
+
+class Pattern:
+    # Live cells as read-only (N, 2) offsets from the pattern's top-left corner
+    def __init__(self, name, offsets, rule=None, comments=(), path=None):
+        offsets, (self.height, self.width) = cropped(offsets)
+        offsets.flags.writeable = False
+        self.name = name
+        self.offsets = offsets
+        self.rule = rule
+        self.comments = list(comments)
+        self.path = path
+
+    @classmethod
+    def from_strings(cls, name, strings):
+        return cls(name, pattern_offsets(strings))
+
+    @classmethod
+    def load(cls, path, name=None):
+        offsets, info = read_pattern(path)
+        name = name or info["name"] or os.path.splitext(os.path.basename(path))[0]
+        return cls(name, offsets, info["rule"], info["comments"], path)
+
+    def population(self):
+        return len(self.offsets)
+
+    def origin(self, rows, cols):
+        # Top-left cell that centres the pattern on a rows x cols board
+        return rows // 2 - self.height // 2, cols // 2 - self.width // 2
+
+    def thumbnail(self, size=THUMB_SIZE):
+        # uint8 levels, at most size x size: 0 empty, 64..255 by how much of each block lives
+        h, w = max(1, self.height), max(1, self.width)
+        k = max(1, -(-max(h, w) // size))
+        th, tw = -(-h // k), -(-w // k)
+        r, c = self.offsets[:, 0] // k, self.offsets[:, 1] // k
+        counts = np.bincount(r * tw + c, minlength=th * tw).reshape(th, tw)
+        return np.where(counts > 0, 64 + counts * 191 // (k * k), 0).astype(np.uint8)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class PatternLibrary:
+    # Built-in patterns plus the pattern files of a directory. The first scan
+    # only indexes file names; a file is parsed the first time it's used, and
+    # its Pattern and thumbnails are kept until the file changes on disk
+    def __init__(self, directory=None, builtins=PATTERNS):
+        self.directory = directory
+        self._builtins = builtins
+        self._index = None
+        self._patterns = {}
+        self._thumbs = {}
+
+    def scan(self):
+        index = {name: None for name in self._builtins}
+        if self.directory and os.path.isdir(self.directory):
+            for entry in sorted(os.scandir(self.directory), key=lambda e: e.name.lower()):
+                stem, ext = os.path.splitext(entry.name)
+                if ext.lower() in PATTERN_EXTENSIONS and entry.is_file():
+                    index[stem] = entry.path
+        self._index = index
+        return list(index)
+
+    def names(self):
+        if self._index is None:
+            self.scan()
+        return list(self._index)
+
+    def add_file(self, path):
+        # Imports a file from anywhere; returns its name in the library
+        if self._index is None:
+            self.scan()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while self._index.get(name, path) != path:
+            n += 1
+            name = f"{stem} ({n})"
+        self._index[name] = path
+        self.get(name)
+        return name
+
+    def get(self, name):
+        if self._index is None:
+            self.scan()
+        path = self._index[name]
+        stamp = None if path is None else _stamp(path)
+        cached = self._patterns.get(name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        if path is None:
+            pattern = Pattern.from_strings(name, self._builtins[name])
+        else:
+            pattern = Pattern.load(path, name)
+        self._patterns[name] = (stamp, pattern)
+        return pattern
+
+    def thumbnail(self, name, size=THUMB_SIZE):
+        pattern = self.get(name)
+        cached = self._thumbs.get((name, size))
+        if cached is not None and cached[0] is pattern:
+            return cached[1]
+        levels = pattern.thumbnail(size)
+        self._thumbs[(name, size)] = (pattern, levels)
+        return levels
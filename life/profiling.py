@@ -0,0 +1,157 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+from collections import deque
+
+# Samples kept per phase for the live figures
+SAMPLES = 512
+# A trace stops growing past this many events
+MAX_TRACE_EVENTS = 1_000_000
+
+
+class _Capture:
+    def __init__(self, ticks, path):
+        self.ticks = ticks
+        self.path = path
+        self.profiles = {}
+        self.active = set()
+        self.done = False
+
+
+class Profiler:
+    # Timing hooks shared by the simulation thread and the GUI. Producers hold a
+    # reference only while instrumentation is on and check it for None, so the
+    # cost when off is one attribute test per step or paint.
+    #
+    # record() keeps (end, duration) per phase for the live figures and, while a
+    # trace is open, every event. capture() profiles the next N ticks with
+    # cProfile on every thread that brackets its work with enter()/leave().
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.phases = {}
+        self.trace = None
+        self._lock = threading.Lock()
+        self._capture = None
+        self._written = []
+
+    def record(self, phase, start, end):
+        buf = self.phases.get(phase)
+        if buf is None:
+            buf = self.phases.setdefault(phase, deque(maxlen=self.samples))
+        buf.append((end, end - start))
+        trace = self.trace
+        if trace is not None and len(trace) < MAX_TRACE_EVENTS:
+            trace.append((phase, threading.current_thread().name, start, end))
+
+    def rate(self, phase, window=1.0):
+        # Events per second over the last `window` seconds
+        buf = self.phases.get(phase)
+        if not buf:
+            return 0.0
+        since = time.perf_counter() - window
+        return sum(1 for end, _ in list(buf) if end >= since) / window
+
+    def mean_ms(self, phase, window=1.0):
+        buf = self.phases.get(phase)
+        if not buf:
+            return 0.0
+        since = time.perf_counter() - window
+        recent = [d for end, d in list(buf) if end >= since] or [buf[-1][1]]
+        return sum(recent) / len(recent) * 1000
+
+    def busy(self, phases, window=1.0):
+        # Fraction of the last `window` seconds spent in the given phases
+        since = time.perf_counter() - window
+        total = 0.0
+        for phase in phases:
+            total += sum(d for end, d in list(self.phases.get(phase, ())) if end >= since)
+        return total / window
+
+    # --- Timing trace ---
+    def start_trace(self):
+        self.trace = []
+
+    def stop_trace(self, path):
+        # Chrome trace format (chrome://tracing, Perfetto): one complete event per timed phase
+        trace, self.trace = self.trace or [], None
+        threads = {}
+        events = []
+        for phase, thread, start, end in trace:
+            tid = threads.setdefault(thread, len(threads))
+            events.append({"name": phase, "ph": "X", "pid": 0, "tid": tid, "ts": start * 1e6, "dur": (end - start) * 1e6})
+        for thread, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": thread}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(trace)
+
+    # --- cProfile capture ---
+    def capture(self, ticks, path):
+        with self._lock:
+            self._capture = _Capture(ticks, path)
+
+    def capturing(self):
+        return self._capture is not None
+
+    def enter(self):
+        cap = self._capture
+        if cap is None:
+            return None
+        ident = threading.get_ident()
+        with self._lock:
+            if cap.done:
+                return None
+            prof = cap.profiles.get(ident)
+            if prof is None:
+                prof = cap.profiles[ident] = cProfile.Profile()
+            cap.active.add(ident)
+        try:
+            prof.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process, and that one sees every thread
+            with self._lock:
+                cap.active.discard(ident)
+            return None
+        return prof
+
+    def leave(self, prof):
+        if prof is None:
+            return
+        prof.disable()
+        with self._lock:
+            cap = self._capture
+            if cap is not None:
+                cap.active.discard(threading.get_ident())
+                self._finish(cap)
+
+    def tick(self):
+        # One tick of the driving loop (the GUI's frame timer)
+        cap = self._capture
+        if cap is None:
+            return
+        with self._lock:
+            cap.ticks -= 1
+            if cap.ticks <= 0:
+                cap.done = True
+            self._finish(cap)
+
+    def take_written(self):
+        # Capture files finished since the last call
+        with self._lock:
+            written, self._written = self._written, []
+        return written
+
+    def _finish(self, cap):
+        # Dump once every thread has left its profiled section
+        if not cap.done or cap.active or self._capture is not cap:
+            return
+        self._capture = None
+        profiles = list(cap.profiles.values())
+        if profiles:
+            stats = pstats.Stats(profiles[0])
+            for prof in profiles[1:]:
+                stats.add(prof)
+            stats.dump_stats(cap.path)
+            self._written.append(cap.path)
@@ -0,0 +1,19 @@
+from .bitpack import BitEngine
+from .engines import NumpyEngine
+from .hashlife import HashLifeEngine
+from .parallel import ParallelEngine
+from .sparse import SparseEngine
+from .tiled import TiledEngine
+
+ENGINES = {
+    NumpyEngine.name: NumpyEngine,
+    BitEngine.name: BitEngine,
+    HashLifeEngine.name: HashLifeEngine,
+    TiledEngine.name: TiledEngine,
+    ParallelEngine.name: ParallelEngine,
+    SparseEngine.name: SparseEngine,
+}
+
+
+def create_engine(name, rows, cols, wrap=False):
+    return ENGINES[name](rows, cols, wrap=wrap)
@@ -0,0 +1,119 @@
+import re
+
+import numpy as np
+
+# Presets offered by the window; any B/S rulestring works too
+RULES = {
+    "Conway": "B3/S23",
+    "HighLife": "B36/S23",
+    "Seeds": "B2/S",
+    "Day & Night": "B3678/S34678",
+    "Life without Death": "B3/S012345678",
+    "Diamoeba": "B35678/S5678",
+    "2x2": "B36/S125",
+    "Morley": "B368/S245",
+    "Replicator": "B1357/S1357",
+}
+
+_BS = re.compile(r"B([0-8]*)/?S([0-8]*)", re.IGNORECASE)
+# Older S/B notation: "23/3" is Conway
+_SB = re.compile(r"([0-8]*)/([0-8]*)")
+
+
+def _runs(counts):
+    # Sorted counts -> (lo, hi) runs of consecutive values
+    runs = []
+    for k in sorted(counts):
+        if runs and runs[-1][1] == k - 1:
+            runs[-1][1] = k
+        else:
+            runs.append([k, k])
+    return [tuple(run) for run in runs]
+
+
+def _match(n, lo, hi):
+    if lo == hi:
+        return n == lo
+    if lo == 0:
+        return n <= hi
+    if hi == 8:
+        return n >= lo
+    m = n >= lo
+    m &= n <= hi
+    return m
+
+
+class Rule:
+    # Life-like rule: a dead cell with a neighbour count in `birth` is born, a
+    # live one with a count in `survive` lives on. Compiled once into
+    #   table   18-entry lookup indexed by count + 9 * state (HashLife builds its
+    #           4x4 -> 2x2 table from it)
+    #   either  counts that give a live cell whatever the state, then born and
+    #   born/   survive for the rest, as runs of consecutive counts: array kernels
+    #   survive test one compare (or two) per run, so any rule is branch-free
+    #           and Conway costs what the hard-coded kernel did
+    def __init__(self, birth, survive):
+        self.birth = frozenset(birth)
+        self.survive = frozenset(survive)
+        self.rulestring = "B" + "".join(map(str, sorted(self.birth))) + "/S" + "".join(map(str, sorted(self.survive)))
+        self.table = np.zeros(18, dtype=np.uint8)
+        self.table[list(self.birth)] = 1
+        self.table[[9 + k for k in self.survive]] = 1
+        self.either = _runs(self.birth & self.survive)
+        self.born = _runs(self.birth - self.survive)
+        self.survives = _runs(self.survive - self.birth)
+
+    @property
+    def b0(self):
+        # Empty space comes alive: needs a bounded board
+        return 0 in self.birth
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and (self.birth, self.survive) == (other.birth, other.survive)
+
+    def __hash__(self):
+        return hash((self.birth, self.survive))
+
+    def __repr__(self):
+        return f"Rule({self.rulestring!r})"
+
+    def __str__(self):
+        return self.rulestring
+
+    def apply(self, n, alive):
+        # Next state from neighbour counts and current cells (uint8 0/1)
+        out = None
+        for runs, state in ((self.either, None), (self.born, 0), (self.survives, 1)):
+            if not runs:
+                continue
+            if runs == [(0, 8)]:
+                m = np.ones(n.shape, dtype=bool)
+            else:
+                m = _match(n, *runs[0])
+                for lo, hi in runs[1:]:
+                    m |= _match(n, lo, hi)
+            if state is not None:
+                m &= alive == state
+            if out is None:
+                out = m
+            else:
+                out |= m
+        if out is None:
+            out = np.zeros(n.shape, dtype=bool)
+        return out.view(np.uint8)
+
+
+def parse_rule(text):
+    text = text.strip().replace(" ", "")
+    m = _BS.fullmatch(text)
+    if m:
+        birth, survive = m.groups()
+    else:
+        m = _SB.fullmatch(text)
+        if not m:
+            raise ValueError(f"regla no válida: {text!r} (se espera B3/S23)")
+        survive, birth = m.groups()
+    return Rule((int(k) for k in birth), (int(k) for k in survive))
+
+
+CONWAY = parse_rule(RULES["Conway"])
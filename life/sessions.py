@@ -0,0 +1,73 @@
+import os
+import threading
+from collections import deque
+
+
+class SessionPool:
+    # Threads shared by any number of Simulations, each created with
+    # pool=this one: a thread takes the first simulation in line with work due
+    # (edits, generations, a frame owed), runs one batch of it (a frame's worth
+    # of steps at most) and sends it to the back of the line, so boards with
+    # work take turns however fast their engines are. Each keeps its own speed,
+    # turbo and edits; one that is paused or not yet due costs nothing.
+    # A simulation is never run by two threads at once
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._cond = threading.Condition()
+        self._sims = deque()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"life-pool-{i}", daemon=True) for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def __len__(self):
+        return len(self._sims)
+
+    def add(self, sim):
+        with self._cond:
+            self._sims.append(sim)
+            self._cond.notify_all()
+
+    def discard(self, sim):
+        # Simulation.close() calls this once the simulation is idle
+        with self._cond:
+            if sim in self._sims:
+                self._sims.remove(sim)
+
+    def close(self):
+        # Closes the simulations still here, then stops the threads
+        for sim in list(self._sims):
+            sim.close()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+    def _next(self):
+        for i, sim in enumerate(self._sims):
+            if not sim._busy and not sim._closed and sim._has_work():
+                self._sims.rotate(-i - 1)
+                return sim
+        return None
+
+    def _timeout(self):
+        # Until the earliest simulation falls due, None if none is waiting on the clock
+        waits = [sim._timeout() for sim in self._sims if not sim._busy]
+        waits = [w for w in waits if w is not None]
+        return min(waits) if waits else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    sim = self._next()
+                    if sim is not None:
+                        break
+                    self._cond.wait(self._timeout())
+                batch = sim._take()
+            sim._work(*batch)
@@ -0,0 +1,378 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+from .cycles import CycleDetector, skip_cycle
+from .engines import Engine, merge_dirty
+
+# Longest run of generations between two published frames at normal speed (one 60 Hz frame)
+FRAME_BUDGET = 1 / 60
+# Frames published per second in turbo mode
+TURBO_FPS = 15
+
+
+class Simulation:
+    # Steps an engine on a background thread and publishes immutable snapshots
+    # into a bounded queue; the consumer only ever takes the newest one.
+    #
+    # Edits are callables applied to the engine between generations, in
+    # submission order, on top of the newest generation computed so far. An edit
+    # may return a new Engine to replace the current one. Frames queued before
+    # an edit are dropped so the next frame seen already contains it. Dropped
+    # frames hand their change sets on to the frame that replaces them.
+    #
+    # Generations and frames run at independent rates: every generation due by
+    # `delay` is stepped, up to FRAME_BUDGET of work, and only the last one is
+    # published. In turbo mode the engine runs flat out and a frame goes out
+    # TURBO_FPS times a second. Frames carry the generations they skipped in
+    # their generation numbers; engine change sets accumulate across them.
+    #
+    # cycles, when set, hashes every generation to catch the board repeating
+    # itself. cycle_action says what happens then: "report" keeps stepping,
+    # "pause" stops, "skip" keeps the clock running but only steps the engine
+    # through the generation count modulo the period. Edits start a fresh watch.
+    #
+    # profiler, when set, times each step, edit batch and snapshot.
+    #
+    # recorder, when set, appends every generation stepped (and the board after
+    # each edit batch) to a recording; set_recorder swaps it between generations.
+    #
+    # history, when set, keeps past generations in memory the same way; seek()
+    # goes back (or forward again) to any of them.
+    #
+    # stats, when set, is the StatsRing the engine pushes each generation's
+    # figures into as it steps; it follows the simulation across engine changes.
+    #
+    # pool, when given, is a SessionPool whose threads run this simulation in
+    # turns with the others it hosts, instead of a thread of its own.
+    #
+    # watched=False (set_watched) is for nobody looking: the simulation keeps
+    # its pace without taking snapshots or waiting for frames to be consumed.
+    def __init__(self, engine, depth=3, delay=0.1, pool=None):
+        self.engine = engine
+        self.profiler = None
+        self.cycles = None
+        self.recorder = None
+        self.history = None
+        self.stats = None
+        self.cycle_action = "report"
+        self.depth = depth
+        self.delay = delay
+        self.turbo = False
+        self.turbo_fps = TURBO_FPS
+        self.running = False
+        self.watched = True
+        self.pool = pool
+        self._frames = deque([engine.snapshot()])
+        self._edits = deque()
+        self._closed = False
+        self._busy = False
+        # Edits submitted and edits applied so far, for wait_idle
+        self._submitted = 0
+        self._applied = 0
+        self._refresh = False
+        self._due = time.perf_counter()
+        self._next_publish = self._due
+        # Running mean of one engine step, to keep turbo's pace while skipping a cycle
+        self._step_seconds = 1e-3
+        if pool is None:
+            self._cond = threading.Condition()
+            self._thread = threading.Thread(target=self._run, name="life-simulation", daemon=True)
+            self._thread.start()
+        else:
+            # The pool's lock guards every simulation it hosts, so any change wakes its threads
+            self._cond = pool._cond
+            self._thread = None
+            pool.add(self)
+
+    def submit(self, edit):
+        with self._cond:
+            self._edits.append(edit)
+            self._submitted += 1
+            self._cond.notify_all()
+
+    def play(self):
+        with self._cond:
+            self.running = True
+            self._due = time.perf_counter()
+            self._next_publish = self._due + 1 / self.turbo_fps
+            self._cond.notify_all()
+
+    def set_turbo(self, turbo):
+        with self._cond:
+            self.turbo = turbo
+            self._due = time.perf_counter()
+            self._next_publish = self._due + 1 / self.turbo_fps
+            self._cond.notify_all()
+
+    def set_cycle_action(self, action):
+        # None stops watching for cycles; otherwise "report", "pause" or "skip"
+        with self._cond:
+            if action is None:
+                self.cycles = None
+            else:
+                self.cycle_action = action
+                if self.cycles is None:
+                    self.cycles = CycleDetector()
+            self._cond.notify_all()
+
+    def set_recorder(self, recorder):
+        # None stops recording; the previous recorder is closed
+        def swap(engine):
+            if self.recorder is not None:
+                self.recorder.close()
+            self.recorder = recorder
+
+        self.submit(swap)
+
+    def set_history(self, history):
+        # None stops keeping past generations
+        def swap(engine):
+            self.history = history
+
+        self.submit(swap)
+
+    def set_stats(self, stats):
+        # None stops collecting per-generation figures
+        def swap(engine):
+            self.stats = stats
+
+        self.submit(swap)
+
+    def seek(self, generation):
+        def go(engine):
+            if self.history is not None:
+                self.history.restore(engine, generation)
+
+        self.submit(go)
+
+    def pause(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def set_delay(self, seconds):
+        with self._cond:
+            self._due += seconds - self.delay
+            self.delay = seconds
+            self._cond.notify_all()
+
+    def set_watched(self, watched):
+        # Watched again, the board as it is now goes out as a frame straight away
+        with self._cond:
+            if watched and not self.watched:
+                self._refresh = True
+            self.watched = watched
+            self._cond.notify_all()
+
+    def latest(self):
+        with self._cond:
+            if not self._frames:
+                return None
+            frame = self._collapse()
+            self._frames.clear()
+            self._cond.notify_all()
+            return frame
+
+    def wait_idle(self, timeout=None):
+        # Block until every edit submitted so far has been applied and published.
+        # Counting them rather than waiting for a moment with nothing to do: a
+        # simulation running flat out may never have one
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            target = self._submitted
+            while self._applied < target:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            if self.pool is not None:
+                while self._busy:
+                    self._cond.wait()
+                self.pool.discard(self)
+        if self._thread is not None:
+            self._thread.join()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.engine.close()
+
+    def _collapse(self):
+        # Keep only the newest frame, carrying over the changes of the ones dropped
+        frame = self._frames.pop()
+        for older in self._frames:
+            frame.dirty = merge_dirty(older.dirty, frame.dirty)
+        self._frames.clear()
+        self._frames.append(frame)
+        return frame
+
+    def _skipping(self):
+        cycles = self.cycles
+        return cycles is not None and cycles.cycle is not None and self.cycle_action == "skip"
+
+    def _wake_time(self):
+        # When the next batch is due; None if it can run right away
+        if not self.turbo:
+            return self._due
+        return self._next_publish if self._skipping() else None
+
+    def _has_room(self):
+        # Unwatched, no frame is queued to wait on
+        return not self.watched or len(self._frames) < self.depth
+
+    def _ready_to_step(self):
+        if not self.running:
+            return False
+        wake = self._wake_time()
+        # Turbo keeps stepping while the consumer lags; frames wait for room instead
+        if wake is None:
+            return True
+        return self._has_room() and time.perf_counter() >= wake
+
+    def _has_work(self):
+        return self._closed or self._edits or self._refresh or self._ready_to_step()
+
+    def _timeout(self):
+        # Seconds until the next batch falls due, None for when something changes
+        wake = self._wake_time()
+        if self.running and wake is not None and self._has_room():
+            return max(0.0, wake - time.perf_counter())
+        return None
+
+    def _take(self):
+        # Claims the next batch: the edits waiting, whether generations are due
+        # and whether a frame is owed regardless
+        edits = list(self._edits)
+        self._edits.clear()
+        stepping = self._ready_to_step()
+        refresh, self._refresh = self._refresh, False
+        self._busy = True
+        return edits, stepping, refresh
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_work():
+                    self._cond.wait(self._timeout())
+                if self._closed:
+                    return
+                batch = self._take()
+            self._work(*batch)
+
+    def _work(self, edits, stepping, refresh):
+        prof = self.profiler
+        if prof is not None:
+            section = prof.enter()
+            start = time.perf_counter()
+        publish = True
+        if edits:
+            for edit in edits:
+                try:
+                    result = edit(self.engine)
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                if isinstance(result, Engine):
+                    if result is not self.engine:
+                        self.engine.close()
+                    self.engine = result
+            self.engine.stats = self.stats
+            cycles = self.cycles
+            if cycles is not None:
+                cycles.reset()
+            if self.recorder is not None:
+                self.recorder.record(self.engine)
+            if self.history is not None:
+                self.history.record(self.engine, edited=True)
+        elif stepping and self._skipping():
+            publish = self._skip_batch(self.cycles.cycle[1])
+            if self.recorder is not None:
+                self.recorder.record(self.engine)
+            if self.history is not None:
+                self.history.record(self.engine)
+        elif stepping:
+            publish = self._step_batch(prof)
+        if prof is not None:
+            stepped = time.perf_counter()
+            if edits:
+                prof.record("edit", start, stepped)
+        publish = (publish or refresh) and self.watched
+        frame = self.engine.snapshot() if publish else None
+        if prof is not None:
+            if publish:
+                prof.record("snapshot", stepped, time.perf_counter())
+            prof.leave(section)
+
+        with self._cond:
+            if frame is not None:
+                self._frames.append(frame)
+                if edits:
+                    self._collapse()
+            self._applied += len(edits)
+            self._busy = False
+            self._cond.notify_all()
+
+    def _step_batch(self, prof):
+        # Steps until the budget is spent, the next generation isn't due yet, or
+        # an edit, pause or close is waiting. Returns whether to publish a frame
+        turbo = self.turbo
+        # A turn in a pool is a frame's worth of steps in either mode: turbo's next
+        # frame may have fallen due while the other simulations had theirs
+        if turbo and self.pool is None:
+            end = self._next_publish
+        else:
+            end = time.perf_counter() + FRAME_BUDGET
+        cycles = self.cycles
+        if cycles is not None and cycles.cycle is None:
+            cycles.observe(self.engine.generation, self.engine.board_hash())
+        now = time.perf_counter()
+        while True:
+            before = now
+            self.engine.step()
+            if self.recorder is not None:
+                self.recorder.record(self.engine)
+            if self.history is not None:
+                self.history.record(self.engine)
+            if cycles is not None and cycles.cycle is None:
+                if cycles.observe(self.engine.generation, self.engine.board_hash()):
+                    if self.cycle_action == "pause":
+                        self.running = False
+                    elif self.cycle_action == "skip":
+                        end = now
+            now = time.perf_counter()
+            self._step_seconds += (now - before - self._step_seconds) * 0.1
+            if prof is not None:
+                prof.record("step", before, now)
+            if not turbo:
+                self._due += self.delay
+            if self._edits or self._closed or not self.running or now >= end:
+                break
+            if not turbo and now < self._due:
+                break
+        if not turbo:
+            # Falling behind drops the backlog instead of bursting later
+            self._due = max(self._due, now - FRAME_BUDGET)
+            return True
+        if not self.running or self._skipping() or (now >= self._next_publish and len(self._frames) < self.depth):
+            self._next_publish = max(self._next_publish + 1 / self.turbo_fps, now)
+            return True
+        return False
+
+    def _skip_batch(self, period):
+        # The board cycles: count the generations due as usual, turbo at the pace
+        # the engine was stepping, but step only their count modulo the period
+        now = time.perf_counter()
+        if self.turbo:
+            n = max(1, int(1 / self.turbo_fps / self._step_seconds))
+            self._next_publish = now + 1 / self.turbo_fps
+        else:
+            n = 1 + max(0, int((now - self._due) / self.delay))
+            self._due = max(self._due + n * self.delay, now - FRAME_BUDGET)
+        skip_cycle(self.engine, n, period)
+        return True
@@ -0,0 +1,154 @@
+import csv
+import json
+import os
+
+from .cycles import CycleDetector
+from .registry import create_engine
+from .rules import parse_rule
+
+# Generations a soup may run before it's given up on as unsettled
+MAX_GENERATIONS = 10_000
+FIELDS = ("seed", "density", "rule", "rows", "cols", "wrap", "generations", "lifespan", "period", "population")
+
+
+def soup_tasks(count, densities, rules, rows, cols, wrap=False, first_seed=0, engine="NumPy", max_generations=MAX_GENERATIONS):
+    # The same seeds under every density and rule, so their results pair up;
+    # `python -m life run --random D --seed S` replays any one of them
+    return [
+        (seed, float(density), parse_rule(str(rule)).rulestring, rows, cols, wrap, engine, max_generations)
+        for rule in rules
+        for density in densities
+        for seed in range(first_seed, first_seed + count)
+    ]
+
+
+def task_key(task):
+    seed, density, rule = task[:3]
+    return int(seed), float(density), str(rule)
+
+
+def run_soup(task):
+    # Steps one soup until its board repeats an earlier state (still life,
+    # oscillator or empty board) or the generation cap. lifespan is the
+    # generation the cycle starts at, None when it never settled
+    seed, density, rule, rows, cols, wrap, engine_name, max_generations = task
+    engine = create_engine(engine_name, rows, cols, wrap=wrap)
+    try:
+        engine.set_rule(parse_rule(rule))
+        engine.randomize(density, seed=seed)
+        # A small bounded board's packed bytes are a cheaper exact key than its
+        # Zobrist hash; unbounded boards reach past the window they'd pack
+        if engine.bounded:
+            key = lambda: engine.packed().tobytes()
+        else:
+            key = engine.board_hash
+        detector = CycleDetector()
+        detector.observe(engine.generation, key())
+        while detector.cycle is None and engine.generation < max_generations:
+            engine.step()
+            detector.observe(engine.generation, key())
+        lifespan, period = detector.cycle or (None, None)
+        return {
+            "seed": seed, "density": density, "rule": rule, "rows": rows, "cols": cols, "wrap": wrap,
+            "generations": engine.generation, "lifespan": lifespan, "period": period,
+            "population": engine.population(),
+        }
+    finally:
+        engine.close()
+
+
+def read_results(path):
+    # Rows of a results file as dicts; CSV fields come back as strings
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            return [json.loads(line) for line in f if line.strip()]
+        return list(csv.DictReader(f))
+
+
+class ResultWriter:
+    # Appends results to a .csv or .jsonl file one line at a time, flushed as
+    # each one arrives: the file is the batch's checkpoint. Opening with
+    # resume=True keeps what's there (minus a line cut short by an interrupted
+    # write) and done() tells which tasks it already covers
+    def __init__(self, path, resume=False, stream=None):
+        self.path = path
+        self.jsonl = path is not None and path.lower().endswith((".jsonl", ".json"))
+        self.finished = set()
+        if path is None:
+            self._f = stream
+        else:
+            if resume and os.path.exists(path):
+                self._load(path)
+            self._f = open(path, "a" if resume else "w", newline="", encoding="utf-8")
+        self._csv = None
+        if not self.jsonl:
+            self._csv = csv.DictWriter(self._f, FIELDS, lineterminator="\n")
+            if not self.finished and (path is None or self._f.tell() == 0):
+                self._csv.writeheader()
+
+    def _load(self, path):
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        for row in read_results(path):
+            self.finished.add(task_key((row["seed"], row["density"], row["rule"])))
+
+    def done(self, task):
+        return task_key(task) in self.finished
+
+    def write(self, result):
+        if self.jsonl:
+            self._f.write(json.dumps(result) + "\n")
+        else:
+            self._csv.writerow({k: "" if v is None else v for k, v in result.items()})
+        self._f.flush()
+        self.finished.add(task_key((result["seed"], result["density"], result["rule"])))
+
+    def close(self):
+        if self.path is not None:
+            self._f.close()
+
+
+def run_soups(tasks, writer, workers=1, progress=None):
+    # Runs the tasks the writer doesn't have yet across `workers` processes,
+    # writing each result as it finishes (in completion order). Returns the
+    # results of this run
+    pending = [task for task in tasks if not writer.done(task)]
+    results = []
+
+    def finish(result):
+        writer.write(result)
+        results.append(result)
+        if progress is not None:
+            progress(len(tasks) - len(pending) + len(results), len(tasks))
+
+    if workers <= 1 or len(pending) <= 1:
+        for task in pending:
+            finish(run_soup(task))
+        return results
+    import multiprocessing
+
+    # Small chunks keep results streaming while sparing the pool a round trip per soup
+    chunk = max(1, min(16, len(pending) // (workers * 8)))
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for result in pool.imap_unordered(run_soup, pending, chunk):
+            finish(result)
+    return results
+
+
+def summarize(results):
+    # (rule, density) -> (soups, settled, mean lifespan of the settled ones, mean final population)
+    groups = {}
+    for r in results:
+        groups.setdefault((r["rule"], float(r["density"])), []).append(r)
+    summary = {}
+    for key, rows in sorted(groups.items()):
+        settled = [int(r["lifespan"]) for r in rows if r["lifespan"] not in (None, "")]
+        summary[key] = (
+            len(rows), len(settled),
+            sum(settled) / len(settled) if settled else None,
+            sum(int(r["population"]) for r in rows) / len(rows),
+        )
+    return summary
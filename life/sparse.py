@@ -0,0 +1,301 @@
+import numpy as np
+
+from .engines import Engine, Snapshot, next_cells, zobrist
+
+CHUNK = 64
+
+# Halo sources of a padded chunk: (chunk offset, rows taken from it, cols taken from it, target rows, target cols)
+_HALO = (
+    ((-1, -1), np.s_[-1:], np.s_[-1:], np.s_[:1], np.s_[:1]),
+    ((-1, 0), np.s_[-1:], np.s_[:], np.s_[:1], np.s_[1:-1]),
+    ((-1, 1), np.s_[-1:], np.s_[:1], np.s_[:1], np.s_[-1:]),
+    ((0, -1), np.s_[:], np.s_[-1:], np.s_[1:-1], np.s_[:1]),
+    ((0, 0), np.s_[:], np.s_[:], np.s_[1:-1], np.s_[1:-1]),
+    ((0, 1), np.s_[:], np.s_[:1], np.s_[1:-1], np.s_[-1:]),
+    ((1, -1), np.s_[:1], np.s_[-1:], np.s_[-1:], np.s_[:1]),
+    ((1, 0), np.s_[:1], np.s_[:], np.s_[-1:], np.s_[1:-1]),
+    ((1, 1), np.s_[:1], np.s_[:1], np.s_[-1:], np.s_[-1:]),
+)
+
+
+def chunk_region(chunks, r0, r1, c0, c1):
+    out = np.zeros((r1 - r0, c1 - c0), dtype=np.uint8)
+    if r1 <= r0 or c1 <= c0:
+        return out
+    ky0, ky1 = r0 // CHUNK, (r1 - 1) // CHUNK + 1
+    kx0, kx1 = c0 // CHUNK, (c1 - 1) // CHUNK + 1
+    # Walk whichever is smaller: the chunk positions in the box or the live chunks
+    if (ky1 - ky0) * (kx1 - kx0) <= len(chunks):
+        items = [((ky, kx), chunks.get((ky, kx))) for ky in range(ky0, ky1) for kx in range(kx0, kx1)]
+    else:
+        items = chunks.items()
+    for (ky, kx), chunk in items:
+        if chunk is None:
+            continue
+        top, left = ky * CHUNK, kx * CHUNK
+        a0, a1 = max(top, r0), min(top + CHUNK, r1)
+        b0, b1 = max(left, c0), min(left + CHUNK, c1)
+        if a0 < a1 and b0 < b1:
+            out[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = chunk[a0 - top:a1 - top, b0 - left:b1 - left]
+    return out
+
+
+def chunk_density(chunks, r0, r1, c0, c1, k):
+    # Live cells per k x k block, blocks aligned to (r0, c0)
+    h, w = -(-(r1 - r0) // k), -(-(c1 - c0) // k)
+    out = np.zeros((h, w), dtype=np.int64)
+    for (ky, kx), chunk in chunks.items():
+        top, left = ky * CHUNK, kx * CHUNK
+        if top >= r0 + h * k or left >= c0 + w * k or top + CHUNK <= r0 or left + CHUNK <= c0:
+            continue
+        dr, dc = top - r0, left - c0
+        if CHUNK % k == 0 and dr % k == 0 and dc % k == 0:
+            # Whole blocks inside the chunk
+            n = CHUNK // k
+            blocks = chunk.reshape(n, k, n, k).sum(axis=(1, 3), dtype=np.int64)
+            br, bc = dr // k, dc // k
+            a0, b0 = max(0, -br), max(0, -bc)
+            a1, b1 = min(n, h - br), min(n, w - bc)
+            out[br + a0:br + a1, bc + b0:bc + b1] += blocks[a0:a1, b0:b1]
+        elif k % CHUNK == 0 and dr // k == (dr + CHUNK - 1) // k and dc // k == (dc + CHUNK - 1) // k:
+            # The whole chunk falls in one block
+            out[dr // k, dc // k] += int(np.count_nonzero(chunk))
+        else:
+            rr, cc = np.nonzero(chunk)
+            rr += dr
+            cc += dc
+            inside = (rr >= 0) & (rr < h * k) & (cc >= 0) & (cc < w * k)
+            np.add.at(out, (rr[inside] // k, cc[inside] // k), 1)
+    return out
+
+
+def chunk_box(keys, rows, cols):
+    # (r0, r1, c0, c1) around the live cells of the chunks at keys, given which
+    # of each one's rows and columns hold any (none of them empty)
+    if not len(keys):
+        return None
+    origin = np.array(keys, dtype=np.int64).reshape(-1, 2) * CHUNK
+    return (
+        int((origin[:, 0] + rows.argmax(axis=1)).min()), int((origin[:, 0] + CHUNK - rows[:, ::-1].argmax(axis=1)).max()),
+        int((origin[:, 1] + cols.argmax(axis=1)).min()), int((origin[:, 1] + CHUNK - cols[:, ::-1].argmax(axis=1)).max()),
+    )
+
+
+class SparseSnapshot(Snapshot):
+    # Chunk arrays are never written after a snapshot takes them (the engine copies on write)
+    bounded = False
+
+    def __init__(self, chunks, rows, cols, generation, status="", dirty=None):
+        self.chunks = chunks
+        self.rows = rows
+        self.cols = cols
+        self.generation = generation
+        self.status = status
+        self.dirty = dirty
+
+    def region(self, r0, r1, c0, c1):
+        return chunk_region(self.chunks, r0, r1, c0, c1)
+
+    def density(self, r0, r1, c0, c1, k):
+        return chunk_density(self.chunks, r0, r1, c0, c1, k)
+
+    def population(self):
+        return sum(int(np.count_nonzero(chunk)) for chunk in self.chunks.values())
+
+
+class SparseEngine(Engine):
+    # Unbounded plane stored as a hash of occupied 64x64 chunks; memory and step
+    # cost follow the live population. rows x cols is only the home window
+    # (used for inserts, fill and engine switches); wrap is ignored
+    name = "Infinito"
+    bounded = False
+
+    def __init__(self, rows, cols, wrap=False):
+        super().__init__(rows, cols, wrap)
+        self.chunks = {}
+        # Chunks this engine may write in place; the rest are shared with a snapshot
+        self._owned = set()
+
+    def status_text(self):
+        return f"Bloques {len(self.chunks):,}"
+
+    def _writable(self, key, create):
+        chunk = self.chunks.get(key)
+        if key not in self._owned:
+            if chunk is None:
+                if not create:
+                    return None
+                chunk = np.zeros((CHUNK, CHUNK), dtype=np.uint8)
+            else:
+                chunk = chunk.copy()
+            self.chunks[key] = chunk
+            self._owned.add(key)
+        return chunk
+
+    def load_array(self, cells):
+        self.rows, self.cols = cells.shape
+        self.chunks = {}
+        self._owned = set()
+        if cells.size:
+            live = np.logical_or.reduceat(cells, np.arange(0, self.rows, CHUNK), axis=0)
+            live = np.logical_or.reduceat(live, np.arange(0, self.cols, CHUNK), axis=1)
+            for ky, kx in zip(*np.nonzero(live)):
+                block = cells[ky * CHUNK:(ky + 1) * CHUNK, kx * CHUNK:(kx + 1) * CHUNK]
+                chunk = self._writable((int(ky), int(kx)), True)
+                chunk[:block.shape[0], :block.shape[1]] = block
+        self.mark_dirty()
+
+    def to_array(self):
+        return self.region(0, self.rows, 0, self.cols)
+
+    def region(self, r0, r1, c0, c1):
+        return chunk_region(self.chunks, r0, r1, c0, c1)
+
+    def get(self, r, c):
+        chunk = self.chunks.get((r // CHUNK, c // CHUNK))
+        return 0 if chunk is None else int(chunk[r % CHUNK, c % CHUNK])
+
+    def set_many(self, rr, cc, value):
+        rr = np.asarray(rr, dtype=np.int64).ravel()
+        cc = np.asarray(cc, dtype=np.int64).ravel()
+        if not rr.size:
+            return
+        # Group the cells by chunk and write each group in one go
+        ky, kx = rr // CHUNK, cc // CHUNK
+        order = np.lexsort((kx, ky))
+        ky, kx, r, c = ky[order], kx[order], rr[order] % CHUNK, cc[order] % CHUNK
+        starts = np.flatnonzero(np.r_[True, (ky[1:] != ky[:-1]) | (kx[1:] != kx[:-1])])
+        for a, b in zip(starts.tolist(), np.r_[starts[1:], len(r)].tolist()):
+            chunk = self._writable((int(ky[a]), int(kx[a])), bool(value))
+            if chunk is not None:
+                chunk[r[a:b], c[a:b]] = value
+        self.touch(rr, cc)
+
+    def stamp(self, offsets, r, c):
+        # Nothing to clip or wrap on the unbounded plane
+        offs = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+        self.set_many(offs[:, 0] + r, offs[:, 1] + c, 1)
+
+    def clear(self):
+        self.chunks = {}
+        self._owned = set()
+        self.mark_dirty()
+
+    def fill(self):
+        # Whole chunks share one read-only block; _writable() copies it on write
+        full = np.ones((CHUNK, CHUNK), dtype=np.uint8)
+        full.flags.writeable = False
+        ky1, kx1 = -(-self.rows // CHUNK), -(-self.cols // CHUNK)
+        self.chunks = {(ky, kx): full for ky in range(self.rows // CHUNK) for kx in range(self.cols // CHUNK)}
+        self._owned = set()
+        for ky in range(ky1):
+            for kx in range(kx1):
+                if (ky, kx) not in self.chunks:
+                    chunk = self._writable((ky, kx), True)
+                    chunk[:self.rows - ky * CHUNK, :self.cols - kx * CHUNK] = 1
+        self.mark_dirty()
+
+    def resize(self, rows, cols, preserve=True):
+        # Keeps every cell; content shifts like the bounded engines' centring on growth
+        sr = max(0, (rows - self.rows) // 2)
+        sc = max(0, (cols - self.cols) // 2)
+        self.rows, self.cols = rows, cols
+        if not preserve:
+            self.clear()
+            return
+        if sr or sc:
+            self._shift(sr, sc)
+        self.mark_dirty()
+
+    def _shift(self, dr, dc):
+        # Moves every chunk by (dr, dc) cells; off the chunk grid each one is
+        # split into the (up to) four chunks it lands on
+        qr, rr = divmod(dr, CHUNK)
+        qc, rc = divmod(dc, CHUNK)
+        if not rr and not rc:
+            self.chunks = {(ky + qr, kx + qc): chunk for (ky, kx), chunk in self.chunks.items()}
+            self._owned = {(ky + qr, kx + qc) for ky, kx in self._owned}
+            return
+        # (chunk offset, rows or cols taken from the source, where they go in the target)
+        parts_r = [(0, np.s_[:CHUNK - rr], np.s_[rr:])] + ([(1, np.s_[CHUNK - rr:], np.s_[:rr])] if rr else [])
+        parts_c = [(0, np.s_[:CHUNK - rc], np.s_[rc:])] + ([(1, np.s_[CHUNK - rc:], np.s_[:rc])] if rc else [])
+        moved = {}
+        for (ky, kx), chunk in self.chunks.items():
+            for oy, src_r, dst_r in parts_r:
+                for ox, src_c, dst_c in parts_c:
+                    part = chunk[src_r, src_c]
+                    if not part.any():
+                        continue
+                    key = (ky + qr + oy, kx + qc + ox)
+                    target = moved.get(key)
+                    if target is None:
+                        target = moved[key] = np.zeros((CHUNK, CHUNK), dtype=np.uint8)
+                    target[dst_r, dst_c] = part
+        self.chunks = moved
+        self._owned = set(moved)
+
+    def live_cells(self):
+        rows, cols = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for (ky, kx), chunk in self.chunks.items():
+            r, c = np.nonzero(chunk)
+            rows.append(r + ky * CHUNK)
+            cols.append(c + kx * CHUNK)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def population(self):
+        return sum(int(np.count_nonzero(chunk)) for chunk in self.chunks.values())
+
+    def step(self):
+        before = None if self.stats is None else self.population_before_step()
+        self.generation += 1
+        if not self.chunks:
+            if before is not None:
+                self.push_stats(0, 0, 0, None, 0)
+            return
+
+        # Candidates: live chunks and their 8 neighbours
+        keys = list(self.chunks)
+        index = {key: i for i, key in enumerate(keys)}
+        candidates = list({(ky + dy, kx + dx) for ky, kx in keys for dy in (-1, 0, 1) for dx in (-1, 0, 1)})
+
+        # Stack the live chunks plus one empty chunk, then gather every candidate's
+        # centre and halo from the stack with fancy indexing
+        store = np.stack([self.chunks[key] for key in keys] + [np.zeros((CHUNK, CHUNK), dtype=np.uint8)])
+        blank = len(keys)
+        batch = np.zeros((len(candidates), CHUNK + 2, CHUNK + 2), dtype=np.uint8)
+        for (dy, dx), src_r, src_c, dst_r, dst_c in _HALO:
+            idx = np.array([index.get((ky + dy, kx + dx), blank) for ky, kx in candidates])
+            batch[:, dst_r, dst_c] = store[idx, src_r, src_c]
+
+        new = next_cells(batch, rule=self.rule)
+        old = batch[:, 1:-1, 1:-1]
+        # Rows of each chunk with a live cell: which chunks live on, and their share of the live box
+        live_rows = new.any(axis=2)
+        alive = live_rows.any(axis=1)
+        diff = new != old
+        changed = diff.any(axis=(1, 2))
+
+        self.chunks = {candidates[i]: new[i] for i in np.flatnonzero(alive).tolist()}
+        self._owned = set(self.chunks)
+        h = self._hash
+        moved = np.flatnonzero(changed)
+        self.mark_dirty([
+            (ky * CHUNK, (ky + 1) * CHUNK, kx * CHUNK, (kx + 1) * CHUNK)
+            for ky, kx in (candidates[i] for i in moved.tolist())
+        ])
+        if h is not None or before is not None:
+            flipped = diff[moved]
+        if h is not None:
+            i, r, c = np.nonzero(flipped)
+            origin = np.array([candidates[j] for j in moved.tolist()], dtype=np.int64).reshape(-1, 2) * CHUNK
+            self._hash = h ^ zobrist(origin[i, 0] + r, origin[i, 1] + c)
+        if before is not None:
+            births = int(np.count_nonzero(flipped & new[moved].view(bool)))
+            deaths = int(np.count_nonzero(flipped)) - births
+            live = np.flatnonzero(alive)
+            box = chunk_box([candidates[i] for i in live.tolist()], live_rows[live], new[live].any(axis=1))
+            self.push_stats(before + births - deaths, births, deaths, box, len(moved) * CHUNK * CHUNK)
+
+    def snapshot(self):
+        self._owned = set()
+        return SparseSnapshot(dict(self.chunks), self.rows, self.cols, self.generation, self.status_text(), self.take_dirty())
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+
+# Generations kept by default
+STATS_CAPACITY = 4096
+# Columns of a row; the live-cell box is (top, bottom, left, right) half-open
+# like the engines' boxes, and active is the area of the tiles that changed.
+# NaN where an engine doesn't know (HashLife's births and deaths, an empty box)
+STATS_FIELDS = ("generation", "population", "births", "deaths", "top", "bottom", "left", "right", "active")
+
+
+class StatsRing:
+    # Per-generation figures pushed by an engine's step() while it's hooked up
+    # (engine.stats), in a fixed float64 ring: the oldest rows are overwritten.
+    # A generation at or before the last one pushed (a restore, a replayed
+    # timeline) drops the rows from it on. The GUI reads from another thread,
+    # hence the lock
+    def __init__(self, capacity=STATS_CAPACITY):
+        self.capacity = capacity
+        self._rows = np.full((capacity, len(STATS_FIELDS)), np.nan)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def push(self, generation, population, births, deaths, box, active):
+        with self._lock:
+            if self._size:
+                last = self._rows[(self._start + self._size - 1) % self.capacity, 0]
+                if generation <= last:
+                    self._truncate(generation)
+            if self._size == self.capacity:
+                self._start = (self._start + 1) % self.capacity
+                self._size -= 1
+            row = self._rows[(self._start + self._size) % self.capacity]
+            row[:4] = generation, population, np.nan if births is None else births, np.nan if deaths is None else deaths
+            row[4:8] = np.nan if box is None else box
+            row[8] = np.nan if active is None else active
+            self._size += 1
+
+    def _truncate(self, generation):
+        # Keep the rows before `generation`
+        keep = int(np.searchsorted(self._ordered()[:, 0], generation))
+        self._size = keep
+
+    def _ordered(self):
+        index = (self._start + np.arange(self._size)) % self.capacity
+        return self._rows[index]
+
+    def table(self):
+        # Copy of the rows, oldest first
+        with self._lock:
+            return self._ordered()
+
+    def series(self, field):
+        return self.table()[:, STATS_FIELDS.index(field)]
+
+    def last(self):
+        # The newest row as a dict, None while empty
+        with self._lock:
+            if not self._size:
+                return None
+            row = self._rows[(self._start + self._size - 1) % self.capacity]
+            return dict(zip(STATS_FIELDS, row.tolist()))
+
+    def save(self, path):
+        # .npy keeps the float table as is; anything else is CSV with a header,
+        # unknown figures left empty
+        table = self.table()
+        if path.lower().endswith(".npy"):
+            np.save(path, table)
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(",".join(STATS_FIELDS) + "\n")
+            for row in table.tolist():
+                f.write(",".join("" if v != v else str(int(v)) for v in row) + "\n")
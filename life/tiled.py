@@ -0,0 +1,218 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from .engines import Engine, next_cells, random_fill, tile_area, zobrist
+
+TILE = 32
+
+
+class TiledEngine(Engine):
+    # Only tiles that changed last generation, and their neighbours, are recomputed
+    name = "Teselas"
+
+    def __init__(self, rows, cols, wrap=False, tile=TILE):
+        super().__init__(rows, cols, wrap)
+        self.tile = tile
+        self.load_array(np.zeros((rows, cols), dtype=np.uint8))
+
+    def _alloc(self):
+        t = self.tile
+        self.tiles_r = (self.rows + t - 1) // t
+        self.tiles_c = (self.cols + t - 1) // t
+        h = self.tiles_r * t
+        w = self.tiles_c * t
+        # Board at [1:rows+1, 1:cols+1] with a one-cell halo; tile padding stays zero
+        self.padded = np.zeros((h + 2, w + 2), dtype=np.uint8)
+        s0, s1 = self.padded.strides
+        self._windows = as_strided(
+            self.padded, shape=(self.tiles_r, self.tiles_c, t + 2, t + 2),
+            strides=(t * s0, t * s1, s0, s1), writeable=False,
+        )
+        self._inner = self.padded[1:h + 1, 1:w + 1].reshape(self.tiles_r, t, self.tiles_c, t).transpose(0, 2, 1, 3)
+        valid = np.zeros((h, w), dtype=bool)
+        valid[:self.rows, :self.cols] = True
+        self._valid = valid.reshape(self.tiles_r, t, self.tiles_c, t).transpose(0, 2, 1, 3)
+        self.active = np.zeros((self.tiles_r, self.tiles_c), dtype=bool)
+        self.active_tiles = 0
+        self._occupied = None
+        self._halo_wrap = None
+
+    @property
+    def cells(self):
+        return self.padded[1:self.rows + 1, 1:self.cols + 1]
+
+    @property
+    def tile_count(self):
+        return self.tiles_r * self.tiles_c
+
+    def status_text(self):
+        return f"Teselas activas {self.active_tiles:,}/{self.tile_count:,}"
+
+    def load_array(self, cells):
+        self.rows, self.cols = cells.shape
+        self._alloc()
+        self.cells[:] = cells
+        self.active[:] = True
+        self.mark_dirty()
+
+    def to_array(self):
+        return self.cells
+
+    def region(self, r0, r1, c0, c1):
+        return self.padded[1 + r0:1 + r1, 1 + c0:1 + c1]
+
+    def get(self, r, c):
+        return int(self.padded[r + 1, c + 1])
+
+    def set(self, r, c, value):
+        self.padded[r + 1, c + 1] = value
+        self.active[r // self.tile, c // self.tile] = True
+        self.touch(r, c)
+
+    def set_many(self, rr, cc, value):
+        rr = np.asarray(rr)
+        cc = np.asarray(cc)
+        self.padded[rr + 1, cc + 1] = value
+        self.active[rr // self.tile, cc // self.tile] = True
+        self.touch(rr, cc)
+
+    def toggle(self, r, c):
+        self.set(r, c, 1 - self.get(r, c))
+
+    def clear(self):
+        self.padded.fill(0)
+        # An empty board only changes under B0
+        self.active[:] = self.rule.b0
+        self.mark_dirty()
+
+    def fill(self):
+        self.cells.fill(1)
+        self.active[:] = True
+        self.mark_dirty()
+
+    def randomize(self, density=0.2, seed=None):
+        random_fill(self.cells, density, seed)
+        self.active[:] = True
+        self.mark_dirty()
+
+    def population(self):
+        return int(np.count_nonzero(self.cells))
+
+    def set_rule(self, rule):
+        super().set_rule(rule)
+        # Tiles settled under the old rule may not be settled under this one
+        self.active[:] = True
+
+    def _refresh_halo(self):
+        p = self.padded
+        rows, cols = self.rows, self.cols
+        if self.wrap:
+            p[0, 1:cols + 1] = p[rows, 1:cols + 1]
+            p[rows + 1, 1:cols + 1] = p[1, 1:cols + 1]
+            p[0:rows + 2, 0] = p[0:rows + 2, cols]
+            p[0:rows + 2, cols + 1] = p[0:rows + 2, 1]
+        elif self._halo_wrap:
+            p[0, :] = 0
+            p[rows + 1, :] = 0
+            p[:, 0] = 0
+            p[:, cols + 1] = 0
+        if self._halo_wrap is not None and self._halo_wrap != self.wrap:
+            # Edge cells see different neighbours now
+            self.active[0, :] = True
+            self.active[-1, :] = True
+            self.active[:, 0] = True
+            self.active[:, -1] = True
+        self._halo_wrap = self.wrap
+
+    def _dilate(self, a):
+        if self.wrap:
+            out = a | np.roll(a, 1, 0) | np.roll(a, -1, 0)
+            return out | np.roll(out, 1, 1) | np.roll(out, -1, 1)
+        out = a.copy()
+        out[1:] |= a[:-1]
+        out[:-1] |= a[1:]
+        rows = out.copy()
+        out[:, 1:] |= rows[:, :-1]
+        out[:, :-1] |= rows[:, 1:]
+        return out
+
+    def step(self):
+        stats = self.stats is not None
+        if stats:
+            before = self.population_before_step()
+            occupied = self._occupancy()
+        self._refresh_halo()
+        ti, tj = np.nonzero(self._dilate(self.active))
+        self.active_tiles = len(ti)
+        self.generation += 1
+        if not len(ti):
+            if stats:
+                self.push_stats(before, 0, 0, self._live_box(occupied), 0)
+                self._occupied = occupied
+            return
+
+        # Gather the candidate tiles with their halo and step them as one batch
+        b = self._windows[ti, tj]
+        old = b[:, 1:-1, 1:-1]
+        new = next_cells(b, rule=self.rule)
+        valid = self._valid[ti, tj]
+        new &= valid
+
+        diff = new != old
+        changed = diff.any(axis=(1, 2))
+        self._inner[ti, tj] = new
+        self.active[:] = False
+        self.active[ti[changed], tj[changed]] = True
+
+        # The changed tiles are exactly this generation's change set
+        t = self.tile
+        h = self._hash
+        self.mark_dirty([
+            (r * t, min(self.rows, (r + 1) * t), c * t, min(self.cols, (c + 1) * t))
+            for r, c in zip(ti[changed].tolist(), tj[changed].tolist())
+        ])
+        if h is not None or stats:
+            # Tile padding past the board can hold wrapped halo copies, so mask to the board
+            diff &= valid
+        if h is not None:
+            i, r, c = np.nonzero(diff)
+            self._hash = h ^ zobrist(ti[i] * t + r, tj[i] * t + c)
+        if stats:
+            # Counted on the stepped tiles alone, like the step itself
+            flips = int(np.count_nonzero(diff))
+            births = int(np.count_nonzero(np.logical_and(diff, new, out=diff)))
+            deaths = flips - births
+            occupied[ti, tj] = new.any(axis=(1, 2))
+            active = tile_area(self.active, self.rows, self.cols, t)
+            self.push_stats(before + births - deaths, births, deaths, self._live_box(occupied), active)
+            self._occupied = occupied
+
+    def mark_dirty(self, boxes=None):
+        super().mark_dirty(boxes)
+        self._occupied = None
+
+    def _occupancy(self):
+        # Which tiles hold a live cell: kept by steps that push stats, recounted after anything else
+        if self._occupied is None:
+            # Masked: the padding past the board can hold wrapped halo copies
+            self._occupied = np.logical_and(self._inner, self._valid).any(axis=(2, 3))
+        return self._occupied
+
+    def _live_box(self, occupied):
+        # Tile rows and columns with live cells, then only the edge bands are scanned for the exact box
+        t = self.tile
+        tr = np.flatnonzero(occupied.any(axis=1))
+        if not tr.size:
+            return None
+        tc = np.flatnonzero(occupied.any(axis=0))
+        cells = self.cells
+        a0, a1 = int(tr[0]) * t, min(self.rows, (int(tr[-1]) + 1) * t)
+        b0, b1 = int(tc[0]) * t, min(self.cols, (int(tc[-1]) + 1) * t)
+        top = cells[a0:min(a1, a0 + t), b0:b1].any(axis=1)
+        bottom = cells[max(a0, a1 - t):a1, b0:b1].any(axis=1)
+        left = cells[a0:a1, b0:min(b1, b0 + t)].any(axis=0)
+        right = cells[a0:a1, max(b0, b1 - t):b1].any(axis=0)
+        return (
+            a0 + int(np.argmax(top)), a1 - int(np.argmax(bottom[::-1])),
+            b0 + int(np.argmax(left)), b1 - int(np.argmax(right[::-1])),
+        )
@@ -1,6 +1,11 @@
-import random
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QPainter, QColor
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PySide6.QtCore import Qt, QPointF, QRect, QSize, QTimer, Signal
+from PySide6.QtGui import QPainter, QColor, QIcon, QImage, QPixmap, QPolygonF
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -13,134 +18,671 @@ from PySide6.QtWidgets import (
     QDialog,
     QTextEdit,
     QDialogButtonBox,
-    QScrollArea,
+    QFileDialog,
+    QInputDialog,
+    QListView,
+    QListWidget,
+    QListWidgetItem,
     QSpinBox,
+    QTabWidget,
     QFormLayout,
     QSizePolicy,
     QHBoxLayout,
     QVBoxLayout,
 )
 
+from life import (
+    CONWAY,
+    ENGINES,
+    RULES,
+    STATS_FIELDS,
+    THUMB_SIZE,
+    HISTORY_BYTES,
+    MAX_BRUSH,
+    PALETTES,
+    BoardFile,
+    History,
+    PatternLibrary,
+    Profiler,
+    Recorder,
+    SessionPool,
+    Simulation,
+    StatsRing,
+    create_engine,
+    engine_frames,
+    export_frames,
+    line_cells,
+    open_writer,
+    parse_rule,
+    save_engine,
+    stroke_cells,
+    theme_colors,
+    write_pattern,
+)
+
+# Pattern files shown next to the built-in patterns
+PATTERNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patrones")
+PATTERN_FILTERS = "RLE (*.rle);;Texto (*.cells *.txt);;NumPy (*.npy)"
+BOARD_FILTER = "Tablero (*.vida)"
+BOARD_FILTERS = BOARD_FILTER + ";;Tablero comprimido (*.vida)"
+STATS_FILTERS = "CSV (*.csv);;NumPy (*.npy)"
+ANIMATION_FILTERS = "GIF (*.gif);;PNG por cuadro (*.png);;Vídeo Y4M (*.y4m);;RGB24 sin cabecera (*.rgb)"
+# Longest side of an exported animation; the cell size shrinks to fit
+ANIMATION_MAX_SIDE = 2048
+# Brush modes: the value a stroke sets, None for the opposite of its first cell
+BRUSH_MODES = {"Alternar": None, "Dibujar": 1, "Borrar": 0}
+# Window attributes that belong to one board: each tab keeps its own, and
+# switching tabs swaps them in
+SESSION_FIELDS = (
+    "sim", "board", "running", "delay_ms", "turbo", "wrap", "engine_name", "workers", "rule", "rows", "cols",
+    "cell_size", "recorder", "shown_generation", "skipped", "_gen_rate",
+)
+
+
+
+def indexed_image(values, table):
+    # One byte per pixel used directly as a palette index
+    h, w = values.shape
+    stride = (w + 3) & ~3
+    buf = np.zeros((h, stride), dtype=np.uint8)
+    buf[:, :w] = values
+    img = QImage(buf.data, w, h, stride, QImage.Format_Indexed8)
+    img.setColorTable(table)
+    return img.copy()
+
+
+def board_image(cells, alive_color, bg_color):
+    # 0 -> background, 1 -> alive
+    return indexed_image(cells, [bg_color.rgba(), alive_color.rgba()])
+
+
+def density_table(alive_color, bg_color):
+    # 256 steps blending the background into the alive colour
+    t = np.linspace(0.0, 1.0, 256)
+    bg = np.array(bg_color.getRgb()[:3])
+    alive = np.array(alive_color.getRgb()[:3])
+    rgb = np.rint(bg + (alive - bg) * t[:, None]).astype(int)
+    return [QColor(r, g, b).rgba() for r, g, b in rgb.tolist()]
+
+
+def density_levels(counts, k):
+    # Palette index of each block's pixel: brighter the more of it lives, and a
+    # single live cell still keeps its pixel visible
+    return np.where(counts > 0, 64 + counts * 191 // (k * k), 0).astype(np.uint8)
+
+
+def cell_sprite(cell_size, bg_color):
+    # Background-coloured frame with a transparent hole where a live cell shows through
+    gap = max(1, int(cell_size * 0.12))
+    inner = cell_size - 2 * gap
+    if inner <= 0:
+        return None
+    sprite = QImage(cell_size, cell_size, QImage.Format_ARGB32_Premultiplied)
+    sprite.fill(bg_color)
+    p = QPainter(sprite)
+    p.setRenderHint(QPainter.Antialiasing, True)
+    p.setCompositionMode(QPainter.CompositionMode_Clear)
+    p.setPen(Qt.NoPen)
+    p.setBrush(Qt.black)
+    if cell_size >= 12:
+        radius = max(2.0, cell_size * 0.18)
+        p.drawRoundedRect(gap, gap, inner, inner, radius, radius)
+    else:
+        p.drawRect(gap, gap, inner, inner)
+    p.end()
+    return QPixmap.fromImage(sprite)
+
 
 class GridWidget(QWidget):
-    def __init__(self, grid, cell_size, alive_color="#00e676", bg_color="#121212"):
+    # Brush strokes: row and column arrays of the cells, and the value they take
+    cells_painted = Signal(object, object, int)
+    zoomed = Signal(int)
+
+    MAX_CELL_SIZE = 64
+    MAX_CELLS_PER_PIXEL = 1 << 16
+    # Zoomed out, a bounded board whose pixels fit in this many widget areas
+    # keeps all of them, so panning only blits
+    LEVELS_AREAS = 4
+
+    def __init__(self, source, cell_size, alive_color="#00e676", bg_color="#121212"):
         super().__init__()
-        self.grid = grid
+        self.source = source
         self.cell_size = cell_size
         self.alive_color = QColor(alive_color)
         self.bg_color = QColor(bg_color)
+        self._sprite = None
+        self._sprite_key = None
+        # Persistent copy of the painted board; frames only redraw their changed boxes into it
+        self._backing = None
+        self._density_table = None
+        self._density_key = None
+        # Zoomed out: density levels of the whole board, one byte per pixel at
+        # _levels_k cells per pixel, patched from each frame's changed boxes
+        self._levels = None
+        self._levels_k = None
+        # Viewport: pan is the view centre's offset from the board centre, in cells.
+        # cells_per_pixel > 1 is the zoomed-out level of detail (cell_size is then 1)
+        self.pan_r = 0.0
+        self.pan_c = 0.0
+        self.cells_per_pixel = 1
+        self._drag = None
+        # Brush: mode 1 draws, 0 erases, None sets every cell of a stroke to the
+        # opposite of the one it starts on. A stroke's cells pile up and go out
+        # as one edit per frame, already drawn over the backing pixmap
+        self.brush_size = 1
+        self.brush_mode = None
+        self._stroke = None
+        self.stroke_timer = QTimer(self)
+        self.stroke_timer.setSingleShot(True)
+        self.stroke_timer.setInterval(16)
+        self.stroke_timer.timeout.connect(self.flush_stroke)
+        # Instrumentation: a Profiler while the performance HUD is on, else None
+        self.profiler = None
+        self.hud_lines = None
+        self._hud_rect = QRect()
         self.setMouseTracking(True)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
     def set_colors(self, alive_hex, bg_hex):
         self.alive_color = QColor(alive_hex)
         self.bg_color = QColor(bg_hex)
+        self.invalidate()
+
+    def invalidate(self):
+        self._backing = None
         self.update()
 
+    def sprite(self):
+        key = (self.cell_size, self.bg_color.rgba())
+        if key != self._sprite_key:
+            self._sprite = cell_sprite(self.cell_size, self.bg_color)
+            self._sprite_key = key
+        return self._sprite
+
+    def density_colors(self):
+        key = (self.alive_color.rgba(), self.bg_color.rgba())
+        if key != self._density_key:
+            self._density_table = density_table(self.alive_color, self.bg_color)
+            self._density_key = key
+        return self._density_table
+
+    def scale(self):
+        # Pixels per cell
+        return self.cell_size / self.cells_per_pixel
+
+    def visible_cells(self):
+        # Zoomed out, the box is whole pixels of cells_per_pixel x cells_per_pixel blocks
+        off_x, off_y = self.offsets()
+        k = self.cells_per_pixel
+        if k > 1:
+            r0, c0 = -off_y * k, -off_x * k
+            r1, c1 = (self.height() - off_y) * k, (self.width() - off_x) * k
+        else:
+            r0 = -off_y // self.cell_size
+            c0 = -off_x // self.cell_size
+            r1 = -(-(self.height() - off_y) // self.cell_size)
+            c1 = -(-(self.width() - off_x) // self.cell_size)
+        if self.source.bounded:
+            r0, c0 = max(0, r0), max(0, c0)
+            r1, c1 = min(self.source.rows, r1), min(self.source.cols, c1)
+        return r0, r1, c0, c1
+
+    def cell_rect(self, r0, r1, c0, c1):
+        off_x, off_y = self.offsets()
+        k = self.cells_per_pixel
+        if k > 1:
+            return QRect(off_x + c0 // k, off_y + r0 // k, -(-(c1 - c0) // k), -(-(r1 - r0) // k))
+        return QRect(
+            off_x + c0 * self.cell_size, off_y + r0 * self.cell_size,
+            (c1 - c0) * self.cell_size, (r1 - r0) * self.cell_size,
+        )
+
+    def draw_cells(self, p, r0, r1, c0, c1, cells=None):
+        if self.cells_per_pixel > 1:
+            return self.draw_density(p, r0, r1, c0, c1)
+        # The box as one image, scaled up with nearest-neighbour, then the cell
+        # frame tiled on top; cost doesn't depend on how many cells live
+        if cells is None:
+            cells = self.source.region(r0, r1, c0, c1)
+        img = board_image(cells, self.alive_color, self.bg_color)
+        target = self.cell_rect(r0, r1, c0, c1)
+        p.drawImage(target, img)
+        sprite = self.sprite()
+        if sprite is not None:
+            p.drawTiledPixmap(target, sprite)
+        return target
+
+    def draw_density(self, p, r0, r1, c0, c1):
+        # One pixel per block. r0 and c0 are whole blocks; so the cost follows
+        # the pixels drawn, cut from the kept levels when there are any
+        k = self.cells_per_pixel
+        levels = self.board_levels()
+        if levels is not None:
+            levels = levels[r0 // k:-(-r1 // k), c0 // k:-(-c1 // k)]
+        else:
+            levels = density_levels(self.source.density(r0, r1, c0, c1, k), k)
+        target = self.cell_rect(r0, r1, c0, c1)
+        p.drawImage(target, indexed_image(levels, self.density_colors()))
+        return target
+
+    def board_levels(self):
+        # The whole board's levels at the current scale, built on first use;
+        # None when zoomed in, unbounded or too big to be worth keeping
+        k = self.cells_per_pixel
+        source = self.source
+        if k == 1 or not source.bounded:
+            return None
+        if self._levels is None or self._levels_k != k or self._levels.shape != (-(-source.rows // k), -(-source.cols // k)):
+            self._levels = None
+            if -(-source.rows // k) * -(-source.cols // k) > self.LEVELS_AREAS * max(1, self.width() * self.height()):
+                return None
+            self._levels = density_levels(source.density(0, source.rows, 0, source.cols, k), k)
+            self._levels_k = k
+        return self._levels
+
+    def update_levels(self, boxes):
+        # Recompute the kept levels of the blocks under a frame's changed boxes,
+        # visible or not; everything changed drops them
+        levels = self._levels
+        if levels is None:
+            return
+        if boxes is None:
+            self._levels = None
+            return
+        k = self._levels_k
+        rows, cols = self.source.rows, self.source.cols
+        for r0, r1, c0, c1 in boxes:
+            r0, c0 = max(0, r0) // k * k, max(0, c0) // k * k
+            r1, c1 = min(rows, r1), min(cols, c1)
+            if r1 > r0 and c1 > c0:
+                counts = self.source.density(r0, r1, c0, c1, k)
+                levels[r0 // k:r0 // k + counts.shape[0], c0 // k:c0 // k + counts.shape[1]] = density_levels(counts, k)
+
+    def render_backing(self):
+        prof = self.profiler
+        start = time.perf_counter() if prof is not None else 0.0
+        dpr = self.devicePixelRatioF()
+        self._backing = QPixmap(self.size() * dpr)
+        self._backing.setDevicePixelRatio(dpr)
+        p = QPainter(self._backing)
+        p.fillRect(self.rect(), self.bg_color)
+        r0, r1, c0, c1 = self.visible_cells()
+        if r1 > r0 and c1 > c0:
+            self.draw_cells(p, r0, r1, c0, c1)
+        p.end()
+        if prof is not None:
+            prof.record("draw", start, time.perf_counter())
+
+    def repaint_cells(self, boxes):
+        # Redraw only the given (r0, r1, c0, c1) boxes into the backing pixmap
+        if self._backing is None or boxes is None:
+            self.invalidate()
+            return
+        vr0, vr1, vc0, vc1 = self.visible_cells()
+        k = self.cells_per_pixel
+        clipped = []
+        for r0, r1, c0, c1 in boxes:
+            if k > 1:
+                # Whole blocks, so each pixel is recomputed from all of its cells
+                r0, c0 = r0 // k * k, c0 // k * k
+                r1, c1 = -(-r1 // k) * k, -(-c1 // k) * k
+            r0, r1 = max(r0, vr0), min(r1, vr1)
+            c0, c1 = max(c0, vc0), min(c1, vc1)
+            if r1 > r0 and c1 > c0:
+                clipped.append((r0, r1, c0, c1))
+        if not clipped:
+            return
+        area = sum((r1 - r0) * (c1 - c0) for r0, r1, c0, c1 in clipped)
+        if area * 2 > (vr1 - vr0) * (vc1 - vc0):
+            self.invalidate()
+            return
+        prof = self.profiler
+        start = time.perf_counter() if prof is not None else 0.0
+        p = QPainter(self._backing)
+        for box in clipped:
+            self.update(self.draw_cells(p, *box))
+        p.end()
+        if prof is not None:
+            prof.record("draw", start, time.perf_counter())
+
     def paintEvent(self, event):
+        prof = self.profiler
+        if prof is not None:
+            section = prof.enter()
+            start = time.perf_counter()
+        if self._backing is None:
+            self.render_backing()
         p = QPainter(self)
-        p.setRenderHint(QPainter.Antialiasing, True)
-        p.fillRect(self.rect(), self.bg_color)
-        
-        # Centering logic
-        grid_w = len(self.grid[0]) * self.cell_size
-        grid_h = len(self.grid) * self.cell_size
-        off_x = (self.width() - grid_w) // 2
-        off_y = (self.height() - grid_h) // 2
-
-        gap = max(1, int(self.cell_size * 0.12))
-        radius = max(2.0, self.cell_size * 0.18)
-        
-        # Only draw if visible
-        for r in range(len(self.grid)):
-            for c in range(len(self.grid[0])):
-                if self.grid[r][c] == 1:
-                    x0 = off_x + c * self.cell_size + gap
-                    y0 = off_y + r * self.cell_size + gap
-                    w = self.cell_size - 2 * gap
-                    h = self.cell_size - 2 * gap
-                    if w > 0 and h > 0:
-                        p.fillRect(x0, y0, w, h, self.alive_color)
-                        if self.cell_size >= 12:
-                            border = QColor(self.alive_color)
-                            border.setAlpha(180)
-                            p.setPen(border)
-                            p.drawRoundedRect(x0, y0, w, h, radius, radius)
+        p.drawPixmap(0, 0, self._backing)
+        if self.hud_lines:
+            self.draw_hud(p)
+        p.end()
+        if prof is not None:
+            prof.record("paint", start, time.perf_counter())
+            prof.leave(section)
+
+    def draw_hud(self, p):
+        # Overlay drawn over the backing pixmap, never into it
+        fm = self.fontMetrics()
+        rect = self._hud_rect
+        p.fillRect(rect, QColor(0, 0, 0, 170))
+        p.setPen(QColor("#f0f6fc"))
+        for i, line in enumerate(self.hud_lines):
+            p.drawText(rect.left() + 8, rect.top() + 6 + fm.ascent() + i * fm.height(), line)
+
+    def set_hud(self, lines):
+        old = self._hud_rect
+        self.hud_lines = lines
+        if lines:
+            fm = self.fontMetrics()
+            width = max(fm.horizontalAdvance(line) for line in lines) + 16
+            self._hud_rect = QRect(8, 8, width, fm.height() * len(lines) + 12)
+        else:
+            self._hud_rect = QRect()
+        self.update(old.united(self._hud_rect))
+
+    def resizeEvent(self, event):
+        self._backing = None
+        super().resizeEvent(event)
+
+    def offsets(self):
+        # Widget pixel of cell (0, 0); with no pan the board is centred
+        scale = self.scale()
+        cy = self.source.rows / 2 + self.pan_r
+        cx = self.source.cols / 2 + self.pan_c
+        return round(self.width() / 2 - cx * scale), round(self.height() / 2 - cy * scale)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            self.toggle_at(event.position())
+            self.start_stroke(event.position())
+        elif event.button() in (Qt.MiddleButton, Qt.RightButton):
+            self._drag = event.position()
 
     def mouseMoveEvent(self, event):
-        if event.buttons() & Qt.LeftButton:
-            self.toggle_at(event.position())
-
-    def toggle_at(self, pos):
-        grid_w = len(self.grid[0]) * self.cell_size
-        grid_h = len(self.grid) * self.cell_size
-        off_x = (self.width() - grid_w) // 2
-        off_y = (self.height() - grid_h) // 2
-
-        c = int(pos.x() - off_x) // self.cell_size
-        r = int(pos.y() - off_y) // self.cell_size
-        if 0 <= r < len(self.grid) and 0 <= c < len(self.grid[0]):
-            self.grid[r][c] = 0 if self.grid[r][c] == 1 else 1
-            self.update()
-    
-    def update_grid(self, grid, cell_size):
-        self.grid = grid
+        if self._drag is not None:
+            pos = event.position()
+            self.pan_by(pos.x() - self._drag.x(), pos.y() - self._drag.y())
+            self._drag = pos
+        elif event.buttons() & Qt.LeftButton:
+            self.extend_stroke(event.position())
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.flush_stroke()
+            self._stroke = None
+        elif event.button() in (Qt.MiddleButton, Qt.RightButton):
+            self._drag = None
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y()
+        if steps:
+            pos = event.position()
+            self.zoom_at(pos.x(), pos.y(), steps > 0)
+
+    def pan_by(self, dx, dy):
+        scale = self.scale()
+        self.pan_c -= dx / scale
+        self.pan_r -= dy / scale
+        self.invalidate()
+
+    def zoom_at(self, x, y, zoom_in):
+        # Keep the cell under (x, y) in place while the scale changes
+        off_x, off_y = self.offsets()
+        scale = self.scale()
+        cell_r, cell_c = (y - off_y) / scale, (x - off_x) / scale
+        if zoom_in:
+            if self.cells_per_pixel > 1:
+                self.cells_per_pixel //= 2
+            else:
+                self.cell_size = min(self.MAX_CELL_SIZE, max(self.cell_size + 1, round(self.cell_size * 1.25)))
+        elif self.cell_size > 1:
+            self.cell_size = max(1, min(self.cell_size - 1, round(self.cell_size / 1.25)))
+        else:
+            self.cells_per_pixel = min(self.MAX_CELLS_PER_PIXEL, self.cells_per_pixel * 2)
+        scale = self.scale()
+        self.pan_r = (self.height() / 2 - y) / scale + cell_r - self.source.rows / 2
+        self.pan_c = (self.width() / 2 - x) / scale + cell_c - self.source.cols / 2
+        self.invalidate()
+        self.zoomed.emit(self.cell_size)
+
+    def reset_view(self):
+        self.pan_r = 0.0
+        self.pan_c = 0.0
+        self.cells_per_pixel = 1
+        self.invalidate()
+
+    def cell_at(self, pos):
+        off_x, off_y = self.offsets()
+        scale = self.scale()
+        return int((pos.y() - off_y) // scale), int((pos.x() - off_x) // scale)
+
+    def start_stroke(self, pos):
+        # Zoomed out a pixel covers many cells, so there is no cell to start on
+        if self.cells_per_pixel > 1:
+            return
+        r, c = self.cell_at(pos)
+        value = self.brush_mode
+        if value is None:
+            inside = not self.source.bounded or (0 <= r < self.source.rows and 0 <= c < self.source.cols)
+            value = 0 if inside and self.source.region(r, r + 1, c, c + 1)[0, 0] else 1
+        self._stroke = {"value": value, "last": (r, c), "points": [([r], [c])]}
+        self.stroke_timer.start()
+
+    def extend_stroke(self, pos):
+        # Mouse events skip cells on a fast drag: the line from the last one fills them in
+        stroke = self._stroke
+        if stroke is None:
+            return
+        r, c = self.cell_at(pos)
+        if (r, c) == stroke["last"]:
+            return
+        rr, cc = line_cells(*stroke["last"], r, c)
+        stroke["points"].append((rr[1:], cc[1:]))
+        stroke["last"] = (r, c)
+        if not self.stroke_timer.isActive():
+            self.stroke_timer.start()
+
+    def flush_stroke(self):
+        stroke = self._stroke
+        if stroke is None or not stroke["points"]:
+            return
+        self.stroke_timer.stop()
+        rr = np.concatenate([np.asarray(p[0], dtype=np.int64) for p in stroke["points"]])
+        cc = np.concatenate([np.asarray(p[1], dtype=np.int64) for p in stroke["points"]])
+        stroke["points"] = []
+        rr, cc = stroke_cells(rr, cc, self.brush_size)
+        self.preview_cells(rr, cc, stroke["value"])
+        self.cells_painted.emit(rr, cc, stroke["value"])
+
+    def preview_cells(self, rr, cc, value):
+        # Paints the stroke into the backing pixmap right away, over the last
+        # frame's cells in its box only; the frame with the edit applied follows
+        if self._backing is None or self.cells_per_pixel > 1:
+            return
+        vr0, vr1, vc0, vc1 = self.visible_cells()
+        inside = (rr >= vr0) & (rr < vr1) & (cc >= vc0) & (cc < vc1)
+        rr, cc = rr[inside], cc[inside]
+        if not len(rr):
+            return
+        r0, r1, c0, c1 = int(rr.min()), int(rr.max()) + 1, int(cc.min()), int(cc.max()) + 1
+        cells = np.array(self.source.region(r0, r1, c0, c1))
+        cells[rr - r0, cc - c0] = value
+        p = QPainter(self._backing)
+        self.update(self.draw_cells(p, r0, r1, c0, c1, cells))
+        p.end()
+
+    def set_source(self, source):
+        old = self.source
+        self.source = source
+        if (old.rows, old.cols) != (source.rows, source.cols):
+            self._levels = None
+            self.invalidate()
+        else:
+            self.update_levels(source.dirty)
+            self.repaint_cells(source.dirty)
+
+    def set_cell_size(self, cell_size, cells_per_pixel=1):
         self.cell_size = cell_size
-        self.update()
+        self.cells_per_pixel = cells_per_pixel
+        self.invalidate()
+
 
+class PatternGallery(QListWidget):
+    # Thumbnails of a PatternLibrary. Items start as bare names; a pattern is
+    # parsed and its icon drawn only once its item scrolls into view
+    chosen = Signal(str)
 
-class PatternPreview(QWidget):
-    def __init__(self, strings, cell_size=12, alive_color="#00e676", bg_color="#121212"):
+    def __init__(self, library, alive_color="#00e676", bg_color="#121212"):
         super().__init__()
-        self.strings = strings
-        self.cell_size = cell_size
-        self.alive_color = QColor(alive_color)
-        self.bg_color = QColor(bg_color)
-        self.rows = len(strings)
-        self.cols = len(strings[0]) if strings else 0
-        self.setFixedSize(self.cols * cell_size, self.rows * cell_size)
+        self.library = library
+        self.table = density_table(QColor(alive_color), QColor(bg_color))
+        self._loaded = set()
+        self.setViewMode(QListView.IconMode)
+        self.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self.setGridSize(QSize(THUMB_SIZE + 56, THUMB_SIZE + 36))
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setWordWrap(True)
+        for name in library.names():
+            self.addItem(QListWidgetItem(name))
+        self.verticalScrollBar().valueChanged.connect(self.load_visible)
+        self.itemDoubleClicked.connect(lambda item: self.chosen.emit(item.text()))
+
+    def load_visible(self, *_):
+        view = self.viewport().rect()
+        for i in range(self.count()):
+            item = self.item(i)
+            if i in self._loaded or not self.visualItemRect(item).intersects(view):
+                continue
+            self._loaded.add(i)
+            name = item.text()
+            try:
+                pattern = self.library.get(name)
+                levels = self.library.thumbnail(name)
+            except (OSError, ValueError) as exc:
+                item.setToolTip(str(exc))
+                continue
+            img = indexed_image(levels, self.table)
+            img = img.scaled(THUMB_SIZE, THUMB_SIZE, Qt.KeepAspectRatio, Qt.FastTransformation)
+            item.setIcon(QIcon(QPixmap.fromImage(img)))
+            item.setToolTip(f"{pattern.height}x{pattern.width}, {pattern.population():,} células")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self.load_visible)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        QTimer.singleShot(0, self.load_visible)
+
+
+class StatsChart(QWidget):
+    # Population, births and deaths of the generations in a StatsRing, as
+    # polylines scaled to the widget. It only reads the ring the engine fills
+    # while stepping: no board is scanned to draw it
+    SERIES = (("population", "#00e676"), ("births", "#58a6ff"), ("deaths", "#f85149"))
+
+    def __init__(self):
+        super().__init__()
+        self.stats = None
+        self.setMinimumHeight(110)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
     def paintEvent(self, event):
         p = QPainter(self)
-        p.fillRect(self.rect(), self.bg_color)
-        for r, row in enumerate(self.strings):
-            for c, ch in enumerate(row):
-                if ch == "#":
-                    x0 = c * self.cell_size
-                    y0 = r * self.cell_size
-                    p.fillRect(x0, y0, self.cell_size, self.cell_size, self.alive_color)
+        p.fillRect(self.rect(), QColor(0, 0, 0, 40))
+        table = None if self.stats is None else self.stats.table()
+        if table is None or len(table) < 2:
+            p.setPen(QColor("#8b949e"))
+            p.drawText(self.rect(), Qt.AlignCenter, "Sin datos")
+            return
+        w, h = self.width(), self.height()
+        # One point per pixel column at most: the newest row of each column
+        index = np.unique(np.linspace(0, len(table) - 1, min(len(table), w)).astype(int))
+        x = index * (w - 1) / (len(table) - 1)
+        for field, color in self.SERIES:
+            values = table[index, STATS_FIELDS.index(field)]
+            known = ~np.isnan(values)
+            if not known.any():
+                continue
+            top = max(1.0, float(values[known].max()))
+            y = (h - 2) - values * (h - 4) / top
+            p.setPen(QColor(color))
+            p.drawPolyline(QPolygonF([QPointF(a, b) for a, b in zip(x[known].tolist(), y[known].tolist())]))
+        p.setPen(QColor("#8b949e"))
+        first, last = int(table[0, 0]), int(table[-1, 0])
+        p.drawText(QRect(4, 2, w - 8, 16), Qt.AlignLeft, f"{first:,}")
+        p.drawText(QRect(4, 2, w - 8, 16), Qt.AlignRight, f"{last:,}")
 
 
 class GameOfLifeWindow(QMainWindow):
-    def __init__(self, rows=50, cols=80, cell_size=12):
+    def __init__(
+        self, rows=50, cols=80, cell_size=12, engine="NumPy", workers=None, patterns_dir=PATTERNS_DIR, threads=None
+    ):
         super().__init__()
         self.rows = rows
         self.cols = cols
         self.cell_size = cell_size
-        self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
         self.running = False
         self.delay_ms = 100
+        self.turbo = False
         self.wrap = False
+        self.engine_name = engine
+        self.workers = workers or os.cpu_count() or 1
+        self.rule = CONWAY
+        # Every tab's simulation runs on these threads, in turns
+        self.pool = SessionPool(threads)
+        self.sim = Simulation(
+            self.new_engine(self.engine_name, self.rows, self.cols), delay=self.delay_ms / 1000, pool=self.pool
+        )
+        self.sim.set_history(History(HISTORY_BYTES))
         self.dark_mode = True
         self.density = 20
         self.auto_fit = True
-        self.palettes = {
-            "Verde": "#00e676",
-            "Azul": "#2196f3",
-            "Magenta": "#e91e63",
-            "Naranja": "#ff9800",
-        }
+        self.palettes = dict(PALETTES)
         self.current_palette = "Verde"
+        # Performance HUD and profiling hooks; None keeps instrumentation off
+        self.profiler = None
+        self._hud_due = 0.0
+        # Generations the simulation ran past without a frame, for the label and HUD
+        self.shown_generation = 0
+        self.skipped = 0
+        self._gen_rate = deque(maxlen=64)
 
         self.setWindowTitle("Juego de la Vida de Conway")
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.tick)
-
-        self.board = GridWidget(self.grid, self.cell_size)
+        # Repaint timer: the simulation runs on its own thread, this only picks up frames
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.consume_frame)
+        self.frame_timer.start(16)
+
+        self.board = self.make_board(self.sim.latest())
+
+        # One tab per board. Only the current one is watched and painted; the
+        # others keep stepping at their own speed without taking snapshots
+        self.tabs = QTabWidget()
+        self.tabs.setDocumentMode(True)
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.addTab(self.board, "Tablero 1")
+        self.tabs.currentChanged.connect(self.on_tab_change)
+        self.tabs.tabCloseRequested.connect(self.close_session)
+        self.session = {}
+        self.sessions = [self.session]
+        self._session_count = 1
+        btn_new = QPushButton("Nuevo")
+        btn_new.setToolTip("Tablero vacío con los ajustes del actual")
+        btn_new.clicked.connect(lambda: self.new_session())
+        btn_duplicate = QPushButton("Duplicar")
+        btn_duplicate.setToolTip("Copia del tablero actual, para compararlos en paralelo")
+        btn_duplicate.clicked.connect(self.duplicate_session)
+        corner_layout = QHBoxLayout()
+        corner_layout.setContentsMargins(0, 0, 8, 0)
+        corner_layout.addWidget(btn_new)
+        corner_layout.addWidget(btn_duplicate)
+        corner = QWidget()
+        corner.setLayout(corner_layout)
+        self.tabs.setCornerWidget(corner, Qt.TopRightCorner)
 
         self.btn_play = QPushButton("Iniciar")
         self.btn_play.clicked.connect(self.toggle_run)
@@ -148,22 +690,146 @@ class GameOfLifeWindow(QMainWindow):
         self.btn_step = QPushButton("Paso")
         self.btn_step.clicked.connect(self.step_once)
 
+        self.gen_label = QLabel("Generación 0")
+        self.status_label = QLabel("")
+        self.skip_label = QLabel("")
+        self.cycle_label = QLabel("")
+        self.jump_spin = QSpinBox()
+        self.jump_spin.setRange(1, 1_000_000_000)
+        self.jump_spin.setValue(100)
+        self.btn_jump = QPushButton("Avanzar N")
+        self.btn_jump.clicked.connect(self.jump_generations)
+        self.pow_spin = QSpinBox()
+        self.pow_spin.setRange(0, 62)
+        self.pow_spin.setValue(10)
+        self.pow_spin.setPrefix("2^")
+        self.btn_jump_pow = QPushButton("Avanzar 2^k")
+        self.btn_jump_pow.clicked.connect(self.jump_pow2)
+
         self.btn_clear = QPushButton("Limpiar")
         self.btn_clear.clicked.connect(self.clear)
 
         self.btn_rand = QPushButton("Aleatorio")
         self.btn_rand.clicked.connect(self.randomize)
+        self.density_spin = QSpinBox()
+        self.density_spin.setRange(1, 100)
+        self.density_spin.setValue(self.density)
+        self.density_spin.setSuffix(" %")
+        self.density_spin.setToolTip("Proporción de células vivas de 'Aleatorio'")
+        self.density_spin.valueChanged.connect(self.on_density_change)
+        # The minimum stands for "no seed": a different board every time
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setRange(-1, 2_147_483_647)
+        self.seed_spin.setValue(-1)
+        self.seed_spin.setSpecialValueText("Sin semilla")
+        self.seed_spin.setToolTip("Con la misma semilla y densidad, 'Aleatorio' repite el mismo tablero")
+        # Mouse brush: what a stroke does to the cells it covers, and how wide it is
+        self.brush_combo = QComboBox()
+        self.brush_combo.addItems(BRUSH_MODES)
+        self.brush_combo.setToolTip("Alternar pone todo el trazo al contrario de la primera célula")
+        self.brush_combo.currentTextChanged.connect(self.on_brush_change)
+        self.brush_spin = QSpinBox()
+        self.brush_spin.setRange(1, MAX_BRUSH)
+        self.brush_spin.setSuffix(" cél.")
+        self.brush_spin.setToolTip("Diámetro del pincel")
+        self.brush_spin.valueChanged.connect(self.on_brush_change)
         self.btn_fill = QPushButton("Rellenar")
         self.btn_fill.clicked.connect(self.fill_all)
+        self.btn_save = QPushButton("Guardar…")
+        self.btn_save.clicked.connect(self.save_board)
+        self.btn_open = QPushButton("Abrir…")
+        self.btn_open.clicked.connect(self.open_board)
+        self.btn_record = QPushButton("Grabar")
+        self.btn_record.setCheckable(True)
+        self.btn_record.toggled.connect(self.on_record_toggle)
+        self.recorder = None
+        # Animation export: simulates a copy of the board off the GUI thread
+        self.btn_animation = QPushButton("Animación…")
+        self.btn_animation.setCheckable(True)
+        self.btn_animation.toggled.connect(self.on_animation_toggle)
+        self.animation = None
+        self.animation_timer = QTimer(self)
+        self.animation_timer.timeout.connect(self.poll_animation)
+
+        # Timeline over the generations the simulation's History keeps
+        self.history_check = QCheckBox("Historial")
+        self.history_check.setChecked(True)
+        self.history_check.stateChanged.connect(self.on_history_change)
+        self.history_cap_spin = QSpinBox()
+        self.history_cap_spin.setRange(8, 8192)
+        self.history_cap_spin.setValue(HISTORY_BYTES >> 20)
+        self.history_cap_spin.setSuffix(" MB")
+        self.history_cap_spin.valueChanged.connect(self.on_history_cap_change)
+        self.timeline = QSlider(Qt.Horizontal)
+        self.timeline.setRange(0, 0)
+        self.timeline.valueChanged.connect(self.on_timeline_change)
+        self.history_label = QLabel("")
+        self._timeline_sync = False
+        self._seek_target = None
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setSingleShot(True)
+        self.seek_timer.timeout.connect(self.seek)
+
+        # Per-generation figures the engine records while stepping
+        self.stats_check = QCheckBox("Estadísticas")
+        self.stats_check.stateChanged.connect(self.on_stats_change)
+        self.stats_chart = StatsChart()
+        self.stats_label = QLabel("")
+        self.btn_stats_export = QPushButton("Exportar…")
+        self.btn_stats_export.clicked.connect(self.export_stats)
+        self._stats_due = 0.0
 
         self.speed_label = QLabel("Velocidad")
         self.speed_slider = QSlider(Qt.Horizontal)
-        self.speed_slider.setRange(20, 400)
+        # Below one frame (~16 ms) several generations run per repaint
+        self.speed_slider.setRange(1, 400)
         self.speed_slider.setValue(self.delay_ms)
         self.speed_slider.valueChanged.connect(self.on_speed_change)
 
         self.wrap_check = QCheckBox("Envoltura")
         self.wrap_check.stateChanged.connect(self.on_wrap_change)
+        self.turbo_check = QCheckBox("Turbo")
+        self.turbo_check.setToolTip("Máxima velocidad: ignora el intervalo y muestra unos pocos cuadros por segundo")
+        self.turbo_check.stateChanged.connect(self.on_turbo_change)
+
+        # What to do once the board repeats an earlier state
+        self.cycle_actions = {"Ignorar": None, "Avisar": "report", "Pausar": "pause", "Saltar": "skip"}
+        self.cycle_combo = QComboBox()
+        self.cycle_combo.addItems(list(self.cycle_actions))
+        self.cycle_combo.setToolTip("Al repetirse el tablero (estable u oscilador): avisar, pausar o saltar el ciclo sin recalcularlo")
+        self.cycle_combo.currentTextChanged.connect(self.on_cycle_action_change)
+
+        # Presets carry their rulestring; any other B/S string can be typed in
+        self.rule_combo = QComboBox()
+        self.rule_combo.setEditable(True)
+        self.rule_combo.setInsertPolicy(QComboBox.NoInsert)
+        for name, rulestring in RULES.items():
+            self.rule_combo.addItem(f"{name} ({rulestring})", rulestring)
+        self.rule_combo.setToolTip("Regla B/S: elige una o escribe otra (p. ej. B36/S23) y pulsa Intro")
+        self.rule_combo.activated.connect(self.on_rule_entered)
+        self.rule_combo.lineEdit().returnPressed.connect(self.on_rule_entered)
+
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(list(ENGINES.keys()))
+        self.engine_combo.setCurrentText(self.engine_name)
+        self.engine_combo.currentTextChanged.connect(self.on_engine_change)
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(256, self.workers))
+        self.workers_spin.setValue(self.workers)
+        self.workers_spin.valueChanged.connect(self.on_workers_change)
+
+        self.perf_check = QCheckBox("Rendimiento")
+        self.perf_check.stateChanged.connect(self.on_perf_change)
+        self.btn_trace = QPushButton("Grabar traza")
+        self.btn_trace.setCheckable(True)
+        self.btn_trace.toggled.connect(self.on_trace_toggle)
+        self.profile_spin = QSpinBox()
+        self.profile_spin.setRange(1, 100_000)
+        self.profile_spin.setValue(300)
+        self.profile_spin.setSuffix(" ticks")
+        self.btn_profile = QPushButton("Perfilar")
+        self.btn_profile.clicked.connect(self.start_profile)
 
         self.dark_check = QCheckBox("Oscuro")
         self.dark_check.setChecked(True)
@@ -173,80 +839,22 @@ class GameOfLifeWindow(QMainWindow):
         self.fit_check.setChecked(True)
         self.fit_check.stateChanged.connect(self.on_fit_change)
 
+        self.btn_center = QPushButton("Centrar vista")
+        self.btn_center.clicked.connect(self.center_view)
+
         self.palette_combo = QComboBox()
         self.palette_combo.addItems(list(self.palettes.keys()))
         self.palette_combo.currentIndexChanged.connect(self.on_theme_change)
 
         self.patterns_combo = QComboBox()
-        self.patterns = {
-            "Glider": [
-                ".#.",
-                "..#",
-                "###",
-            ],
-            "Pulsar": [
-                "..###...###..",
-                "............",
-                "#....#.#....#",
-                "#....#.#....#",
-                "#....#.#....#",
-                "..###...###..",
-                "............",
-                "..###...###..",
-                "#....#.#....#",
-                "#....#.#....#",
-                "#....#.#....#",
-                "............",
-                "..###...###..",
-            ],
-            "Spaceship (LWSS)": [
-                ".#..#",
-                "#....",
-                "#...#",
-                "####.",
-            ],
-            "Blinker": [
-                "###",
-            ],
-            "Toad": [
-                ".###",
-                "###.",
-            ],
-            "Beacon": [
-                "##..",
-                "##..",
-                "..##",
-                "..##",
-            ],
-            "Block": [
-                "##",
-                "##",
-            ],
-            "Boat": [
-                "#..",
-                ".##",
-                ".#.",
-            ],
-            "Loaf": [
-                ".##.",
-                "#..#",
-                ".#.#",
-                "..#.",
-            ],
-            "Tub": [
-                ".#.",
-                "#.#",
-                ".#.",
-            ],
-            "Pentomino R": [
-                "..#",
-                ".##",
-                ".#.",
-            ],
-        }
-        self.patterns_combo.addItems(list(self.patterns.keys()))
+        self.library = PatternLibrary(patterns_dir)
+        self.patterns_combo.addItems(self.library.names())
         self.btn_insert = QPushButton("Insertar")
         self.btn_insert.clicked.connect(self.insert_selected_pattern)
+        self.btn_import = QPushButton("Importar…")
+        self.btn_import.clicked.connect(self.import_pattern)
+        self.btn_export = QPushButton("Exportar…")
+        self.btn_export.clicked.connect(self.export_pattern)
         self.btn_info = QPushButton("Info")
         self.btn_info.clicked.connect(self.show_info)
 
@@ -287,8 +895,51 @@ class GameOfLifeWindow(QMainWindow):
         row_play.addWidget(self.btn_step)
         grp_play.addLayout(row_play)
         grp_play.addWidget(self.btn_clear)
+        grp_play.addWidget(self.gen_label)
+        grp_play.addWidget(self.status_label)
+        grp_play.addWidget(self.skip_label)
+        grp_play.addWidget(self.cycle_label)
+
+        row_jump = QHBoxLayout()
+        row_jump.addWidget(self.jump_spin)
+        row_jump.addWidget(self.btn_jump)
+        grp_play.addLayout(row_jump)
+
+        row_pow = QHBoxLayout()
+        row_pow.addWidget(self.pow_spin)
+        row_pow.addWidget(self.btn_jump_pow)
+        grp_play.addLayout(row_pow)
         sidebar.addLayout(grp_play)
 
+        # Group: History
+        grp_hist = QVBoxLayout()
+        grp_hist.setSpacing(8)
+        lbl_hist = QLabel("Historial")
+        lbl_hist.setObjectName("header")
+        grp_hist.addWidget(lbl_hist)
+        grp_hist.addWidget(self.timeline)
+        grp_hist.addWidget(self.history_label)
+        row_hist = QHBoxLayout()
+        row_hist.addWidget(self.history_check)
+        row_hist.addWidget(QLabel("Máx."))
+        row_hist.addWidget(self.history_cap_spin)
+        grp_hist.addLayout(row_hist)
+        sidebar.addLayout(grp_hist)
+
+        # Group: Statistics
+        grp_stats = QVBoxLayout()
+        grp_stats.setSpacing(8)
+        lbl_stats = QLabel("Estadísticas")
+        lbl_stats.setObjectName("header")
+        grp_stats.addWidget(lbl_stats)
+        grp_stats.addWidget(self.stats_chart)
+        grp_stats.addWidget(self.stats_label)
+        row_stats = QHBoxLayout()
+        row_stats.addWidget(self.stats_check)
+        row_stats.addWidget(self.btn_stats_export)
+        grp_stats.addLayout(row_stats)
+        sidebar.addLayout(grp_stats)
+
         # Group: Generation
         grp_gen = QVBoxLayout()
         grp_gen.setSpacing(8)
@@ -300,6 +951,23 @@ class GameOfLifeWindow(QMainWindow):
         row_gen.addWidget(self.btn_rand)
         row_gen.addWidget(self.btn_fill)
         grp_gen.addLayout(row_gen)
+        row_seed = QHBoxLayout()
+        row_seed.addWidget(QLabel("Densidad"))
+        row_seed.addWidget(self.density_spin)
+        row_seed.addWidget(QLabel("Semilla"))
+        row_seed.addWidget(self.seed_spin)
+        grp_gen.addLayout(row_seed)
+        row_brush = QHBoxLayout()
+        row_brush.addWidget(QLabel("Pincel"))
+        row_brush.addWidget(self.brush_combo)
+        row_brush.addWidget(self.brush_spin)
+        grp_gen.addLayout(row_brush)
+        row_file = QHBoxLayout()
+        row_file.addWidget(self.btn_save)
+        row_file.addWidget(self.btn_open)
+        row_file.addWidget(self.btn_record)
+        grp_gen.addLayout(row_file)
+        grp_gen.addWidget(self.btn_animation)
         
         sidebar.addLayout(grp_gen)
 
@@ -315,8 +983,27 @@ class GameOfLifeWindow(QMainWindow):
         
         row_checks = QHBoxLayout()
         row_checks.addWidget(self.wrap_check)
+        row_checks.addWidget(self.turbo_check)
         row_checks.addWidget(self.fit_check)
         grp_set.addLayout(row_checks)
+        grp_set.addWidget(QLabel("Motor"))
+        grp_set.addWidget(self.engine_combo)
+        grp_set.addWidget(QLabel("Regla"))
+        grp_set.addWidget(self.rule_combo)
+        row_workers = QHBoxLayout()
+        row_workers.addWidget(QLabel("Procesos"))
+        row_workers.addWidget(self.workers_spin)
+        grp_set.addLayout(row_workers)
+        row_cycles = QHBoxLayout()
+        row_cycles.addWidget(QLabel("Ciclos"))
+        row_cycles.addWidget(self.cycle_combo)
+        grp_set.addLayout(row_cycles)
+        grp_set.addWidget(self.perf_check)
+        grp_set.addWidget(self.btn_trace)
+        row_profile = QHBoxLayout()
+        row_profile.addWidget(self.profile_spin)
+        row_profile.addWidget(self.btn_profile)
+        grp_set.addLayout(row_profile)
         
         sidebar.addLayout(grp_set)
 
@@ -330,6 +1017,7 @@ class GameOfLifeWindow(QMainWindow):
         grp_app.addWidget(QLabel("Paleta"))
         grp_app.addWidget(self.palette_combo)
         grp_app.addWidget(self.dark_check)
+        grp_app.addWidget(self.btn_center)
         sidebar.addLayout(grp_app)
 
         # Group: Patterns
@@ -341,6 +1029,10 @@ class GameOfLifeWindow(QMainWindow):
         
         grp_pat.addWidget(self.patterns_combo)
         grp_pat.addWidget(self.btn_insert)
+        row_files = QHBoxLayout()
+        row_files.addWidget(self.btn_import)
+        row_files.addWidget(self.btn_export)
+        grp_pat.addLayout(row_files)
         sidebar.addLayout(grp_pat)
 
         # Footer
@@ -357,7 +1049,7 @@ class GameOfLifeWindow(QMainWindow):
         main_area_layout.setContentsMargins(0, 0, 0, 0)
         main_area_layout.setSpacing(0)
         main_area_layout.addWidget(self.header_widget)
-        main_area_layout.addWidget(self.board, stretch=1)
+        main_area_layout.addWidget(self.tabs, stretch=1)
         
         self.main_area = QWidget()
         self.main_area.setLayout(main_area_layout)
@@ -372,9 +1064,118 @@ class GameOfLifeWindow(QMainWindow):
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
+        self.save_session()
         self.apply_theme()
         self.apply_styles()
 
+    def make_board(self, frame):
+        board = GridWidget(frame, self.cell_size)
+        board.cells_painted.connect(self.paint_cells)
+        board.zoomed.connect(self.on_board_zoom)
+        return board
+
+    def save_session(self):
+        self.session.update((name, getattr(self, name)) for name in SESSION_FIELDS)
+
+    def load_session(self, session):
+        for name in SESSION_FIELDS:
+            setattr(self, name, session[name])
+        self.session = session
+
+    def new_session(self, board=None):
+        # A tab with the current board's settings, empty or with `board` (a BoardFile)
+        self.save_session()
+        engine = self.new_engine(self.engine_name, self.rows, self.cols)
+        if board is not None:
+            board.restore(engine)
+        sim = Simulation(engine, delay=self.delay_ms / 1000, pool=self.pool)
+        sim.set_turbo(self.turbo)
+        sim.set_cycle_action(self.cycle_actions[self.cycle_combo.currentText()])
+        if self.history_check.isChecked():
+            sim.set_history(History(self.history_cap_spin.value() << 20))
+        if self.stats_check.isChecked():
+            sim.set_stats(StatsRing())
+        session = dict(self.session)
+        session.update(
+            sim=sim, board=self.make_board(sim.latest()), running=False, recorder=None,
+            shown_generation=engine.generation, skipped=0, _gen_rate=deque(maxlen=64),
+        )
+        session["board"].set_colors(*theme_colors(self.current_palette, self.dark_mode))
+        self.sessions.append(session)
+        self._session_count += 1
+        self.tabs.addTab(session["board"], f"Tablero {self._session_count}")
+        self.tabs.setCurrentWidget(session["board"])
+
+    def duplicate_session(self):
+        boards = []
+        self.sim.submit(lambda e: boards.append(BoardFile(np.array(e.packed()), e.cols, e.rule, e.wrap, e.generation)))
+        self.sim.wait_idle()
+        self.new_session(boards[0])
+
+    def on_tab_change(self, index):
+        board = self.tabs.widget(index)
+        session = next((s for s in self.sessions if s["board"] is board), None)
+        if session is None or session is self.session:
+            return
+        # The board going out of sight keeps running, just without frames
+        self.sim.set_watched(False)
+        self.sim.profiler = None
+        self.board.profiler = None
+        self.board.set_hud(None)
+        self.save_session()
+        self.load_session(session)
+        self.sim.set_watched(True)
+        self.set_profiler(self.profiler)
+        self.on_brush_change()
+        self.sync_controls()
+        self.fit_board()
+
+    def sync_controls(self):
+        # The sidebar shows the current board's settings without sending them back to it
+        sim = self.sim
+        action = sim.cycle_action if sim.cycles is not None else None
+        widgets = (
+            self.speed_slider, self.turbo_check, self.wrap_check, self.engine_combo, self.workers_spin,
+            self.cycle_combo, self.history_check, self.history_cap_spin, self.stats_check, self.btn_record,
+        )
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.speed_slider.setValue(self.delay_ms)
+        self.speed_slider.setEnabled(not self.turbo)
+        self.turbo_check.setChecked(self.turbo)
+        self.wrap_check.setChecked(self.wrap)
+        self.engine_combo.setCurrentText(self.engine_name)
+        self.workers_spin.setValue(self.workers)
+        self.cycle_combo.setCurrentText(next(k for k, v in self.cycle_actions.items() if v == action))
+        self.history_check.setChecked(sim.history is not None)
+        if sim.history is not None:
+            self.history_cap_spin.setValue(sim.history.cap >> 20)
+        self.stats_check.setChecked(sim.stats is not None)
+        self.btn_record.setChecked(self.recorder is not None)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.timeline.setEnabled(sim.history is not None)
+        self.btn_play.setText("Pausar" if self.running else "Iniciar")
+        self.show_rule()
+        self.skip_label.setText("")
+        self.cycle_label.setText("")
+        self.stats_chart.stats = sim.stats
+        self.stats_chart.update()
+        self.stats_label.setText("")
+        self._stats_due = 0.0
+
+    def close_session(self, index):
+        if self.tabs.count() == 1:
+            return
+        board = self.tabs.widget(index)
+        session = next(s for s in self.sessions if s["board"] is board)
+        if session is self.session:
+            self.tabs.setCurrentIndex(index - 1 if index else 1)
+        self.tabs.removeTab(self.tabs.indexOf(board))
+        self.sessions.remove(session)
+        session["sim"].close()
+        board.deleteLater()
+
     def toggle_sidebar(self):
         visible = self.sidebar_widget.isVisible()
         self.sidebar_widget.setVisible(not visible)
@@ -382,11 +1183,129 @@ class GameOfLifeWindow(QMainWindow):
 
     def on_speed_change(self, value):
         self.delay_ms = int(value)
-        if self.running:
-            self.timer.setInterval(self.delay_ms)
+        self.sim.set_delay(self.delay_ms / 1000)
+
+    def on_cycle_action_change(self, text):
+        self.sim.set_cycle_action(self.cycle_actions[text])
+        self.cycle_label.setText("")
+
+    def on_turbo_change(self, state):
+        self.turbo = self.turbo_check.isChecked()
+        self.speed_slider.setEnabled(not self.turbo)
+        self.sim.set_turbo(self.turbo)
 
     def on_wrap_change(self, state):
-        self.wrap = state == Qt.Checked
+        self.wrap = self.wrap_check.isChecked()
+        wrap = self.wrap
+        self.sim.submit(lambda e: setattr(e, "wrap", wrap))
+
+    def new_engine(self, name, rows, cols, rule=None):
+        engine = create_engine(name, rows, cols, wrap=self.wrap)
+        if hasattr(engine, "set_workers"):
+            engine.set_workers(self.workers)
+        engine.set_rule(rule or self.rule)
+        return engine
+
+    def on_engine_change(self, name):
+        self.engine_name = name
+        if self.rule.b0 and not ENGINES[name].bounded:
+            self.statusBar().showMessage(f"{name} no admite reglas con B0; se vuelve a Conway", 8000)
+            self.set_rule(CONWAY)
+        rule = self.rule
+
+        def swap(old):
+            new = self.new_engine(name, old.rows, old.cols, rule)
+            new.load_array(old.to_array())
+            new.generation = old.generation
+            return new
+
+        self.sim.submit(swap)
+
+    def on_rule_entered(self, *_):
+        text = self.rule_combo.currentText()
+        index = self.rule_combo.findText(text)
+        try:
+            rule = parse_rule(self.rule_combo.itemData(index) if index >= 0 else text)
+            if rule.b0 and not ENGINES[self.engine_name].bounded:
+                raise ValueError(f"{self.engine_name} no admite reglas con B0 (usa un motor acotado)")
+        except ValueError as exc:
+            self.statusBar().showMessage(str(exc), 8000)
+            self.show_rule()
+            return
+        self.set_rule(rule)
+
+    def set_rule(self, rule):
+        self.rule = rule
+        self.show_rule()
+        self.sim.submit(lambda e: e.set_rule(rule))
+
+    def show_rule(self):
+        index = self.rule_combo.findData(self.rule.rulestring)
+        if index >= 0:
+            self.rule_combo.setCurrentIndex(index)
+        else:
+            self.rule_combo.setEditText(self.rule.rulestring)
+
+    def on_workers_change(self, value):
+        self.workers = int(value)
+        workers = self.workers
+
+        def apply(e):
+            if hasattr(e, "set_workers"):
+                e.set_workers(workers)
+
+        self.sim.submit(apply)
+
+    def on_perf_change(self, state):
+        if self.perf_check.isChecked():
+            self.set_profiler(Profiler())
+        else:
+            self.btn_trace.setChecked(False)
+            self.set_profiler(None)
+
+    def set_profiler(self, profiler):
+        self.profiler = profiler
+        self.sim.profiler = profiler
+        self.board.profiler = profiler
+        if profiler is None:
+            self.board.set_hud(None)
+
+    def on_trace_toggle(self, checked):
+        if checked:
+            self.perf_check.setChecked(True)
+            self.profiler.start_trace()
+        elif self.profiler is not None and self.profiler.trace is not None:
+            path = time.strftime("traza_%Y%m%d_%H%M%S.json")
+            n = self.profiler.stop_trace(path)
+            self.statusBar().showMessage(f"Traza guardada en {path} ({n:,} eventos)", 8000)
+
+    def start_profile(self):
+        # cProfile of the simulation thread and the GUI thread for the next N frame ticks
+        self.perf_check.setChecked(True)
+        path = time.strftime("perfil_%Y%m%d_%H%M%S.prof")
+        self.profiler.capture(self.profile_spin.value(), path)
+
+    def hud_lines(self, frame):
+        prof = self.profiler
+        if not self.running:
+            target = "en pausa"
+        elif self.turbo:
+            target = "turbo"
+        else:
+            target = f"objetivo {1000 / self.delay_ms:.1f}"
+        lines = [
+            f"Motor {self.sim.engine.name}",
+            f"Gen/s {self.generation_rate():,.1f} ({target}) · saltadas/cuadro {self.skipped:,}",
+            f"Paso {prof.mean_ms('step'):.2f} ms · instantánea {prof.mean_ms('snapshot'):.2f} ms",
+            f"Dibujo {prof.mean_ms('draw'):.2f} ms · pintado {prof.mean_ms('paint'):.2f} ms",
+            f"Cuadros/s {prof.rate('frame'):.0f} · hilo UI {prof.busy(('frame', 'paint')):.0%} ocupado",
+            f"Población {frame.population():,}",
+        ]
+        if prof.capturing():
+            lines.append("Perfilando…")
+        if prof.trace is not None:
+            lines.append(f"Grabando traza ({len(prof.trace):,} eventos)")
+        return lines
 
     def on_theme_change(self, *_):
         self.current_palette = self.palette_combo.currentText()
@@ -397,12 +1316,22 @@ class GameOfLifeWindow(QMainWindow):
         self.density = int(value)
 
     def on_fit_change(self, state):
-        self.auto_fit = state == Qt.Checked
+        self.auto_fit = self.fit_check.isChecked()
+        if self.auto_fit:
+            self.center_view()
+
+    def on_board_zoom(self, cell_size):
+        # Zooming by hand takes over from auto-fit
+        self.cell_size = cell_size
+        self.fit_check.setChecked(False)
+
+    def center_view(self):
+        self.board.reset_view()
+        self.fit_board()
 
     def apply_theme(self):
-        alive = self.palettes.get(self.current_palette, "#00e676")
-        bg = "#121212" if self.dark_mode else "#ffffff"
-        self.board.set_colors(alive, bg)
+        for session in self.sessions:
+            session["board"].set_colors(*theme_colors(self.current_palette, self.dark_mode))
 
     def apply_styles(self):
         if self.dark_mode:
@@ -427,6 +1356,8 @@ class GameOfLifeWindow(QMainWindow):
                 }
                 QCheckBox { color: #c9d1d9; spacing: 8px; }
                 QLabel { color: #8b949e; }
+                QTabBar::tab { background: #161b22; color: #8b949e; padding: 6px 14px; border-bottom: 2px solid transparent; }
+                QTabBar::tab:selected { color: #f0f6fc; border-bottom-color: #58a6ff; }
             """)
         else:
             self.setStyleSheet("""
@@ -450,100 +1381,369 @@ class GameOfLifeWindow(QMainWindow):
                 }
                 QCheckBox { color: #24292f; spacing: 8px; }
                 QLabel { color: #57606a; }
+                QTabBar::tab { background: #f6f8fa; color: #57606a; padding: 6px 14px; border-bottom: 2px solid transparent; }
+                QTabBar::tab:selected { color: #24292f; border-bottom-color: #0969da; }
             """)
     def toggle_run(self):
         self.running = not self.running
         self.btn_play.setText("Pausar" if self.running else "Iniciar")
         if self.running:
-            self.timer.start(self.delay_ms)
+            self.sim.play()
         else:
-            self.timer.stop()
+            self.sim.pause()
 
     def clear(self):
-        for r in range(self.rows):
-            for c in range(self.cols):
-                self.grid[r][c] = 0
-        self.board.update()
+        self.sim.submit(lambda e: e.clear())
 
     def randomize(self):
-        for r in range(self.rows):
-            for c in range(self.cols):
-                self.grid[r][c] = 1 if random.random() < 0.2 else 0
-        self.board.update()
+        density = self.density / 100
+        seed = self.seed_spin.value()
+        seed = None if seed < 0 else seed
+        self.sim.submit(lambda e: e.randomize(density, seed))
 
     def fill_all(self):
-        for r in range(self.rows):
-            for c in range(self.cols):
-                self.grid[r][c] = 1
-        self.board.update()
+        self.sim.submit(lambda e: e.fill())
 
     def step_once(self):
-        self.grid = self.next_state(self.grid)
-        self.board.grid = self.grid
-        self.board.update()
-
-    def tick(self):
-        self.grid = self.next_state(self.grid)
-        self.board.grid = self.grid
-        self.board.update()
-
-    def next_state(self, grid):
-        rows = self.rows
-        cols = self.cols
-        new_grid = [[0 for _ in range(cols)] for _ in range(rows)]
-        for r in range(rows):
-            for c in range(cols):
-                n = 0
-                for dr in (-1, 0, 1):
-                    for dc in (-1, 0, 1):
-                        if dr == 0 and dc == 0:
-                            continue
-                        rr = r + dr
-                        cc = c + dc
-                        if self.wrap:
-                            rr = (rr + rows) % rows
-                            cc = (cc + cols) % cols
-                            n += grid[rr][cc]
-                        else:
-                            if 0 <= rr < rows and 0 <= cc < cols:
-                                n += grid[rr][cc]
-                if grid[r][c] == 1:
-                    new_grid[r][c] = 1 if n == 2 or n == 3 else 0
-                else:
-                    new_grid[r][c] = 1 if n == 3 else 0
-        return new_grid
-
-    def pattern_offsets(self, strings):
-        offs = []
-        for r, row in enumerate(strings):
-            for c, ch in enumerate(row):
-                if ch == "#":
-                    offs.append((r, c))
-        return offs
+        self.sim.submit(lambda e: e.step())
+
+    def on_brush_change(self, *_):
+        self.board.brush_mode = BRUSH_MODES[self.brush_combo.currentText()]
+        self.board.brush_size = self.brush_spin.value()
+
+    def paint_cells(self, rr, cc, value):
+        # One callable per batch: the simulation applies a stroke between two generations, never halfway
+        self.sim.submit(lambda e: e.paint(rr, cc, value))
+
+    def jump_generations(self):
+        n = self.jump_spin.value()
+        self.sim.submit(lambda e: e.advance(n))
+
+    def jump_pow2(self):
+        k = self.pow_spin.value()
+        self.sim.submit(lambda e: e.advance_pow2(k))
+
+    def consume_frame(self):
+        prof = self.profiler
+        if prof is not None:
+            section = prof.enter()
+            start = time.perf_counter()
+        frame = self.sim.latest()
+        if frame is not None:
+            self.update_status(frame)
+            self.board.set_source(frame)
+            self.update_stats()
+        if prof is None:
+            return
+        if frame is not None:
+            prof.record("frame", start, time.perf_counter())
+        prof.leave(section)
+        prof.tick()
+        for path in prof.take_written():
+            self.statusBar().showMessage(f"Perfil guardado en {path} (python -m pstats {path})", 8000)
+        # The HUD text (population included) refreshes a few times a second
+        now = time.perf_counter()
+        if now >= self._hud_due:
+            self._hud_due = now + 0.25
+            self.board.set_hud(self.hud_lines(self.board.source))
+
+    def generation_rate(self, window=1.0):
+        # From frame generation numbers: steps no longer map one-to-one onto frames
+        now = time.perf_counter()
+        recent = [(t, g) for t, g in self._gen_rate if t >= now - window]
+        if len(recent) < 2 or recent[-1][1] <= recent[0][1]:
+            return 0.0
+        return (recent[-1][1] - recent[0][1]) / max(now - recent[0][0], 1e-3)
+
+    def update_status(self, frame):
+        gen = frame.generation
+        # Generations stepped but never shown while playing (a jump counts once)
+        if self.running and gen > self.shown_generation:
+            self.skipped = gen - self.shown_generation - 1
+            self._gen_rate.append((time.perf_counter(), gen))
+        else:
+            self.skipped = 0
+        self.shown_generation = gen
+        self.gen_label.setText(f"Generación {gen:,}")
+        self.skip_label.setText(f"Saltadas por cuadro {self.skipped:,}" if self.skipped else "")
+        self.cycle_label.setText(self.cycle_text(frame))
+        self.status_label.setText(frame.status)
+        self.update_timeline(gen)
+        # The simulation pauses itself on a cycle when asked to
+        if self.running and not self.sim.running:
+            self.running = False
+            self.btn_play.setText("Iniciar")
+        # Going back in the history also brings back the rule of that time
+        rule = self.sim.engine.rule
+        if rule != self.rule:
+            self.rule = rule
+            self.show_rule()
+        self.rows, self.cols = frame.rows, frame.cols
+
+    def cycle_text(self, frame):
+        cycles = self.sim.cycles
+        cycle = cycles.cycle if cycles is not None else None
+        if cycle is None:
+            return ""
+        start, period = cycle
+        if period == 1:
+            state = "Extinción" if frame.population() == 0 else "Estable"
+            return f"{state} desde la generación {start:,}"
+        return f"Ciclo de periodo {period} desde la generación {start:,}"
+
+    def update_timeline(self, gen):
+        history = self.sim.history
+        if history is None:
+            self.history_label.setText("")
+            return
+        first, last, nbytes, points = history.summary()
+        self._timeline_sync = True
+        self.timeline.setRange(first or 0, max(last or 0, gen))
+        # Leave the handle alone while it's being dragged
+        if not self.timeline.isSliderDown() and not self.seek_timer.isActive():
+            self.timeline.setValue(gen)
+        self._timeline_sync = False
+        self.history_label.setText(
+            f"{first or 0:,}–{last or 0:,} · {nbytes / (1 << 20):.1f}/{history.cap >> 20} MB · {points} puntos"
+        )
+
+    def on_timeline_change(self, value):
+        if self._timeline_sync:
+            return
+        # Drags are coalesced: the simulation seeks to wherever the handle stops for a moment
+        self._seek_target = value
+        self.seek_timer.start(30)
+
+    def seek(self):
+        if self._seek_target is not None:
+            self.sim.seek(self._seek_target)
+            self._seek_target = None
+
+    def on_history_change(self, state):
+        self.sim.set_history(History(self.history_cap_spin.value() << 20) if self.history_check.isChecked() else None)
+        self.timeline.setEnabled(self.history_check.isChecked())
+
+    def on_history_cap_change(self, value):
+        history = self.sim.history
+        if history is not None:
+            history.cap = value << 20
+
+    def on_stats_change(self, state):
+        stats = StatsRing() if self.stats_check.isChecked() else None
+        self.sim.set_stats(stats)
+        self.stats_chart.stats = stats
+        self.stats_chart.update()
+        self.stats_label.setText("")
+        self._stats_due = 0.0
+
+    def update_stats(self):
+        # A few times a second: the ring fills at stepping speed
+        stats = self.stats_chart.stats
+        now = time.perf_counter()
+        if stats is None or now < self._stats_due:
+            return
+        self._stats_due = now + 0.25
+        self.stats_chart.update()
+        last = stats.last()
+        if last is None:
+            self.stats_label.setText("")
+            return
+        known = lambda v: v == v
+        parts = [f"Población {int(last['population']):,}"]
+        if known(last["births"]):
+            parts.append(f"+{int(last['births']):,} / −{int(last['deaths']):,}")
+        if known(last["top"]):
+            parts.append(f"{int(last['right'] - last['left'])}×{int(last['bottom'] - last['top'])}")
+        if known(last["active"]):
+            parts.append(f"activa {int(last['active']):,}")
+        self.stats_label.setText(" · ".join(parts))
+
+    def export_stats(self):
+        stats = self.stats_chart.stats
+        if stats is None or not len(stats):
+            self.statusBar().showMessage("No hay estadísticas que exportar", 8000)
+            return
+        path, chosen = QFileDialog.getSaveFileName(self, "Exportar estadísticas", "estadisticas.csv", STATS_FILTERS)
+        if not path:
+            return
+        if not path.lower().endswith((".csv", ".npy")):
+            path += ".npy" if chosen.startswith("NumPy") else ".csv"
+        try:
+            stats.save(path)
+        except OSError as exc:
+            self.statusBar().showMessage(f"No se pudo exportar: {exc}", 8000)
+            return
+        self.statusBar().showMessage(f"Estadísticas guardadas en {path}", 8000)
 
     def insert_selected_pattern(self):
-        name = self.patterns_combo.currentText()
-        strings = self.patterns.get(name)
-        if strings:
-            self.insert_pattern_center(strings)
-
-    def insert_pattern_center(self, strings):
-        offs = self.pattern_offsets(strings)
-        ph = len(strings)
-        pw = len(strings[0])
-        cr = self.rows // 2 - ph // 2
-        cc = self.cols // 2 - pw // 2
-        for dr, dc in offs:
-            rr = cr + dr
-            cc2 = cc + dc
-            if self.wrap:
-                rr = (rr + self.rows) % self.rows
-                cc2 = (cc2 + self.cols) % self.cols
-                self.grid[rr][cc2] = 1
-            else:
-                if 0 <= rr < self.rows and 0 <= cc2 < self.cols:
-                    self.grid[rr][cc2] = 1
-        self.board.update()
+        self.insert_named(self.patterns_combo.currentText())
+
+    def insert_named(self, name):
+        try:
+            pattern = self.library.get(name)
+        except (KeyError, OSError, ValueError) as exc:
+            self.statusBar().showMessage(f"No se pudo cargar {name}: {exc}", 8000)
+            return
+        self.insert_pattern(pattern)
+
+    def insert_pattern(self, pattern):
+        offs = pattern.offsets
+        cr, cc = pattern.origin(self.rows, self.cols)
+        self.sim.submit(lambda e: e.stamp(offs, cr, cc))
+
+    def import_pattern(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importar patrón", self.library.directory or "", PATTERN_FILTERS)
+        if not path:
+            return
+        try:
+            name = self.library.add_file(path)
+            pattern = self.library.get(name)
+            rule = parse_rule(pattern.rule) if pattern.rule else None
+        except (OSError, ValueError) as exc:
+            self.statusBar().showMessage(f"No se pudo importar {os.path.basename(path)}: {exc}", 8000)
+            return
+        if self.patterns_combo.findText(name) < 0:
+            self.patterns_combo.addItem(name)
+        self.patterns_combo.setCurrentText(name)
+        # The pattern's own rule, when the engine can run it
+        if rule is not None and rule != self.rule and (ENGINES[self.engine_name].bounded or not rule.b0):
+            self.set_rule(rule)
+        self.insert_pattern(pattern)
+        self.statusBar().showMessage(f"{name}: {pattern.population():,} células, regla {self.rule}", 8000)
+
+    def export_pattern(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar patrón", "patron.rle", PATTERN_FILTERS)
+        if not path:
+            return
+        cells = []
+        self.sim.submit(lambda e: cells.append(np.column_stack(e.live_cells())))
+        self.sim.wait_idle()
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            write_pattern(path, cells[0], name, self.rule.rulestring)
+        except OSError as exc:
+            self.statusBar().showMessage(f"No se pudo exportar: {exc}", 8000)
+            return
+        self.statusBar().showMessage(f"{len(cells[0]):,} células guardadas en {path}", 8000)
+
+    def save_board(self):
+        path, chosen = QFileDialog.getSaveFileName(self, "Guardar tablero", "tablero.vida", BOARD_FILTERS)
+        if not path:
+            return
+        compress = chosen != BOARD_FILTER
+        errors = []
+
+        def save(e):
+            try:
+                save_engine(path, e, compress)
+            except OSError as exc:
+                errors.append(exc)
+
+        self.sim.submit(save)
+        self.sim.wait_idle()
+        if errors:
+            self.statusBar().showMessage(f"No se pudo guardar: {errors[0]}", 8000)
+        else:
+            self.statusBar().showMessage(f"Tablero guardado en {path}", 8000)
+
+    def open_board(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Abrir tablero", "", BOARD_FILTER)
+        if not path:
+            return
+        try:
+            board = BoardFile.open(path)
+        except (OSError, ValueError) as exc:
+            self.statusBar().showMessage(f"No se pudo abrir {os.path.basename(path)}: {exc}", 8000)
+            return
+        if board.rule.b0 and not ENGINES[self.engine_name].bounded:
+            self.statusBar().showMessage(f"{self.engine_name} no admite reglas con B0 (usa un motor acotado)", 8000)
+            return
+        self.rows, self.cols = board.rows, board.cols
+        self.rule = board.rule
+        self.show_rule()
+        self.wrap_check.setChecked(board.wrap)
+        self.sim.submit(board.restore)
+        self.fit_board()
+        self.statusBar().showMessage(f"{os.path.basename(path)}: generación {board.generation:,}", 8000)
+
+    def on_record_toggle(self, checked):
+        if checked:
+            path, _ = QFileDialog.getSaveFileName(self, "Grabar ejecución", "grabacion.vidarec", "Grabación (*.vidarec)")
+            if not path:
+                self.btn_record.setChecked(False)
+                return
+            self.recorder = Recorder(path)
+            self.sim.set_recorder(self.recorder)
+            self.statusBar().showMessage(f"Grabando en {path}")
+        elif self.recorder is not None:
+            self.sim.set_recorder(None)
+            self.sim.wait_idle()
+            rec, self.recorder = self.recorder, None
+            self.statusBar().showMessage(f"{rec.records:,} generaciones grabadas en {rec.path}", 8000)
+
+    def on_animation_toggle(self, checked):
+        if not checked:
+            # Unchecking while it runs cancels; the poll reports the end
+            if self.animation is not None:
+                self.animation["stop"].set()
+            return
+        path, chosen = QFileDialog.getSaveFileName(self, "Exportar animación", "vida.gif", ANIMATION_FILTERS)
+        if not path:
+            self.btn_animation.setChecked(False)
+            return
+        generations, ok = QInputDialog.getInt(self, "Exportar animación", "Generaciones", 500, 1, 10_000_000)
+        if not ok:
+            self.btn_animation.setChecked(False)
+            return
+        if not os.path.splitext(path)[1]:
+            path += chosen[chosen.index("*") + 1:-1]
+        boards = []
+        self.sim.submit(lambda e: boards.append(BoardFile(np.array(e.packed()), e.cols, e.rule, e.wrap, e.generation)))
+        self.sim.wait_idle()
+        board = boards[0]
+        scale = max(1, min(self.cell_size, ANIMATION_MAX_SIDE // max(board.rows, board.cols)))
+        try:
+            writer = open_writer(path, theme_colors(self.current_palette, self.dark_mode))
+        except (OSError, ValueError) as exc:
+            self.statusBar().showMessage(f"No se pudo exportar: {exc}", 8000)
+            self.btn_animation.setChecked(False)
+            return
+        state = {"path": path, "total": generations + 1, "done": 0, "error": None, "stop": threading.Event()}
+        name = self.engine_name
+
+        def export():
+            engine = create_engine(name, board.rows, board.cols, board.wrap)
+            try:
+                board.restore(engine)
+                export_frames(
+                    engine_frames(engine, generations), board.rows, board.cols, writer, scale,
+                    progress=lambda done, generation: state.update(done=done), stop=state["stop"],
+                )
+            except (OSError, ValueError) as exc:
+                state["error"] = exc
+            finally:
+                writer.close()
+                engine.close()
+
+        state["thread"] = threading.Thread(target=export, daemon=True)
+        self.animation = state
+        state["thread"].start()
+        self.animation_timer.start(250)
+
+    def poll_animation(self):
+        state = self.animation
+        if state["thread"].is_alive():
+            self.statusBar().showMessage(f"Exportando animación: {state['done']:,}/{state['total']:,} cuadros")
+            return
+        self.animation_timer.stop()
+        self.animation = None
+        self.btn_animation.setChecked(False)
+        if state["error"] is not None:
+            self.statusBar().showMessage(f"No se pudo exportar: {state['error']}", 8000)
+        elif state["done"] < state["total"]:
+            self.statusBar().showMessage(f"Exportación cancelada: {state['done']:,} cuadros en {state['path']}", 8000)
+        else:
+            self.statusBar().showMessage(f"{state['done']:,} cuadros guardados en {state['path']}", 8000)
 
     def info_text(self):
         return (
@@ -554,7 +1754,9 @@ class GameOfLifeWindow(QMainWindow):
             "Reglas:\n"
             "1) Supervivencia: una célula viva con 2 o 3 vecinas vivas sigue viva.\n"
             "2) Nacimiento: una célula muerta con exactamente 3 vecinas vivas nace.\n"
-            "3) En otros casos, la célula muere o permanece muerta.\n\n"
+            "3) En otros casos, la célula muere o permanece muerta.\n"
+            "En notación B/S es B3/S23: nace con 3 vecinas (B), sobrevive con 2 o 3 (S). 'Regla' permite "
+            "otras como HighLife (B36/S23), Seeds (B2/S) o Day & Night (B3678/S34678).\n\n"
             "Vecindario:\n"
             "Se usa el vecindario de Moore (8 vecinos alrededor). Con 'Envoltura' activada, los bordes "
             "se conectan como en un toro: el tablero no tiene límites.\n\n"
@@ -562,12 +1764,31 @@ class GameOfLifeWindow(QMainWindow):
             "- Estables: Block, Boat, Loaf, Tub.\n"
             "- Osciladores: Blinker, Toad, Beacon, Pulsar.\n"
             "- Naves espaciales: Glider, Lightweight Spaceship (LWSS).\n"
-            "- Otros: Pentomino R. Existen generadores como el Gosper Glider Gun.\n\n"
+            "- Otros: Pentomino R, Acorn, Diehard y el cañón de Gosper (Gosper Glider Gun), que dispara "
+            "un planeador cada 30 generaciones.\n\n"
             "Controles:\n"
             "- Iniciar/Pausar, Paso, Limpiar, Aleatorio, Velocidad (ms).\n"
+            "- Densidad y Semilla: proporción de células vivas de 'Aleatorio'; con una semilla fija el "
+            "tablero sale igual en cada motor.\n"
+            "- Historial: la barra vuelve a cualquier generación pasada; editar el tablero descarta las "
+            "posteriores. 'Máx.' limita la memoria usada.\n"
+            "- Estadísticas: población, nacimientos y muertes de cada generación en una gráfica, con el "
+            "tamaño de la región viva y el área activa; Exportar las guarda en .csv o .npy.\n"
             "- Envoltura: bordes toroidales.\n"
+            "- Regla: elige un preset o escribe una regla B/S.\n"
             "- Paleta y Oscuro: personaliza colores.\n"
-            "- Patrones: selecciona e inserta centrado.\n\n"
+            "- Guardar/Abrir: tablero en formato .vida (regla, envoltura y generación incluidas). "
+            "Grabar: guarda cada generación en un .vidarec para reproducirla con 'python -m life replay'.\n"
+            "- Animación: exporta las próximas generaciones a GIF, PNG por cuadro o vídeo (.y4m, .rgb) con la "
+            "paleta y el tema actuales, sin detener el tablero.\n"
+            "- Patrones: selecciona e inserta centrado; Importar/Exportar leen y guardan .rle, .cells y .npy. "
+            "Doble clic en una miniatura de abajo la inserta.\n"
+            "- Pestañas: Nuevo y Duplicar abren otro tablero con los ajustes del actual; los ocultos siguen "
+            "avanzando sin dibujarse.\n"
+            "- Pincel: clic y arrastre dibuja un trazo continuo; Alternar lo pone al contrario de la primera "
+            "célula, Dibujar y Borrar la fijan. El tamaño es el diámetro en células.\n"
+            "- Vista: arrastre con botón derecho para desplazar, rueda para acercar/alejar. Un tablero más grande "
+            "que la ventana se ajusta alejado: cada píxel muestra la densidad de un bloque de células.\n\n"
             "Créditos:\n"
             "Creado por John H. Conway. Es un sistema determinista con comportamiento emergente muy "
             "estudiado en matemáticas y ciencias de la computación.\n"
@@ -583,26 +1804,14 @@ class GameOfLifeWindow(QMainWindow):
             text.setStyleSheet("QTextEdit { background: #121212; color: #e0e0e0; }")
         else:
             text.setStyleSheet("QTextEdit { background: #ffffff; color: #000000; }")
-        scroll = QScrollArea(dlg)
-        content = QWidget()
-        v = QVBoxLayout()
-        alive = self.palettes.get(self.current_palette, "#00e676")
-        bg = "#121212" if self.dark_mode else "#ffffff"
-        for name, strings in self.patterns.items():
-            name_lbl = QLabel(name)
-            if self.dark_mode:
-                name_lbl.setStyleSheet("QLabel { color: #e0e0e0; }")
-            preview = PatternPreview(strings, cell_size=12, alive_color=alive, bg_color=bg)
-            v.addWidget(name_lbl)
-            v.addWidget(preview)
-        content.setLayout(v)
-        scroll.setWidget(content)
-        scroll.setWidgetResizable(True)
+        gallery = PatternGallery(self.library, *theme_colors(self.current_palette, self.dark_mode))
+        gallery.setToolTip("Doble clic para insertar")
+        gallery.chosen.connect(self.insert_named)
         buttons = QDialogButtonBox(QDialogButtonBox.Close, parent=dlg)
         buttons.rejected.connect(dlg.reject)
         layout = QVBoxLayout()
         layout.addWidget(text)
-        layout.addWidget(scroll)
+        layout.addWidget(gallery)
         layout.addWidget(buttons)
         dlg.setLayout(layout)
         dlg.resize(700, 700)
@@ -644,30 +1853,29 @@ class GameOfLifeWindow(QMainWindow):
         self.rows = rows
         self.cols = cols
         self.cell_size = cell_size
-        if preserve:
-            old = self.grid
-            old_rows = len(old)
-            old_cols = len(old[0]) if old_rows else 0
-            new_grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
-            sr = max(0, (self.rows - old_rows) // 2)
-            sc = max(0, (self.cols - old_cols) // 2)
-            for r in range(old_rows):
-                for c in range(old_cols):
-                    rr = r + sr
-                    cc = c + sc
-                    if 0 <= rr < self.rows and 0 <= cc < self.cols:
-                        new_grid[rr][cc] = old[r][c]
-            self.grid = new_grid
-        else:
-            self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
-        self.board.update_grid(self.grid, self.cell_size)
+        self.sim.submit(lambda e: e.resize(rows, cols, preserve=preserve))
+        self.board.set_cell_size(self.cell_size)
         self.resize(self.board.width() + 20, self.board.height() + 100)
+        self.fit_board()
+
+    def closeEvent(self, event):
+        self.frame_timer.stop()
+        if self.animation is not None:
+            self.animation["stop"].set()
+            self.animation["thread"].join()
+        for session in self.sessions:
+            session["sim"].close()
+        self.pool.close()
+        super().closeEvent(event)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self.fit_board()
+
+    def fit_board(self):
         if not self.auto_fit:
             return
-        
+
         # Available space for board is roughly current board size
         # But we need to be careful not to shrink indefinitely
         # Using self.board.width() is safe because it's managed by layout
@@ -677,10 +1885,16 @@ class GameOfLifeWindow(QMainWindow):
         if board_w <= 0 or board_h <= 0:
             return
 
-        new_cell = max(1, int(min(board_w / self.cols, board_h / self.rows)))
-        if new_cell != self.cell_size:
+        # A board bigger than the widget is shown zoomed out: the smallest power
+        # of two cells per pixel that fits (blocks then line up with Bits words)
+        fit = min(board_w / self.cols, board_h / self.rows)
+        new_cell = max(1, int(fit))
+        k = 1
+        while fit * k < 1 and k < GridWidget.MAX_CELLS_PER_PIXEL:
+            k *= 2
+        if (new_cell, k) != (self.cell_size, self.board.cells_per_pixel):
             self.cell_size = new_cell
-            self.board.update_grid(self.grid, self.cell_size)
+            self.board.set_cell_size(self.cell_size, k)
 
 
 def main():
@@ -689,10 +1903,17 @@ def main():
     parser.add_argument("--rows", type=int, default=50)
     parser.add_argument("--cols", type=int, default=80)
     parser.add_argument("--cell-size", type=int, default=12)
+    parser.add_argument("--engine", choices=list(ENGINES.keys()), default="NumPy")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--patterns", default=PATTERNS_DIR)
+    parser.add_argument("--threads", type=int, default=None, help="hilos que comparten las simulaciones de las pestañas")
     args = parser.parse_args()
 
     app = QApplication([])
-    w = GameOfLifeWindow(rows=args.rows, cols=args.cols, cell_size=args.cell_size)
+    w = GameOfLifeWindow(
+        rows=args.rows, cols=args.cols, cell_size=args.cell_size, engine=args.engine, workers=args.workers,
+        patterns_dir=args.patterns, threads=args.threads,
+    )
     w.resize(w.board.width() + 20, w.board.height() + 100)
     w.show()
     app.exec()